@@ -0,0 +1,297 @@
+from python_script.data.discourse_converter import DiscourseConverter
+from bs4 import BeautifulSoup as soup
+from datetime import datetime
+import subprocess
+import argparse
+import platform
+import tempfile
+import shutil
+import json
+import time
+import os
+
+"""
+Throughput benchmark of the converter with synthetic Discourse pages.
+The pages are made from the structure of the test fixtures (the profile and the post history of Matt_Cliffe),
+with a configurable number of users, posts per user and text length per post, so the size of the pages can be chosen.
+Times the conversion of all pages end to end (DiscourseConverter.__call__) for every parser and number of workers,
+the extraction of one profile and one post history per parser,
+and every field extractor of the converter (get_username, get_post_topic, ...) on one profile and one post history.
+Every run is appended to a results file, the last run with the same settings is shown for comparison.
+
+Run from the repository folder:
+python -m python_script.benchmark.benchmark_converter --users 200 --posts-per-user 100 --parsers html.parser lxml --workers 1 4
+"""
+
+html_folder = os.path.join("python_script", "test", "test_discourse_converter", "html_files")
+results_filepath = os.path.join("python_script", "benchmark", "results", "converter_throughput.jsonl")
+website_url = "https://discourse.example.org"
+
+
+class SyntheticPages():
+    """
+    Makes profile and post history pages with the structure of the fixture pages
+    """
+
+    categories = ["Discussion", "Admin", "Projects", "Events", "Help"]
+
+    def __init__(self, template_folder=html_folder, template_username="Matt_Cliffe"):
+        self.template_username = template_username
+        with open(os.path.join(template_folder, "profiles", template_username + ".test"), encoding="utf-8") as profile_html:
+            self.profile_template = profile_html.read()
+        with open(os.path.join(template_folder, "post_histories", template_username + ".test"), encoding="utf-8") as post_history_html:
+            post_history_soup = soup(post_history_html, "html.parser")
+
+        # the first post with placeholders for the fields of the post
+        posts = post_history_soup.find_all('div', {'class': 'user-stream-item item ember-view'})
+        post = posts[0]
+        post.find('span', {'class': 'relative-date date'})['data-time'] = "__TIMESTAMP__"
+        topic_a = post.find('span', {'class': 'title'}).find('a')
+        topic_a['href'] = "__TOPIC_LINK__"
+        topic_a.string = "__TOPIC__"
+        post.find('span', {'class': 'category-name'}).string = "__CATEGORY__"
+        post.find('p', {'class': 'excerpt'}).find(text=True, recursive=False).replace_with("__TEXT__")
+        self.post_template = str(post)
+
+        # the page around the posts
+        for other_post in posts[1:]:
+            other_post.decompose()
+        post.replace_with("__POSTS__")
+        self.page_prefix, self.page_suffix = str(post_history_soup).split("__POSTS__")
+
+    def make_profile(self, username: str) -> str:
+        return self._replace_username(self.profile_template, username)
+
+    def make_post_history(self, username: str, posts_per_user: int, text_length: int, seed=0) -> str:
+        """
+        Input:
+        :param username: string, username of the page
+        :param posts_per_user: int, number of posts on the page
+        :param text_length: int, number of characters of the text of every post
+        :param seed: int, makes the topics and timestamps of different users differ
+        """
+        words = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor " * (text_length // 70 + 1))[:text_length]
+        posts = []
+        for index in range(posts_per_user):
+            topic_id = 1000 + (seed * 7 + index) % 500
+            post = self.post_template
+            post = post.replace("__TIMESTAMP__", str(1556527466920 - (seed * posts_per_user + index) * 60000))
+            post = post.replace("__TOPIC_LINK__", "/t/topic-" + str(topic_id) + "/" + str(topic_id) + "/" + str(index + 2))
+            post = post.replace("__TOPIC__", "Topic " + str(topic_id))
+            post = post.replace("__CATEGORY__", self.categories[topic_id % len(self.categories)])
+            post = post.replace("__TEXT__", words)
+            posts.append(post)
+        return self._replace_username(self.page_prefix + "\n".join(posts) + self.page_suffix, username)
+
+    def write(self, folder: str, users: int, posts_per_user: int, text_length: int):
+        """
+        Writes the pages of the users to the profiles and post_histories folders
+
+        Output:
+        list of the profile filepaths, list of the post history filepaths and the size of all pages in bytes
+        """
+        profile_filepaths = []
+        post_history_filepaths = []
+        number_of_bytes = 0
+        for folder_name in ["profiles", "post_histories"]:
+            os.makedirs(os.path.join(folder, folder_name), exist_ok=True)
+
+        for index in range(users):
+            username = "User_" + str(index).zfill(5)
+            profile_filepaths.append(os.path.join(folder, "profiles", username + ".html"))
+            post_history_filepaths.append(os.path.join(folder, "post_histories", username + ".html"))
+            for filepath, page in [(profile_filepaths[-1], self.make_profile(username)),
+                                   (post_history_filepaths[-1], self.make_post_history(username, posts_per_user, text_length, seed=index))]:
+                with open(filepath, 'w', encoding="utf-8") as page_file:
+                    page_file.write(page)
+                number_of_bytes = number_of_bytes + os.path.getsize(filepath)
+        return profile_filepaths, post_history_filepaths, number_of_bytes
+
+    def _replace_username(self, page: str, username: str) -> str:
+        page = page.replace(self.template_username, username)
+        page = page.replace(self.template_username.lower(), username.lower())
+        return page.replace(self.template_username.replace("_", " "), username.replace("_", " "))
+
+
+def time_end_to_end(profile_filepaths: list, post_history_filepaths: list, json_folder: str, parser: str, workers: int) -> dict:
+    """
+    convert all pages into a new json folder and time it
+    """
+    if os.path.isdir(json_folder):
+        shutil.rmtree(json_folder)
+    converter = DiscourseConverter(website_url, dataset_folder=json_folder, workers=workers, parser=parser, use_manifest=False)
+    converter.user_profile_json_filepath_list = []
+    converter.user_post_history_json_filepath_list = []
+
+    start = time.perf_counter()
+    _, post_histories_json = converter(profile_filepaths, post_history_filepaths, supress_output=True)
+    duration = time.perf_counter() - start
+
+    number_of_posts = 0
+    for post_history_json_filepath in post_histories_json:
+        with open(post_history_json_filepath) as post_history_json:
+            number_of_posts = number_of_posts + len(json.load(post_history_json))
+    return {'time': duration, 'posts': number_of_posts}
+
+
+def time_extractors(profile_filepath: str, post_history_filepath: str, parser: str, repeat: int) -> dict:
+    """
+    time the extraction of one profile and one post history
+    """
+    converter = DiscourseConverter(website_url, parser=parser)
+    extractors = {'profile': lambda: converter.extract_profile(profile_filepath),
+                  'post_history': lambda: list(converter.iter_post_history(post_history_filepath))}
+
+    times = {}
+    for name, extract in extractors.items():
+        extract()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            extract()
+        times[name] = (time.perf_counter() - start) / repeat
+    return times
+
+
+def time_fields(profile_filepath: str, post_history_filepath: str, repeat: int) -> dict:
+    """
+    time every field extractor of the converter on the parsed pages,
+    the post extractors are timed for all posts of the post history
+
+    Output:
+    dict with the time per page in seconds of every extractor
+    """
+    with open(profile_filepath, encoding="utf-8") as profile_html:
+        profile_soup = soup(profile_html, "html.parser")
+    with open(post_history_filepath, encoding="utf-8") as post_history_html:
+        posts = soup(post_history_html, "html.parser").find_all('div', {'class': 'user-stream-item item ember-view'})
+
+    profile_extractors = [DiscourseConverter.get_username, DiscourseConverter.get_full_name, DiscourseConverter.get_member_status,
+                          DiscourseConverter.get_join_timestamp, DiscourseConverter.get_last_post_timestamp]
+    post_extractors = [DiscourseConverter.get_post_topic, DiscourseConverter.get_post_topic_link, DiscourseConverter.get_post_category,
+                       DiscourseConverter.get_post_timestamp, DiscourseConverter.get_post_text]
+
+    times = {}
+    for extractor, elements in [(extractor, [profile_soup]) for extractor in profile_extractors] + [(extractor, posts) for extractor in post_extractors]:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for element in elements:
+                extractor(element)
+        times[extractor.__name__] = (time.perf_counter() - start) / repeat
+    return times
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(filepath=results_filepath) -> list:
+    if not os.path.isfile(filepath): return []
+    with open(filepath, encoding="utf-8") as results_file:
+        return [json.loads(line) for line in results_file if line.strip() != ""]
+
+
+def record_result(result: dict, filepath=results_filepath):
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'a', encoding="utf-8") as results_file:
+        results_file.write(json.dumps(result) + "\n")
+
+
+def run(users=100, posts_per_user=50, text_length=200, parsers=DiscourseConverter.parsers, workers=None, repeat=5) -> dict:
+    """
+    run the benchmark with synthetic pages in a temporary folder
+
+    Input:
+    :param workers: list, numbers of workers of the end to end conversion, one worker if None
+
+    Output:
+    dict with the settings, the end to end throughput per parser and number of workers,
+    the extraction times per parser and the times of the field extractors
+    """
+    if workers is None: workers = [1]
+    result = {'date': datetime.now().isoformat(timespec="seconds"),
+              'commit': get_commit(),
+              'python': platform.python_version(),
+              'settings': {'users': users, 'posts_per_user': posts_per_user, 'text_length': text_length},
+              'end_to_end': {},
+              'extractors': {},
+              'fields': {}}
+
+    folder = tempfile.mkdtemp()
+    try:
+        profile_filepaths, post_history_filepaths, number_of_bytes = SyntheticPages().write(os.path.join(folder, "html_files"), users, posts_per_user, text_length)
+        result['settings']['bytes'] = number_of_bytes
+
+        for parser in parsers:
+            for number_of_workers in workers:
+                timing = time_end_to_end(profile_filepaths, post_history_filepaths, os.path.join(folder, "json_files"), parser, number_of_workers)
+                assert timing['posts'] == users * posts_per_user, "the converter did not find all posts of the synthetic pages"
+                result['end_to_end'][parser + " x" + str(number_of_workers)] = {'time': timing['time'],
+                                                                                 'pages_per_second': 2 * users / timing['time'],
+                                                                                 'posts_per_second': timing['posts'] / timing['time'],
+                                                                                 'megabytes_per_second': number_of_bytes / 1e6 / timing['time']}
+            result['extractors'][parser] = time_extractors(profile_filepaths[0], post_history_filepaths[0], parser, repeat)
+        result['fields'] = time_fields(profile_filepaths[0], post_history_filepaths[0], repeat)
+    finally:
+        shutil.rmtree(folder)
+
+    return result
+
+
+def print_result(result: dict, previous=None):
+    settings = result['settings']
+    print("users: " + str(settings['users']) + ", posts per user: " + str(settings['posts_per_user'])
+          + ", text length: " + str(settings['text_length']) + ", pages: " + str(settings['bytes'] // 1024) + " kB")
+    if previous is not None: print("compared with " + str(previous['commit']) + " from " + previous['date'])
+
+    print("run".ljust(24) + "time [s]".rjust(10) + "pages/s".rjust(10) + "posts/s".rjust(12) + "MB/s".rjust(8) + "speedup".rjust(10))
+    for name, timing in result['end_to_end'].items():
+        speedup = ""
+        if previous is not None and name in previous['end_to_end']:
+            speedup = "%.2fx" % (previous['end_to_end'][name]['time'] / timing['time'])
+        print(name.ljust(24) + ("%.2f" % timing['time']).rjust(10) + ("%.1f" % timing['pages_per_second']).rjust(10)
+              + ("%.0f" % timing['posts_per_second']).rjust(12) + ("%.2f" % timing['megabytes_per_second']).rjust(8) + speedup.rjust(10))
+
+    print()
+    print("parser".ljust(24) + "profile [ms]".rjust(14) + "post history [ms]".rjust(20))
+    for parser, times in result['extractors'].items():
+        print(parser.ljust(24) + ("%.2f" % (times['profile'] * 1000)).rjust(14) + ("%.2f" % (times['post_history'] * 1000)).rjust(20))
+
+    print()
+    print("field extractor".ljust(24) + "time per page [ms]".rjust(20) + "speedup".rjust(10))
+    for name, field_time in result.get('fields', {}).items():
+        speedup = ""
+        if previous is not None and name in previous.get('fields', {}):
+            speedup = "%.2fx" % (previous['fields'][name] / field_time)
+        print(name.ljust(24) + ("%.3f" % (field_time * 1000)).rjust(20) + speedup.rjust(10))
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="converter throughput with synthetic Discourse pages")
+    argument_parser.add_argument("--users", type=int, default=100)
+    argument_parser.add_argument("--posts-per-user", type=int, default=50)
+    argument_parser.add_argument("--text-length", type=int, default=200, help="characters of the text of every post")
+    argument_parser.add_argument("--parsers", nargs="+", default=["html.parser", "lxml", "lxml-iterparse"], choices=DiscourseConverter.parsers)
+    argument_parser.add_argument("--workers", nargs="+", type=int, default=[1])
+    argument_parser.add_argument("--repeat", type=int, default=5, help="repetitions of the extractor timing")
+    argument_parser.add_argument("--results", default=results_filepath, help="file the results are appended to")
+    argument_parser.add_argument("--no-record", action="store_true", help="do not append the results")
+    arguments = argument_parser.parse_args()
+
+    result = run(arguments.users, arguments.posts_per_user, arguments.text_length, arguments.parsers, arguments.workers, arguments.repeat)
+
+    # last run with the same settings
+    previous = None
+    for earlier_result in load_results(arguments.results):
+        if all([earlier_result['settings'].get(key) == result['settings'][key] for key in ['users', 'posts_per_user', 'text_length']]):
+            previous = earlier_result
+
+    print_result(result, previous)
+    if not arguments.no_record:
+        record_result(result, arguments.results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+from python_script.data.discourse_converter import DiscourseConverter
+from bs4 import BeautifulSoup as soup
+from bs4.element import Tag
+import tracemalloc
+import os
+import time
+
+"""
+Benchmark of the BeautifulSoup extraction of the converter.
+Compares the extraction with one search per field (get_username, get_post_topic, ...)
+with the single pass extraction, counts the tree searches and the visited elements.
+Compares parsing the whole page with parsing only the parts with data (the strainers of the converter),
+also after cutting the page to these parts, counts the elements of the tree and measures the memory.
+
+Run from the repository folder:
+python -m python_script.benchmark.benchmark_extraction
+"""
+
+html_folder = os.path.join("python_script", "test", "test_discourse_converter", "html_files")
+website_url = "https://discourse.example.org"
+
+
+class TraversalCounter():
+    """
+    Counts the searches and the visited elements of all searches over the descendants of a tag
+    """
+
+    def __init__(self):
+        self.searches = 0
+        self.visited_elements = 0
+        self.descendants = Tag.descendants
+
+    def __enter__(self):
+        counter = self
+        descendants = self.descendants
+
+        def counted_descendants(tag):
+            counter.searches = counter.searches + 1
+            for element in descendants.fget(tag):
+                counter.visited_elements = counter.visited_elements + 1
+                yield element
+
+        Tag.descendants = property(counted_descendants)
+        return self
+
+    def __exit__(self, *args):
+        Tag.descendants = self.descendants
+
+
+def extract_profile_by_field(profile: soup, username: str) -> dict:
+    # the extraction before the single pass, every field is a search of its own
+    profile_dict = {}
+    if DiscourseConverter.get_username(profile) is not None:
+        profile_dict['username'] = DiscourseConverter.get_username(profile)
+        profile_dict['full_name'] = DiscourseConverter.get_full_name(profile)
+        profile_dict['member_status'] = DiscourseConverter.get_member_status(profile)
+        if DiscourseConverter.get_join_timestamp(profile) is not None:
+            profile_dict['join_timestamp'] = DiscourseConverter.get_join_timestamp(profile)
+        if DiscourseConverter.get_last_post_timestamp(profile) is not None:
+            profile_dict['last_post_timestamp'] = DiscourseConverter.get_last_post_timestamp(profile)
+    else:
+        profile_dict['username'] = username
+    return profile_dict
+
+
+def extract_post_history_by_field(post_history: soup, username: str) -> list:
+    # the extraction before the single pass, every field is a search of its own
+    post_history_list = []
+    for post_soup in post_history.find_all('div', {'class': 'user-stream-item item ember-view'}):
+        post_dict = {}
+        post_dict['username'] = username
+        post_dict['topic'] = DiscourseConverter.get_post_topic(post_soup)
+        post_dict['topic_link'] = website_url + DiscourseConverter.get_post_topic_link(post_soup)
+        post_dict['category'] = DiscourseConverter.get_post_category(post_soup)
+        post_dict['post_timestamp'] = DiscourseConverter.get_post_timestamp(post_soup)
+        post_dict['text'] = DiscourseConverter.get_post_text(post_soup)
+        post_history_list.append(post_dict)
+    return post_history_list
+
+
+def run(extract, page_soup, repeat: int) -> dict:
+    """
+    count the traversals of one extraction and time it
+    """
+    with TraversalCounter() as counter:
+        data = extract(page_soup)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        extract(page_soup)
+    return {'data': data,
+            'searches': counter.searches,
+            'visited_elements': counter.visited_elements,
+            'time': (time.perf_counter() - start) / repeat}
+
+
+def run_parse(page_html: bytes, parse_only, repeat: int, start_pattern=None) -> dict:
+    """
+    count the elements of the tree of one parse, measure its memory and time it,
+    the page is cut to the elements of the start pattern first if one is given
+    """
+    def parse():
+        page = page_html if start_pattern is None else DiscourseConverter._slice_elements(page_html, start_pattern)
+        return soup(page, "html.parser", parse_only=parse_only, from_encoding="utf-8")
+
+    tracemalloc.start()
+    page_soup = parse()
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse()
+    return {'elements': len(page_soup.find_all(True)),
+            'memory': memory,
+            'time': (time.perf_counter() - start) / repeat}
+
+
+def main_parsing(repeat=5):
+    print("page".ljust(14) + "parse".ljust(14) + "elements".rjust(10) + "memory [kB]".rjust(14) + "time [ms]".rjust(12))
+    for page, folder, strainer, start_pattern in [("profile", "profiles", DiscourseConverter.profile_strainer, DiscourseConverter.profile_start_pattern),
+                                                  ("post history", "post_histories", DiscourseConverter.post_history_strainer, DiscourseConverter.post_history_start_pattern)]:
+        with open(os.path.join(html_folder, folder, "Matt_Cliffe.test"), 'rb') as page_file:
+            page_html = page_file.read()
+
+        results = {"whole page": run_parse(page_html, None, repeat),
+                   "strained": run_parse(page_html, strainer, repeat),
+                   "sliced": run_parse(page_html, strainer, repeat, start_pattern)}
+        for parse, result in results.items():
+            print(page.ljust(14) + parse.ljust(14) + str(result['elements']).rjust(10) + str(result['memory'] // 1024).rjust(14) + ("%.2f" % (result['time'] * 1000)).rjust(12))
+
+
+def main(repeat=20):
+    converter = DiscourseConverter(website_url)
+
+    with open(os.path.join(html_folder, "profiles", "Matt_Cliffe.test"), 'rb') as profile_html:
+        profile_soup = soup(profile_html, "html.parser")
+    with open(os.path.join(html_folder, "post_histories", "Matt_Cliffe.test"), 'rb') as post_history_html:
+        post_history_soup = soup(post_history_html, "html.parser")
+
+    benchmarks = [("profile", profile_soup,
+                   lambda page: extract_profile_by_field(page, "Matt_Cliffe"),
+                   lambda page: converter.extract_profile_from_soup(page, "Matt_Cliffe")),
+                  ("post history", post_history_soup,
+                   lambda page: extract_post_history_by_field(page, "Matt_Cliffe"),
+                   lambda page: converter.extract_post_history_from_soup(page, "Matt_Cliffe"))]
+
+    print("page".ljust(14) + "extraction".ljust(14) + "searches".rjust(10) + "visited".rjust(10) + "time [ms]".rjust(12))
+    for page, page_soup, by_field, single_pass in benchmarks:
+        results = {"by field": run(by_field, page_soup, repeat), "single pass": run(single_pass, page_soup, repeat)}
+        assert results["by field"]['data'] == results["single pass"]['data']
+
+        for extraction, result in results.items():
+            print(page.ljust(14) + extraction.ljust(14) + str(result['searches']).rjust(10) + str(result['visited_elements']).rjust(10) + ("%.2f" % (result['time'] * 1000)).rjust(12))
+        print("".ljust(14) + "reduction".ljust(14)
+              + ("%.1fx" % (results["by field"]['searches'] / results["single pass"]['searches'])).rjust(10)
+              + ("%.1fx" % (results["by field"]['visited_elements'] / results["single pass"]['visited_elements'])).rjust(10)
+              + ("%.1fx" % (results["by field"]['time'] / results["single pass"]['time'])).rjust(12))
+
+
+if __name__ == '__main__':
+    main()
+    print()
+    main_parsing()
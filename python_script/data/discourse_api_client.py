@@ -0,0 +1,176 @@
+import json
+import urllib3
+from datetime import datetime
+
+class DiscourseApiClient():
+    """
+    Discourse API client class
+    Fetches the json endpoints of a Discourse website with plain http requests,
+    the connections are kept alive and reused between requests
+    """
+
+    user_actions_page_size = 30
+    topic_posts_page_size = 20 # posts that are requested at once by their ids
+    post_action_filter = "4,5" # new topics and replies
+
+    def __init__(self, website_url: str, maxsize=10, timeout=30, retries=3):
+        """
+        Set up the client
+
+        Input:
+        :param website_url: string, the url of the discourse website
+        :param maxsize: int, number of connections that are kept alive per host
+        :param timeout: float, seconds until a request times out
+        :param retries: int, how often a failed request is repeated
+        """
+
+        self.website_url = website_url.rstrip("/")
+        self.http = urllib3.PoolManager(maxsize=maxsize,
+                                        block=True,
+                                        timeout=timeout,
+                                        retries=urllib3.util.Retry(total=retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+                                        headers={'Accept': 'application/json'})
+        self.category_names = None
+
+    # ====================================================================================== #
+    # ENDPOINTS:                                                                             #
+    # ====================================================================================== #
+
+    def get_json(self, path: str, fields=None):
+        """
+        get the decoded json of an endpoint, None if the request failed
+
+        Input:
+        :param path: string, path of the endpoint, e.g. /u/username.json
+        :param fields: dict or list of tuples, query parameters
+        """
+        try:
+            response = self.http.request('GET', self.website_url + path, fields=fields)
+        except urllib3.exceptions.HTTPError as e:
+            print(e)
+            print("could not get " + path + ", skipping to next")
+            return None
+
+        if response.status != 200:
+            print("could not get " + path + " (status " + str(response.status) + "), skipping to next")
+            return None
+        try:
+            return json.loads(response.data.decode("utf-8"))
+        except ValueError as e:
+            # e.g. an error page or a truncated answer
+            print(e)
+            print("could not decode " + path + ", skipping to next")
+            return None
+
+    def get_user_links(self) -> list:
+        """
+        get the links to all user profiles from the paged user directory
+
+        Output:
+        list of links to the user profiles, strings, None if the request of any page failed
+        """
+        user_link_list = []
+
+        page = 0
+        while True:
+            directory = self.get_json("/directory_items.json", {'period': 'all', 'page': page})
+            if directory is None:
+                return None
+            if len(directory.get('directory_items', [])) == 0:
+                break
+
+            user_link_list = user_link_list + self.get_user_links_from_directory_page(directory)
+            page = page + 1
+
+        return user_link_list
+
+    def get_profile(self, username: str) -> dict:
+        """
+        get the user dict of a profile, None if the request failed
+        """
+        profile = self.get_json("/u/" + username + ".json")
+        if profile is None: return None
+        return profile.get('user')
+
+    def get_user_actions(self, username: str, stop_at_timestamp=None) -> list:
+        """
+        get all posts of a user, newest first, with the category name added to every post,
+        None if the request of any page or of the categories failed.
+        With stop_at_timestamp, the pages are only requested until a post at or before that time is reached.
+        """
+        category_names = self.get_category_names()
+        if category_names is None:
+            # the posts are not written without their categories, the user is downloaded again
+            return None
+
+        user_actions = []
+        offset = 0
+        while True:
+            page = self.get_json("/user_actions.json", {'username': username, 'filter': self.post_action_filter, 'offset': offset})
+            if page is None:
+                # a part of the post history is no post history, the user is downloaded again
+                return None
+            actions = page.get('user_actions', [])
+            if len(actions) == 0:
+                break
+
+            for action in actions:
+                action['category_name'] = category_names.get(action.get('category_id'))
+                user_actions.append(action)
+            offset = offset + len(actions)
+
+            # the known posts are reached
+            if stop_at_timestamp is not None and self.iso_to_timestamp(actions[-1].get('created_at')) <= stop_at_timestamp:
+                break
+
+        return user_actions
+
+    def get_topic_posts(self, topic_id: int) -> list:
+        """
+        get all posts of a topic in the order of the topic, None if the request failed.
+        The topic endpoint only has the first posts, the other posts are requested by their ids
+        """
+        topic = self.get_json("/t/" + str(topic_id) + ".json")
+        if topic is None: return None
+        post_stream = topic.get('post_stream', {})
+
+        posts = post_stream.get('posts', [])
+        loaded_post_ids = set([post.get('id') for post in posts])
+        missing_post_ids = [post_id for post_id in post_stream.get('stream', []) if post_id not in loaded_post_ids]
+        for position in range(0, len(missing_post_ids), self.topic_posts_page_size):
+            post_ids = missing_post_ids[position:position + self.topic_posts_page_size]
+            page = self.get_json("/t/" + str(topic_id) + "/posts.json", [('post_ids[]', post_id) for post_id in post_ids])
+            if page is None: return None
+            posts = posts + page.get('post_stream', {}).get('posts', [])
+
+        return posts
+
+    def get_category_names(self) -> dict:
+        """
+        get the names of the categories by category id, None if the request failed.
+        Only requested until it succeeds once
+        """
+        if self.category_names is None:
+            site = self.get_json("/site.json")
+            if site is None: return None
+            self.category_names = {category['id']: category['name'] for category in site.get('categories', [])}
+        return self.category_names
+
+    # ====================================================================================== #
+    # HELPERS:                                                                               #
+    # ====================================================================================== #
+
+    @staticmethod
+    def get_user_links_from_directory_page(directory: dict) -> list:
+        """
+        get the links to the user profiles of one page of the user directory
+        """
+        return ["/u/" + item['user']['username'] for item in directory.get('directory_items', [])]
+
+    @staticmethod
+    def iso_to_timestamp(iso_time: str) -> int:
+        """
+        convert the iso time of the api into a timestamp in milliseconds, like the data-time attributes of the html
+        """
+        if iso_time is None: return None
+        return int(round(datetime.fromisoformat(iso_time.replace("Z", "+00:00")).timestamp() * 1000))
@@ -0,0 +1,327 @@
+from python_script.data.discourse_downloader import DiscourseDownloader
+from python_script.data.discourse_api_client import DiscourseApiClient
+from python_script.data.discourse_page_store import DirectoryPageStore
+from urllib.parse import urlparse
+from tqdm.auto import tqdm
+import aiohttp
+import asyncio
+import json
+import math
+import os
+import shutil
+import time
+
+class TokenBucket():
+    """
+    Token bucket class
+    Limits the request rate to one host, allows short bursts up to the capacity
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Input:
+        :param rate: float, tokens that are added per second
+        :param capacity: int, maximum number of tokens in the bucket
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        wait until a token is available and take it
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens = self.tokens - 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncDiscourseDownloader():
+    """
+    Async Discourse downloader class
+    Downloads the user list, profiles and post histories from the json endpoints
+    of a Discourse website with many requests in flight at the same time.
+    The files are written in the layout of the api backend of the DiscourseDownloader,
+    so they can be converted with the DiscourseConverter.
+    """
+
+    retry_status = [429, 500, 502, 503, 504]
+
+    def __init__(self,
+                 website_url: str,
+                 dataset_folder=os.path.join("datasets","Discourse","html_files"),
+                 max_in_flight=200,
+                 requests_per_second=20,
+                 burst=20,
+                 retries=5,
+                 backoff=0.5,
+                 timeout=30,
+                 page_store=None):
+        """
+        Set up the downloader
+
+        Input:
+        :param website_url: string, the url of the discourse website
+        :param dataset_folder: string, the location of the dataset
+        :param max_in_flight: int, maximum number of open requests, also the size of the connection pool
+        :param requests_per_second: float, maximum request rate per host
+        :param burst: int, number of requests per host that can be sent at once before the rate limit applies
+        :param retries: int, how often a request is repeated after a 429/5xx response or a connection error
+        :param backoff: float, seconds to wait before the first retry, doubled for every further retry
+        :param timeout: float, seconds until a request times out
+        :param page_store: page store for the profiles and post histories, defaults to a DirectoryPageStore
+        """
+
+        self.website_url = website_url.rstrip("/")
+        self.dataset_folder = dataset_folder
+        self.max_in_flight = max_in_flight
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.page_store = page_store if page_store is not None else DirectoryPageStore()
+
+        self.user_list_filepath = None
+        self.user_profile_filepath_list = []
+        self.user_post_history_filepath_list = []
+
+    def __call__(self, overwrite=False, supress_output=False):
+        """
+        Download the json files for:
+        - the user list
+        - profiles
+        - post histories
+
+        Runs its own event loop, inside a notebook use "await downloader.download()" instead.
+
+        Input:
+        :param overwrite: boolean, should the files be overwritten
+        :param supress_output: boolean, should the detailed output print be supressed?
+        """
+        return asyncio.run(self.download(overwrite, supress_output))
+
+    async def download(self, overwrite=False, supress_output=False):
+        """
+        Download the json files for the user list, profiles and post histories
+
+        Input:
+        :param overwrite: boolean, should the files be overwritten
+        :param supress_output: boolean, should the detailed output print be supressed?
+        """
+
+        # overwrite protection
+        if overwrite:
+            overwrite = DiscourseDownloader.query_yes_no("Confirm overwriting json data")
+
+        self._set_up_folders(overwrite)
+
+        self.rate_limiters = {}
+        self.category_names = None
+        self.in_flight = asyncio.Semaphore(self.max_in_flight)
+
+        # one pooled connection set for all requests
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers={'Accept': 'application/json'}) as session:
+            user_links = await self._download_user_list(session, overwrite, supress_output)
+            await self._download_user_data(session, user_links, overwrite, supress_output)
+
+        return self.user_list_filepath, self.user_profile_filepath_list, self.user_post_history_filepath_list
+
+    # ====================================================================================== #
+    # DOWNLOADERS:                                                                           #
+    # ====================================================================================== #
+
+    async def _download_user_list(self, session: aiohttp.ClientSession, overwrite=False, supress_output=False) -> list:
+        """
+        Download the user links from the paged user directory and write them to the user list file.
+        Raises ConnectionError if a page of the directory could not be loaded, an incomplete user list is not written
+        """
+        self.user_list_filepath = os.path.join(self.dataset_folder, "user_list.json")
+
+        if os.path.isfile(self.user_list_filepath) and not overwrite:
+            if not supress_output: print("user list already exists, skipping download")
+            with open(self.user_list_filepath, 'rb') as user_list_json:
+                return json.load(user_list_json)
+
+        # the first page tells how many pages there are, the other pages are requested at once
+        first_page = await self._get_json(session, "/directory_items.json", {'period': 'all', 'page': 0})
+        if first_page is None:
+            raise ConnectionError("user directory page 0 could not be loaded")
+        if len(first_page.get('directory_items', [])) == 0:
+            return []
+        pages = [first_page]
+
+        total_rows = first_page.get('meta', {}).get('total_rows_directory_items')
+        page_size = len(first_page['directory_items'])
+        if total_rows is not None:
+            number_of_pages = math.ceil(total_rows / page_size)
+            pages = pages + await asyncio.gather(*[self._get_json(session, "/directory_items.json", {'period': 'all', 'page': page})
+                                                   for page in range(1, number_of_pages)])
+            for page_number, page in enumerate(pages):
+                if page is None: raise ConnectionError("user directory page " + str(page_number) + " could not be loaded")
+        else:
+            # without the total number of users, request page after page until a page is empty
+            page_number = 1
+            while True:
+                page = await self._get_json(session, "/directory_items.json", {'period': 'all', 'page': page_number})
+                if page is None: raise ConnectionError("user directory page " + str(page_number) + " could not be loaded")
+                if len(page.get('directory_items', [])) == 0: break
+                pages.append(page)
+                page_number = page_number + 1
+
+        user_links = []
+        for page in pages:
+            for item in page.get('directory_items', []):
+                user_links.append("/u/" + item['user']['username'])
+
+        DiscourseDownloader._write_html_to_file(self.user_list_filepath, json.dumps(user_links), overwrite)
+        return user_links
+
+    async def _download_user_data(self, session: aiohttp.ClientSession, user_links: list, overwrite=False, supress_output=False):
+        """
+        Download the profiles and post histories of all users at the same time
+        """
+        await self._get_category_names(session)
+
+        tasks = []
+        for profile_link in user_links:
+            username = DiscourseDownloader.get_user_name_from_profile_link(profile_link)
+            profile_filepath = os.path.join(self.dataset_folder, "profiles", username + ".json")
+            post_history_filepath = os.path.join(self.dataset_folder, "post_histories", username + ".json")
+
+            # save filepaths in the order of the user list
+            self.user_profile_filepath_list.append(profile_filepath)
+            self.user_post_history_filepath_list.append(post_history_filepath)
+
+            if self.page_store.exists(profile_filepath) and self.page_store.exists(post_history_filepath) and not overwrite:
+                if not supress_output: print(username + ": files already exist, skipping download")
+                continue
+            tasks.append(self._download_single_user(session, username, profile_filepath, post_history_filepath, overwrite))
+
+        for task in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="downloading user data"):
+            await task
+
+    async def _download_single_user(self, session: aiohttp.ClientSession, username: str, profile_filepath: str, post_history_filepath: str, overwrite=False):
+        """
+        Download the profile and the post history of one user, the two are requested at the same time
+        """
+        profile, user_actions = await asyncio.gather(self._get_json(session, "/u/" + username + ".json"),
+                                                     self._get_user_actions(session, username))
+        if profile is not None:
+            self.page_store.write(profile_filepath, json.dumps(profile.get('user')), overwrite)
+        if user_actions is not None:
+            self.page_store.write(post_history_filepath, json.dumps(user_actions), overwrite)
+
+    async def _get_user_actions(self, session: aiohttp.ClientSession, username: str) -> list:
+        """
+        get all posts of a user with the category name added to every post, None if the request of any page failed
+        """
+        user_actions = []
+        offset = 0
+        while True:
+            page = await self._get_json(session, "/user_actions.json", {'username': username, 'filter': DiscourseApiClient.post_action_filter, 'offset': offset})
+            if page is None:
+                # a part of the post history is no post history, the user is downloaded again
+                return None
+            actions = page.get('user_actions', [])
+            if len(actions) == 0:
+                break
+
+            for action in actions:
+                action['category_name'] = self.category_names.get(action.get('category_id'))
+                user_actions.append(action)
+            offset = offset + len(actions)
+
+        return user_actions
+
+    async def _get_category_names(self, session: aiohttp.ClientSession) -> dict:
+        """
+        get the names of the categories by category id, only requested once.
+        Raises ConnectionError if the categories could not be loaded, the posts are not written without them
+        """
+        if self.category_names is None:
+            site = await self._get_json(session, "/site.json")
+            if site is None: raise ConnectionError("categories could not be loaded")
+            self.category_names = {category['id']: category['name'] for category in site.get('categories', [])}
+        return self.category_names
+
+    # ====================================================================================== #
+    # REQUESTS:                                                                              #
+    # ====================================================================================== #
+
+    async def _get_json(self, session: aiohttp.ClientSession, path: str, params=None):
+        """
+        get the decoded json of an endpoint with rate limiting and retries, None if the request failed
+
+        Input:
+        :param session: aiohttp session, shared connection pool
+        :param path: string, path of the endpoint, e.g. /u/username.json
+        :param params: dict, query parameters
+        """
+        url = self.website_url + path
+        rate_limiter = self._get_rate_limiter(url)
+
+        for attempt in range(self.retries + 1):
+            await rate_limiter.acquire()
+            retry_after = None
+            try:
+                async with self.in_flight:
+                    async with session.get(url, params=params) as response:
+                        if response.status == 200:
+                            return await response.json(content_type=None)
+                        if response.status not in self.retry_status:
+                            print("could not get " + path + " (status " + str(response.status) + "), skipping to next")
+                            return None
+                        retry_after = self._get_retry_after(response)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                # a ValueError is an answer that is no json, e.g. an error page or a truncated answer
+                if attempt == self.retries: print(e)
+
+            if attempt < self.retries:
+                # exponential backoff, unless the server says how long to wait
+                await asyncio.sleep(retry_after if retry_after is not None else self.backoff * 2 ** attempt)
+
+        print("could not get " + path + " after " + str(self.retries) + " retries, skipping to next")
+        return None
+
+    def _get_rate_limiter(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if host not in self.rate_limiters:
+            self.rate_limiters[host] = TokenBucket(self.requests_per_second, self.burst)
+        return self.rate_limiters[host]
+
+    @staticmethod
+    def _get_retry_after(response) -> float:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is None: return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            return None
+
+    # ====================================================================================== #
+    # FOLDERS:                                                                               #
+    # ====================================================================================== #
+
+    def _set_up_folders(self, overwrite: bool):
+        json_folder_profiles = os.path.join(self.dataset_folder, "profiles")
+        json_folder_post_histories = os.path.join(self.dataset_folder, "post_histories")
+        if overwrite and os.path.isdir(json_folder_profiles):
+            shutil.rmtree(json_folder_profiles)
+        if overwrite and os.path.isdir(json_folder_post_histories):
+            shutil.rmtree(json_folder_post_histories)
+
+        if not os.path.isdir(json_folder_profiles):
+            os.makedirs(json_folder_profiles)
+        if not os.path.isdir(json_folder_post_histories):
+            os.makedirs(json_folder_post_histories)
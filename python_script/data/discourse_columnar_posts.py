@@ -0,0 +1,381 @@
+from python_script.data.discourse_post_table import DiscoursePostTable
+from collections.abc import Sequence
+import numpy as np
+import sys
+
+# value of a key that a post does not have
+MISSING = object()
+
+
+class DictionaryColumn():
+    """
+    Values as int32 codes into a dictionary of the distinct values, -1 if the key is missing.
+    Filters test the distinct values once and compare the codes.
+    """
+
+    def __init__(self, codes: np.ndarray, dictionary: list):
+        self.codes = codes
+        self.dictionary = dictionary
+
+    @classmethod
+    def encode(cls, values: list) -> 'DictionaryColumn':
+        positions = {}
+        dictionary = []
+
+        def get_code(value):
+            if value is MISSING: return -1
+            # the type is part of the key, True and 1 are different values
+            key = (type(value), value)
+            if key not in positions:
+                positions[key] = len(dictionary)
+                dictionary.append(value)
+            return positions[key]
+
+        try:
+            codes = np.fromiter((get_code(value) for value in values), dtype=np.int32, count=len(values))
+        except TypeError:
+            raise ValueError("values that can not be dictionary-encoded")
+        return cls(codes, dictionary)
+
+    def take(self, rows: np.ndarray) -> 'DictionaryColumn':
+        return DictionaryColumn(self.codes[rows], self.dictionary)
+
+    def get(self, row: int):
+        code = self.codes[row]
+        return MISSING if code < 0 else self.dictionary[code]
+
+    def match(self, target) -> np.ndarray:
+        # the filter of the dataset: the value is the target or in the target
+        matching_codes = [code for code, value in enumerate(self.dictionary) if value == target or value in target]
+        return np.isin(self.codes, matching_codes)
+
+    def contains_lower(self, string: str) -> np.ndarray:
+        matching_codes = [code for code, value in enumerate(self.dictionary) if isinstance(value, str) and string in value.lower()]
+        return np.isin(self.codes, matching_codes)
+
+    def is_string(self) -> np.ndarray:
+        string_codes = [code for code, value in enumerate(self.dictionary) if isinstance(value, str)]
+        return np.isin(self.codes, string_codes)
+
+    def unique(self, rows=None) -> list:
+        codes = np.unique(self.codes if rows is None else self.codes[rows])
+        return [self.dictionary[code] for code in codes if code >= 0]
+
+
+class TimestampColumn():
+    """
+    Timestamps as int64 values, the state of a row is 0 if the key is missing, 1 for a timestamp and 2 for None
+    """
+
+    def __init__(self, values: np.ndarray, states: np.ndarray):
+        self.values = values
+        self.states = states
+
+    @classmethod
+    def encode(cls, values: list) -> 'TimestampColumn':
+        states = np.zeros(len(values), dtype=np.int8)
+        timestamps = np.zeros(len(values), dtype=np.int64)
+        for row, value in enumerate(values):
+            if value is MISSING: continue
+            if value is None:
+                states[row] = 2
+            elif type(value) is int:
+                states[row] = 1
+                timestamps[row] = value
+            else:
+                raise ValueError("timestamp is no integer: '%s'" % value)
+        return cls(timestamps, states)
+
+    def take(self, rows: np.ndarray) -> 'TimestampColumn':
+        return TimestampColumn(self.values[rows], self.states[rows])
+
+    def get(self, row: int):
+        state = self.states[row]
+        if state == 0: return MISSING
+        return int(self.values[row]) if state == 1 else None
+
+    def match(self, target) -> np.ndarray:
+        mask = np.zeros(len(self.states), dtype=np.bool_)
+        for row in np.flatnonzero(self.states > 0):
+            value = self.get(row)
+            mask[row] = value == target or value in target
+        return mask
+
+    def compare(self, before_after: str, timestamp) -> np.ndarray:
+        if before_after == 'before':
+            return (self.states == 1) & (self.values < timestamp)
+        return (self.states == 1) & (self.values > timestamp)
+
+    def sort_keys(self) -> np.ndarray:
+        # rows without timestamp are at the end
+        return np.where(self.states == 1, self.values, sys.maxsize)
+
+    def unique(self, rows=None) -> list:
+        values = self.values if rows is None else self.values[rows]
+        states = self.states if rows is None else self.states[rows]
+        unique_values = [int(value) for value in np.unique(values[states == 1])]
+        if np.any(states == 2): unique_values.append(None)
+        return unique_values
+
+
+class StringColumn():
+    """
+    Strings of all rows in one string, a row is the part from its start to its end,
+    the state of a row is 0 if the key is missing, 1 for a string and 2 for None.
+    Rows of filtered posts share the string of all rows.
+    """
+
+    def __init__(self, data: str, starts: np.ndarray, ends: np.ndarray, states: np.ndarray, lowercase: dict):
+        self.data = data
+        self.starts = starts
+        self.ends = ends
+        self.states = states
+        self.lowercase = lowercase # lower case data, made at the first search and shared with the filtered columns
+
+    @classmethod
+    def encode(cls, values: list) -> 'StringColumn':
+        states = np.zeros(len(values), dtype=np.int8)
+        lengths = np.zeros(len(values), dtype=np.int64)
+        parts = []
+        for row, value in enumerate(values):
+            if value is MISSING: continue
+            if value is None:
+                states[row] = 2
+            elif type(value) is str:
+                states[row] = 1
+                lengths[row] = len(value)
+                parts.append(value)
+            else:
+                raise ValueError("value is no string: '%s'" % value)
+        ends = np.cumsum(lengths)
+        return cls("".join(parts), ends - lengths, ends, states, {})
+
+    def take(self, rows: np.ndarray) -> 'StringColumn':
+        return StringColumn(self.data, self.starts[rows], self.ends[rows], self.states[rows], self.lowercase)
+
+    def get(self, row: int):
+        state = self.states[row]
+        if state == 0: return MISSING
+        return self.data[self.starts[row]:self.ends[row]] if state == 1 else None
+
+    def match(self, target) -> np.ndarray:
+        mask = np.zeros(len(self.states), dtype=np.bool_)
+        candidates = np.flatnonzero(self.states > 0)
+        if isinstance(target, str):
+            # a string can only be the target or in the target if it is not longer
+            candidates = candidates[(self.states[candidates] == 2) | (self.ends[candidates] - self.starts[candidates] <= len(target))]
+        for row in candidates:
+            value = self.get(row)
+            mask[row] = value == target or value in target
+        return mask
+
+    def contains_lower(self, string: str) -> np.ndarray:
+        """
+        rows with the string in their lower case string
+        """
+        if 'data' not in self.lowercase:
+            self.lowercase['data'] = self.data.lower()
+        lowercase_data = self.lowercase['data']
+        is_string = self.states == 1
+        if len(string) == 0: return is_string
+
+        if len(lowercase_data) != len(self.data):
+            # some characters change their length in lower case, the rows are searched one by one
+            return np.array([is_string[row] and string in self.get(row).lower() for row in range(len(self.states))], dtype=np.bool_)
+
+        # find the string in the data, only once per row, rows without characters are before the row at the same start
+        order = np.lexsort((self.ends, self.starts))
+        sorted_starts = self.starts[order]
+        sorted_ends = self.ends[order]
+        matching_starts = []
+        position = 0
+        while True:
+            position = lowercase_data.find(string, position)
+            if position < 0: break
+            row = int(np.searchsorted(sorted_starts, position, side='right')) - 1
+            if row >= 0 and position + len(string) <= sorted_ends[row]:
+                matching_starts.append(sorted_starts[row])
+                position = int(sorted_ends[row])
+            elif row + 1 < len(sorted_starts):
+                position = max(position + 1, int(sorted_starts[row + 1]))
+            else:
+                break
+        return is_string & np.isin(self.starts, matching_starts) & (self.ends - self.starts >= len(string))
+
+    def is_string(self) -> np.ndarray:
+        return self.states == 1
+
+    def unique(self, rows=None) -> list:
+        rows = range(len(self.states)) if rows is None else rows
+        return list(set(value for value in (self.get(row) for row in rows) if value is not MISSING))
+
+
+class DiscourseColumnarPosts(Sequence):
+    """
+    Discourse columnar posts class
+    The posts of a dataset as NumPy columns: dictionary-encoded topics, categories and profile fields,
+    int64 timestamps and strings for the texts and links. The profiles are columns of a user table,
+    every post has the integer id of its user, like in the DiscoursePostTable.
+    Filters, searches and the distinct values of a field are computed on the columns,
+    the posts are still a list of dicts, every access makes new dicts.
+    """
+
+    post_columns = {'topic': DictionaryColumn,
+                    'topic_link': StringColumn,
+                    'category': DictionaryColumn,
+                    'post_timestamp': TimestampColumn,
+                    'text': StringColumn}
+    user_columns = {'username': DictionaryColumn,
+                    'full_name': DictionaryColumn,
+                    'member_status': DictionaryColumn,
+                    'join_timestamp': TimestampColumn,
+                    'last_post_timestamp': TimestampColumn,
+                    'empty': DictionaryColumn}
+
+    # filter keys of the timestamps, e.g. 'join_before'
+    time_keys = {'post': 'post_timestamp', 'join': 'join_timestamp', 'last_post': 'last_post_timestamp'}
+
+    def __init__(self, user_ids: np.ndarray, posts: dict, users: dict):
+        """
+        Input:
+        :param user_ids: array, position of the user of every post in the user columns
+        :param posts: dict with the post columns
+        :param users: dict with the user columns
+        """
+        self.user_ids = user_ids
+        self.posts = posts
+        self.users = users
+
+    @classmethod
+    def from_posts(cls, posts) -> 'DiscourseColumnarPosts':
+        """
+        Columns of posts, e.g. a DiscoursePostTable or a list of post dicts
+
+        Raises ValueError if the posts have fields that are no columns
+        """
+        if isinstance(posts, DiscourseColumnarPosts): return posts
+        table = posts if isinstance(posts, DiscoursePostTable) else DiscoursePostTable.from_posts(posts)
+
+        # posts with their own profile fields are stored with the users
+        post_keys = set(cls.post_columns) | {'username'}
+        if any(user_id < 0 for user_id in table.user_ids) or any(not set(fields) <= post_keys for fields in table.posts):
+            table = DiscoursePostTable.from_posts(table.iter_dicts())
+
+        for fields in table.posts:
+            if not set(fields) <= post_keys: raise ValueError("fields that are no columns: %s" % sorted(set(fields) - post_keys))
+        for user in table.users:
+            if not set(user) <= set(cls.user_columns): raise ValueError("fields that are no columns: %s" % sorted(set(user) - set(cls.user_columns)))
+
+        return cls(np.array(table.user_ids, dtype=np.int32),
+                   {key: column_class.encode([fields.get(key, MISSING) for fields in table.posts]) for key, column_class in cls.post_columns.items()},
+                   {key: column_class.encode([user.get(key, MISSING) for user in table.users]) for key, column_class in cls.user_columns.items()})
+
+    # ====================================================================================== #
+    # FILTER POSTS:                                                                          #
+    # ====================================================================================== #
+
+    def take(self, rows: np.ndarray) -> 'DiscourseColumnarPosts':
+        """
+        Posts of the rows, the user columns and the strings are shared
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        return DiscourseColumnarPosts(self.user_ids[rows], {key: column.take(rows) for key, column in self.posts.items()}, self.users)
+
+    def filter(self, search_dict: dict) -> 'DiscourseColumnarPosts':
+        """
+        Posts with the fields of the search dict, like DiscourseDataset._search_for_rows():
+        the field is the value or in the value, timestamps are before or after the value
+
+        Input:
+        :param search_dict: dict with the fields or the timestamp keys ('post_before', 'join_after', ...) and the values
+        """
+        mask = np.ones(len(self), dtype=np.bool_)
+        for key, target in search_dict.items():
+            mask &= self._match(key, target)
+        return self.take(np.flatnonzero(mask))
+
+    def _match(self, key: str, target) -> np.ndarray:
+        for before_after in ['before', 'after']:
+            time_key = key[:-len(before_after) - 1]
+            if key.endswith("_" + before_after) and time_key in self.time_keys:
+                return self._get_mask(self.time_keys[time_key], lambda column: column.compare(before_after, target))
+        if key in self.posts or key in self.users:
+            return self._get_mask(key, lambda column: column.match(target))
+        # no post has the key
+        return np.zeros(len(self), dtype=np.bool_)
+
+    def _get_mask(self, key: str, column_mask) -> np.ndarray:
+        # the filters of the profile fields are computed once per user
+        if key in self.posts: return column_mask(self.posts[key])
+        return column_mask(self.users[key])[self.user_ids]
+
+    def search(self, *strings) -> 'DiscourseColumnarPosts':
+        """
+        Posts with one of the strings in the text, the topic or the username, ignoring the case,
+        like DiscourseDataset.search()
+        """
+        mask = np.zeros(len(self), dtype=np.bool_)
+        for string in strings:
+            string = string.lower()
+            mask |= self.posts['text'].contains_lower(string)
+            mask |= self.posts['topic'].contains_lower(string)
+            mask |= self.users['username'].contains_lower(string)[self.user_ids]
+        mask &= self.posts['text'].is_string() & self.posts['topic'].is_string()
+        return self.take(np.flatnonzero(mask))
+
+    def sorted_by_post_timestamp(self) -> 'DiscourseColumnarPosts':
+        """
+        the same posts sorted by post time, posts without post time at the end
+        """
+        return self.take(np.argsort(self.posts['post_timestamp'].sort_keys(), kind='stable'))
+
+    def get_values(self, key: str) -> list:
+        """
+        distinct values of a field of the posts
+        """
+        if key in self.posts: return self.posts[key].unique()
+        if key in self.users: return self.users[key].unique(np.unique(self.user_ids))
+        return []
+
+    # ====================================================================================== #
+    # BUILT IN FUNCTIONS:                                                                    #
+    # ====================================================================================== #
+
+    def _get_post(self, row: int) -> dict:
+        user_id = self.user_ids[row]
+        post_values = [(key, column.get(row)) for key, column in self.posts.items()]
+
+        # the username is the first field of a post, like in the post files
+        post = {}
+        username = self.users['username'].get(user_id)
+        if username is not MISSING and any(value is not MISSING for _, value in post_values):
+            post['username'] = username
+        for key, value in post_values:
+            if value is not MISSING: post[key] = value
+        for key, column in self.users.items():
+            if key in post: continue
+            value = column.get(user_id)
+            if value is not MISSING: post[key] = value
+        return post
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def __getitem__(self, key: int or slice) -> dict or 'DiscourseColumnarPosts':
+        if isinstance(key, slice):
+            return self.take(np.arange(len(self))[key])
+        if key < 0: key = key + len(self)
+        if not 0 <= key < len(self): raise IndexError("post index out of range")
+        return self._get_post(key)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self._get_post(row)
+
+    def __eq__(self, obj) -> bool:
+        if not isinstance(obj, (Sequence, list)): return NotImplemented
+        return len(self) == len(obj) and all(post == other_post for post, other_post in zip(self, obj))
+
+    def __deepcopy__(self, memo):
+        # the columns are not changed, every access makes new dicts
+        return self
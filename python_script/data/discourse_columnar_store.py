@@ -0,0 +1,254 @@
+import numpy as np
+from pathlib import Path
+import json
+import os
+import shutil
+
+class DiscourseColumnarStore():
+    """
+    Discourse columnar store class
+    Stores the profiles and the posts column by column in flat binary files that are read with one memory map per column:
+    usernames, categories and member status are dictionary-encoded as int32 codes,
+    timestamps are int64 with a validity column, texts are utf-8 bytes with int64 end offsets.
+    A bitmask per row records which optional columns are set in the dicts, so a missing value and None differ.
+    The rows are written in batches of users, so the data of all users is never in memory at once.
+    """
+
+    DICTIONARY = "dictionary"
+    STRING = "string"
+    TIMESTAMP = "timestamp"
+    COUNT = "count"
+
+    format_version = 2
+    readable_format_versions = [1, 2] # version 1 has no bitmask of the optional columns
+
+    # columns of the tables, the posts of a user follow each other in the order of the profiles
+    schemas = {'profiles': [('username', DICTIONARY),
+                            ('full_name', STRING),
+                            ('member_status', DICTIONARY),
+                            ('join_timestamp', TIMESTAMP),
+                            ('last_post_timestamp', TIMESTAMP),
+                            ('post_count', COUNT)],
+               'posts': [('username', DICTIONARY),
+                         ('topic', STRING),
+                         ('topic_link', STRING),
+                         ('category', DICTIONARY),
+                         ('post_timestamp', TIMESTAMP),
+                         ('text', STRING)]}
+
+    # missing values of the profiles are left out of the dicts, like in the profile json files
+    optional_columns = {'profiles': ['full_name', 'member_status', 'join_timestamp', 'last_post_timestamp'], 'posts': []}
+
+    def __init__(self, folder: str):
+        """
+        Set up the store
+
+        Input:
+        :param folder: string, location of the column files
+        """
+        self.folder = folder
+        self.metadata_filepath = os.path.join(folder, "columns.json")
+
+    def exists(self) -> bool:
+        return Path(self.metadata_filepath).is_file()
+
+    # ====================================================================================== #
+    # WRITE:                                                                                 #
+    # ====================================================================================== #
+
+    def write(self, users, batch_size=1000):
+        """
+        Write the profiles and the post histories, an existing store is replaced.
+        The columns are written to a temporary folder first, which then replaces the folder,
+        so the store is either complete or the old one.
+
+        Input:
+        :param users: iterable of tuples (profile dict, list of post dicts), e.g. a generator
+        :param batch_size: int, number of users that are written at once
+        """
+        temporary_folder = self.folder + ".tmp"
+        if os.path.isdir(temporary_folder):
+            shutil.rmtree(temporary_folder)
+        os.makedirs(temporary_folder)
+        try:
+            self._write_folder(temporary_folder, users, batch_size)
+        except BaseException:
+            shutil.rmtree(temporary_folder)
+            raise
+
+        if os.path.isdir(self.folder):
+            shutil.rmtree(self.folder)
+        os.replace(temporary_folder, self.folder)
+
+    def _write_folder(self, temporary_folder: str, users, batch_size: int):
+
+        dictionaries = {}
+        rows = {table: 0 for table in self.schemas}
+        batch = {table: [] for table in self.schemas}
+
+        def flush():
+            for table, table_rows in batch.items():
+                self._append_rows(temporary_folder, table, table_rows, dictionaries)
+                rows[table] = rows[table] + len(table_rows)
+                table_rows.clear()
+
+        for index, (profile, post_history) in enumerate(users):
+            batch['profiles'].append(dict(profile, post_count=len(post_history)))
+            batch['posts'].extend(post_history)
+            if (index + 1) % batch_size == 0: flush()
+        flush()
+
+        metadata = {'format_version': self.format_version,
+                    'rows': rows,
+                    'dictionaries': {column: list(codes.keys()) for column, codes in dictionaries.items()}}
+        with open(os.path.join(temporary_folder, "columns.json"), 'w') as metadata_file:
+            json.dump(metadata, metadata_file)
+
+    def _append_rows(self, folder: str, table: str, rows: list, dictionaries: dict):
+        """
+        Append a batch of rows to the column files of a table
+        """
+        optional_columns = self.optional_columns[table]
+        if len(optional_columns) > 0:
+            # bit i is set if the i-th optional column is a key of the row
+            present = np.array([sum(1 << bit for bit, column in enumerate(optional_columns) if column in row) for row in rows], dtype=np.uint8)
+            self._append_array(os.path.join(folder, table + ".present"), present)
+
+        for column, column_type in self.schemas[table]:
+            values = [row.get(column) for row in rows]
+            filepath = os.path.join(folder, table + "." + column)
+
+            if column_type == self.DICTIONARY:
+                # the codes of a column are the positions in its dictionary, -1 is missing
+                codes = dictionaries.setdefault(column, {})
+                array = np.array([-1 if value is None else codes.setdefault(value, len(codes)) for value in values], dtype=np.int32)
+                self._append_array(filepath + ".codes", array)
+            elif column_type == self.STRING:
+                encoded = [b"" if value is None else value.encode("utf-8") for value in values]
+                lengths = np.array([len(value) for value in encoded], dtype=np.int64)
+                start = os.path.getsize(filepath + ".data") if Path(filepath + ".data").is_file() else 0
+                self._append_array(filepath + ".offsets", start + np.cumsum(lengths))
+                self._append_array(filepath + ".valid", np.array([value is not None for value in values], dtype=np.bool_))
+                with open(filepath + ".data", 'ab') as data_file:
+                    data_file.write(b"".join(encoded))
+            elif column_type == self.TIMESTAMP:
+                self._append_array(filepath + ".values", np.array([0 if value is None else value for value in values], dtype=np.int64))
+                self._append_array(filepath + ".valid", np.array([value is not None for value in values], dtype=np.bool_))
+            else:
+                self._append_array(filepath + ".values", np.array(values, dtype=np.int64))
+
+    @staticmethod
+    def _append_array(filepath: str, array: np.ndarray):
+        with open(filepath, 'ab') as column_file:
+            array.tofile(column_file)
+
+    # ====================================================================================== #
+    # READ:                                                                                  #
+    # ====================================================================================== #
+
+    def read_metadata(self) -> dict:
+        with open(self.metadata_filepath) as metadata_file:
+            metadata = json.load(metadata_file)
+        if metadata['format_version'] not in self.readable_format_versions:
+            raise ValueError("unsupported columnar format version: '%s'" % metadata['format_version'])
+        return metadata
+
+    def read_table(self, table: str) -> dict:
+        """
+        Memory map the columns of a table
+
+        Output:
+        dict with the column names as keys and dicts of arrays as values:
+        'codes' and 'dictionary' for dictionary columns, 'offsets', 'data' and 'valid' for string columns,
+        'values' and 'valid' for timestamps, 'values' for counts,
+        the bitmask of the optional columns is 'present', None for version 1 stores
+        """
+        metadata = self.read_metadata()
+        number_of_rows = metadata['rows'][table]
+
+        columns = {'present': None}
+        if len(self.optional_columns[table]) > 0 and metadata['format_version'] > 1:
+            columns['present'] = self._map(os.path.join(self.folder, table + ".present"), np.uint8, number_of_rows)
+        for column, column_type in self.schemas[table]:
+            filepath = os.path.join(self.folder, table + "." + column)
+            if column_type == self.DICTIONARY:
+                columns[column] = {'codes': self._map(filepath + ".codes", np.int32, number_of_rows),
+                                   'dictionary': metadata['dictionaries'].get(column, [])}
+            elif column_type == self.STRING:
+                columns[column] = {'offsets': self._map(filepath + ".offsets", np.int64, number_of_rows),
+                                   'data': self._map(filepath + ".data", np.uint8, os.path.getsize(filepath + ".data")),
+                                   'valid': self._map(filepath + ".valid", np.bool_, number_of_rows)}
+            elif column_type == self.TIMESTAMP:
+                columns[column] = {'values': self._map(filepath + ".values", np.int64, number_of_rows),
+                                   'valid': self._map(filepath + ".valid", np.bool_, number_of_rows)}
+            else:
+                columns[column] = {'values': self._map(filepath + ".values", np.int64, number_of_rows)}
+        return columns
+
+    def iter_rows(self, table: str):
+        """
+        Yields the rows of a table as dicts, the same dicts as in the json files
+        """
+        columns = self.read_table(table)
+        number_of_rows = self.read_metadata()['rows'][table]
+
+        for row in range(number_of_rows):
+            yield self.get_row(columns, table, row)
+
+    def get_row(self, columns: dict, table: str, row: int) -> dict:
+        """
+        row of a table of read_table() as dict
+        """
+        optional_columns = self.optional_columns[table]
+        present = None if columns['present'] is None else int(columns['present'][row])
+
+        row_dict = {}
+        for column, column_type in self.schemas[table]:
+            value = self.get_value(columns[column], column_type, row)
+            if column in optional_columns:
+                if present is None and value is None: continue
+                if present is not None and not present & (1 << optional_columns.index(column)): continue
+            row_dict[column] = value
+        return row_dict
+
+    def get_row_value(self, columns: dict, table: str, row: int, column: str, default=None):
+        """
+        value of a column of a row of a table of read_table(), default if the row has no value for it like in get_row()
+        """
+        value = self.get_value(columns[column], dict(self.schemas[table])[column], row)
+        optional_columns = self.optional_columns[table]
+        if column in optional_columns:
+            present = None if columns['present'] is None else int(columns['present'][row])
+            if present is None and value is None: return default
+            if present is not None and not present & (1 << optional_columns.index(column)): return default
+        return value
+
+    def iter_users(self):
+        """
+        Yields the profile and the post history of every user, like the converted json files
+        """
+        posts = self.iter_rows('posts')
+        for profile in self.iter_rows('profiles'):
+            post_count = profile.pop('post_count')
+            yield profile, [next(posts) for _ in range(post_count)]
+
+    def get_value(self, column: dict, column_type: str, row: int):
+        """
+        value of a row of a column of read_table()
+        """
+        if column_type == self.DICTIONARY:
+            code = int(column['codes'][row])
+            return None if code == -1 else column['dictionary'][code]
+        if column_type == self.STRING:
+            if not column['valid'][row]: return None
+            start = int(column['offsets'][row - 1]) if row > 0 else 0
+            return column['data'][start:int(column['offsets'][row])].tobytes().decode("utf-8")
+        if column_type == self.TIMESTAMP:
+            return int(column['values'][row]) if column['valid'][row] else None
+        return int(column['values'][row])
+
+    @staticmethod
+    def _map(filepath: str, dtype, length: int) -> np.ndarray:
+        # empty files can not be memory mapped
+        if length == 0: return np.zeros(0, dtype=dtype)
+        return np.memmap(filepath, dtype=dtype, mode='r', shape=(length,))
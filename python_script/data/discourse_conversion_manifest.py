@@ -0,0 +1,86 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+class DiscourseConversionManifest():
+    """
+    Discourse conversion manifest class
+    Remembers for every json file the page it was converted from, the fingerprint of the page
+    and the version of the converter, in a sqlite database.
+    A json file is current if it exists and neither the page nor the extraction changed since the conversion.
+    """
+
+    def __init__(self, filepath: str):
+        """
+        Open the manifest, the database is created if it does not exist
+
+        Input:
+        :param filepath: string, location of the sqlite database
+        """
+        self.filepath = filepath
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(filepath, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS outputs (
+                                       json_filepath TEXT PRIMARY KEY,
+                                       source_filepath TEXT NOT NULL,
+                                       fingerprint TEXT NOT NULL,
+                                       version TEXT NOT NULL,
+                                       updated REAL)""")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    # ====================================================================================== #
+    # WRITE:                                                                                 #
+    # ====================================================================================== #
+
+    def record(self, outputs: list, version: str):
+        """
+        Record converted json files
+
+        Input:
+        :param outputs: list of tuples (json_filepath, source_filepath, fingerprint)
+        :param version: string, version of the converter that wrote the json files
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO outputs (json_filepath, source_filepath, fingerprint, version, updated) VALUES (?, ?, ?, ?, ?)",
+                                        [(json_filepath, source_filepath, fingerprint, version, now) for json_filepath, source_filepath, fingerprint in outputs])
+            self.connection.commit()
+
+    # ====================================================================================== #
+    # READ:                                                                                  #
+    # ====================================================================================== #
+
+    def get_entry(self, json_filepath: str) -> tuple:
+        """
+        get the source filepath, fingerprint and version of a json file, None if it is not in the manifest
+        """
+        with self.lock:
+            return self.connection.execute("SELECT source_filepath, fingerprint, version FROM outputs WHERE json_filepath = ?", (json_filepath,)).fetchone()
+
+    def is_current(self, json_filepath: str, source_filepath: str, fingerprint: str, version: str) -> bool:
+        """
+        is the json file up to date with the page and the converter
+
+        Input:
+        :param json_filepath: string, location of the json file
+        :param source_filepath: string, location of the page
+        :param fingerprint: string, fingerprint of the page as it is now
+        :param version: string, version of the converter as it is now
+        """
+        if not Path(json_filepath).is_file(): return False
+        return self.get_entry(json_filepath) == (source_filepath, fingerprint, version)
+
+    def get_summary(self) -> dict:
+        """
+        get the number of json files per converter version
+        """
+        with self.lock:
+            rows = self.connection.execute("SELECT version, COUNT(*) FROM outputs GROUP BY version").fetchall()
+        return {version: files for version, files in rows}
@@ -1,10 +1,17 @@
 from bs4 import BeautifulSoup as soup
+from bs4 import SoupStrainer
+from bs4.element import Tag
+from python_script.data.discourse_api_client import DiscourseApiClient
+from python_script.data.discourse_page_store import DirectoryPageStore
+from python_script.data.discourse_conversion_manifest import DiscourseConversionManifest
+from python_script.data.discourse_columnar_store import DiscourseColumnarStore
+from python_script.data.discourse_json_writer import DiscourseJsonWriter
 from pathlib import Path
 import json
-import io
 import os
 import re
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import shutil
 import sys
 
@@ -17,18 +24,64 @@ class DiscourseConverter():
 
     user_profile_json_filepath_list = []
     user_post_history_json_filepath_list = []
+    parsers = ["html.parser", "lxml", "selectolax", "lxml-iterparse"]
 
-    def __init__(self, website_url: str, dataset_folder=os.path.join("datasets","Discourse","json_files")):
+    # version of the extraction, json files of another version are converted again,
+    # increase it when the extracted data changes
+    converter_version = "1"
+
+    # only the parts of the pages with the data are built into a tree:
+    # the user header with the names and the secondary block of the profile, the posts of the post history
+    profile_strainer = SoupStrainer('div', {'class': 'details'})
+    post_history_strainer = SoupStrainer('div', {'class': 'user-stream-item item ember-view'})
+
+    # start tags of the same parts, the page is cut to them before it is parsed,
+    # so the parser does not tokenize the rest of the page
+    profile_start_pattern = re.compile(rb'<div\b[^>]*\bclass="(?:[^"]*\s)?details(?:\s[^"]*)?"')
+    post_history_start_pattern = re.compile(rb'<div\b[^>]*\bclass="user-stream-item item ember-view"')
+    div_tag_pattern = re.compile(rb'<(/?)div\b[^>]*>')
+
+    def __init__(self, website_url: str, dataset_folder=os.path.join("datasets","Discourse","json_files"), page_store=None, workers=1, ordered=True, chunksize=None, parser="html.parser", use_manifest=True, columnar=False):
         """
         Set up the converter
         
         Input:
         :param website_url: string, the url of the discourse website
         :param dataset_folder: string, the location of the dataset
+        :param page_store: page store that the downloader wrote the pages to, defaults to a DirectoryPageStore
+        :param workers: int, number of processes that convert files at the same time
+        :param ordered: boolean, should the json filepaths be returned in the order of the html filepaths,
+                        otherwise in the order the conversions finish (only with more than one worker)
+        :param chunksize: int, number of files that are sent to a worker at once, chosen from the number of files if None
+        :param parser: string, "html.parser" extracts the data with BeautifulSoup, this is the reference,
+                       "lxml" and "selectolax" (needs the selectolax package) are faster and give the same data,
+                       "lxml-iterparse" reads the post histories as a stream, the memory does not grow with the length of a post history
+        :param use_manifest: boolean, should only the pages that changed since their conversion be converted,
+                             otherwise every page without a json file is converted
+        :param columnar: boolean, should the converted data also be written to a columnar store in the "columnar" folder of the dataset
         """
+        if parser not in self.parsers:
+            raise ValueError("invalid parser: '%s'" % parser)
         
         self.website_url = website_url
         self.dataset_folder = dataset_folder
+        self.page_store = page_store if page_store is not None else DirectoryPageStore()
+        self.workers = max(1, workers)
+        self.ordered = ordered
+        self.chunksize = chunksize
+        self.parser = parser
+        self.parser_backend = self.get_parser_backend(parser, website_url)
+        self.use_manifest = use_manifest
+        self.manifest_filepath = os.path.join(dataset_folder, "conversion_manifest.sqlite")
+        self.manifest = None
+        self.columnar = columnar
+        self.columnar_folder = os.path.join(dataset_folder, "columnar")
+
+    def __getstate__(self):
+        # the manifest is only used by this process, the open database is not sent to the conversion workers
+        state = self.__dict__.copy()
+        state['manifest'] = None
+        return state
         
     def __call__(self, user_profile_html_filepath_list: list, user_post_history_html_filepath_list: str, overwrite=False, supress_output=False) -> list:
         """
@@ -50,8 +103,19 @@ class DiscourseConverter():
                 overwrite = False
 
         self._set_up_folders(overwrite)
-        self._convert_user_profiles(user_profile_html_filepath_list, overwrite, supress_output)
-        self._convert_post_histories(user_post_history_html_filepath_list, overwrite, supress_output)
+        if self.use_manifest:
+            # the json files that are up to date with their page are not converted again
+            self.manifest = DiscourseConversionManifest(self.manifest_filepath)
+        try:
+            self._convert_user_profiles(user_profile_html_filepath_list, overwrite, supress_output)
+            self._convert_post_histories(user_post_history_html_filepath_list, overwrite, supress_output)
+        finally:
+            if self.manifest is not None:
+                self.manifest.close()
+                self.manifest = None
+
+        if self.columnar:
+            self.write_columnar(self.user_profile_json_filepath_list, self.user_post_history_json_filepath_list)
 
         return self.user_profile_json_filepath_list, self.user_post_history_json_filepath_list
 
@@ -69,42 +133,9 @@ class DiscourseConverter():
         :param supress_output: boolean, should the detailed output print be supressed?
         """
         
-        for index, profile_html_filepath in enumerate(tqdm(user_profile_html_filepaths, desc="saving user profiles json")):
-            
-            username = self.get_username_from_profile_filepath(profile_html_filepath)
-
-            profile_json_filepath = os.path.join(self.dataset_folder, "profiles", username + ".json")
-            self.user_profile_json_filepath_list.append(profile_json_filepath) # save filepath
-            
-            # print progress update
-            if not supress_output: print("( " + str(index+1).zfill(4) + " / " + str(len(user_profile_html_filepaths)) + " ): " + username )
-            
-            #check if file exists
-            if not Path(profile_json_filepath).is_file() or overwrite:
-                
-                # read the html file
-                user_profile_html = open(profile_html_filepath, 'rb')
-                
-                # create soup
-                profile_soup = soup(user_profile_html, "html.parser")
-                profile_dict = {}
-                
-                # check if profile is empty
-                if self.get_username(profile_soup) is not None:
-                    # extract data from soup
-                    profile_dict['username'] = self.get_username(profile_soup)                
-                    profile_dict['full_name'] = self.get_full_name(profile_soup)
-                    profile_dict['member_status'] = self.get_member_status(profile_soup)
-                
-                    if self.get_join_timestamp(profile_soup) is not None:
-                        profile_dict['join_timestamp'] = self.get_join_timestamp(profile_soup)
-                    if self.get_last_post_timestamp(profile_soup) is not None:
-                        profile_dict['last_post_timestamp'] = self.get_last_post_timestamp(profile_soup)
-                    
-                else:
-                    profile_dict['username'] = username
-
-                self._write_data_to_json_file(profile_json_filepath, profile_dict, overwrite)
+        profile_json_filepaths = [self.get_profile_json_filepath(profile_html_filepath) for profile_html_filepath in user_profile_html_filepaths]
+        converted_filepaths = self._convert_files(self._convert_user_profile, user_profile_html_filepaths, profile_json_filepaths, overwrite, supress_output, "saving user profiles json")
+        self.user_profile_json_filepath_list.extend(converted_filepaths) # save filepaths
 
     def _convert_post_histories(self, user_post_history_html_filepaths: list, overwrite=False, supress_output=True):
         """
@@ -116,44 +147,415 @@ class DiscourseConverter():
         :param supress_output: boolean, should the detailed output print be supressed?
         """
         
-        for index, post_history_html_filepath in enumerate(tqdm(user_post_history_html_filepaths, desc='saving post histories json')):
-            
-            username = self.get_username_from_post_history_filepath(post_history_html_filepath)
+        post_history_json_filepaths = [self.get_post_history_json_filepath(post_history_html_filepath) for post_history_html_filepath in user_post_history_html_filepaths]
+        converted_filepaths = self._convert_files(self._convert_post_history, user_post_history_html_filepaths, post_history_json_filepaths, overwrite, supress_output, "saving post histories json")
+        self.user_post_history_json_filepath_list.extend(converted_filepaths) # save filepaths
+
+    def _convert_files(self, convert, html_filepaths: list, json_filepaths: list, overwrite=False, supress_output=True, description="") -> list:
+        """
+        Converts html files into json files, in this process or spread over a pool of processes
+
+        Input:
+        :param convert: function, converts one file, takes the html filepath, the json filepath and overwrite
+        :param html_filepaths: list of strings, locations of the html files
+        :param json_filepaths: list of strings, locations of the json files, in the same order as the html files
+        :param overwrite: boolean, should the json files be overwritten
+        :param supress_output: boolean, should the detailed output print be supressed?
+        :param description: string, description of the progress bar
+
+        Output:
+        list of the json filepaths, in the order of the html filepaths or in the order the conversions finish
+        """
+        number_of_files = len(html_filepaths)
+        converted_filepaths = []
+        progress_bar = tqdm(total=number_of_files, desc=description)
 
-            post_history_json_filepath = os.path.join(self.dataset_folder, "post_histories", username + ".json")
-            self.user_post_history_json_filepath_list.append(post_history_json_filepath) # save filepath
-            
+        def finish(json_filepath):
             # print progress update
-            if not supress_output: print("( " + str(index+1).zfill(4) + " / " + str(len(user_post_history_html_filepaths)) + " ): " + username )
-            
-            #check if file exists
-            if not Path(post_history_json_filepath).is_file() or overwrite:
-
-                # read the html file
-                user_post_history_html = open(post_history_html_filepath, 'rb')
-                
-                # create soup
-                post_history_soup = soup(user_post_history_html, "html.parser")
-                all_posts_soup = post_history_soup.find_all('div', {'class': 'user-stream-item item ember-view'})
-
-                post_history_list = []
-
-                # check if profile is empty
-                if all_posts_soup is not None:
-                    for post_soup in all_posts_soup:
-                        post_dict = {}
-                        post_dict['username'] = username
-                        post_dict['topic'] = self.get_post_topic(post_soup)
-                        post_dict['topic_link'] = self.website_url + self.get_post_topic_link(post_soup)
-                        post_dict['category'] = self.get_post_category(post_soup)
-                        post_dict['post_timestamp'] = self.get_post_timestamp(post_soup)
-                        post_dict['text'] = self.get_post_text(post_soup)
-
-                        post_history_list.append(post_dict)
-                
-
-                # write post history to json file
-                self._write_data_to_json_file(post_history_json_filepath, post_history_list, overwrite)
+            converted_filepaths.append(json_filepath)
+            progress_bar.update()
+            if not supress_output: print("( " + str(len(converted_filepaths)).zfill(4) + " / " + str(number_of_files) + " ): " + Path(json_filepath).stem)
+
+        # only the files that do not exist yet are converted, with the manifest also the files of changed pages
+        tasks = []
+        fingerprints = {}
+        for html_filepath, json_filepath in zip(html_filepaths, json_filepaths):
+            if self.manifest is not None:
+                fingerprints[json_filepath] = self.page_store.fingerprint(html_filepath)
+                if overwrite or not self.manifest.is_current(json_filepath, html_filepath, fingerprints[json_filepath], self.converter_version):
+                    tasks.append((html_filepath, json_filepath, True))
+            elif not Path(json_filepath).is_file() or overwrite:
+                tasks.append((html_filepath, json_filepath, overwrite))
+        task_by_filepath = {task[1]: task for task in tasks}
+
+        if self.workers == 1 or len(tasks) <= 1:
+            for json_filepath in json_filepaths:
+                if json_filepath in task_by_filepath: convert(*task_by_filepath[json_filepath])
+                finish(json_filepath)
+        elif not self.ordered:
+            # existing files are done right away
+            for json_filepath in json_filepaths:
+                if json_filepath not in task_by_filepath: finish(json_filepath)
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                for future in as_completed(self._submit_chunks(executor, convert, tasks)[0]):
+                    for json_filepath in future.result(): finish(json_filepath)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures, chunks = self._submit_chunks(executor, convert, tasks)
+                # wait for the chunks in order, existing files keep their position
+                chunk_futures = {json_filepath: future for future, chunk in zip(futures, chunks) for _, json_filepath, _ in chunk}
+                for json_filepath in json_filepaths:
+                    if json_filepath in chunk_futures: chunk_futures[json_filepath].result()
+                    finish(json_filepath)
+
+        if self.manifest is not None:
+            self.manifest.record([(json_filepath, html_filepath, fingerprints[json_filepath]) for html_filepath, json_filepath, _ in tasks], self.converter_version)
+
+        progress_bar.close()
+        return converted_filepaths
+
+    def _submit_chunks(self, executor, convert, tasks: list):
+        """
+        Sends the tasks in chunks to the workers, so the workers are not waiting for single files
+        """
+        chunksize = self.chunksize if self.chunksize is not None else max(1, min(100, len(tasks) // (self.workers * 4)))
+        chunks = [tasks[position:position + chunksize] for position in range(0, len(tasks), chunksize)]
+        return [executor.submit(self._convert_chunk, convert, chunk) for chunk in chunks], chunks
+
+    @staticmethod
+    def _convert_chunk(convert, chunk: list) -> list:
+        """
+        Converts a chunk of files in a worker process and returns their json filepaths
+        """
+        for html_filepath, json_filepath, overwrite in chunk:
+            convert(html_filepath, json_filepath, overwrite)
+        return [json_filepath for _, json_filepath, _ in chunk]
+
+    def _convert_user_profile(self, profile_html_filepath: str, profile_json_filepath: str, overwrite=False):
+        profile_dict = self.extract_profile(profile_html_filepath)
+        self._write_data_to_json_file(profile_json_filepath, profile_dict, overwrite)
+
+    def _convert_post_history(self, post_history_html_filepath: str, post_history_json_filepath: str, overwrite=False):
+        if self.parser == "lxml-iterparse":
+            # the posts are written while the page is read
+            self._write_data_to_json_file(post_history_json_filepath, self.iter_post_history(post_history_html_filepath), overwrite)
+            return
+        post_history_list = self.extract_post_history(post_history_html_filepath)
+        # write post history to json file
+        self._write_data_to_json_file(post_history_json_filepath, post_history_list, overwrite)
+
+    def convert_user(self, profile_html_filepath: str, post_history_html_filepath: str, overwrite=False):
+        """
+        Converts the profile and the post history of one user and saves them to .json files,
+        existing json files are loaded instead if they should not be overwritten.
+        With the manifest, like in __call__, only json files that are not up to date with their page are converted
+
+        Input:
+        :param profile_html_filepath: string, location of the profile html file
+        :param post_history_html_filepath: string, location of the post history html file
+        :param overwrite: boolean, should the json files be overwritten
+
+        Output:
+        profile dict and list of post dicts
+        """
+        manifest = self.manifest
+        if manifest is None and self.use_manifest:
+            # called by the conversion workers of the pipeline, every call has its own connection
+            manifest = DiscourseConversionManifest(self.manifest_filepath)
+        try:
+            profile_dict = self._convert_or_load(self._convert_user_profile, profile_html_filepath, self.get_profile_json_filepath(profile_html_filepath), overwrite, manifest)
+            post_history_list = self._convert_or_load(self._convert_post_history, post_history_html_filepath, self.get_post_history_json_filepath(post_history_html_filepath), overwrite, manifest)
+        finally:
+            if manifest is not None and manifest is not self.manifest:
+                manifest.close()
+
+        return profile_dict, post_history_list
+
+    def _convert_or_load(self, convert, html_filepath: str, json_filepath: str, overwrite=False, manifest=None):
+        """
+        Converts one file if its json file is not up to date, like _convert_files(), and loads the json file
+        """
+        if manifest is not None:
+            fingerprint = self.page_store.fingerprint(html_filepath)
+            if overwrite or not manifest.is_current(json_filepath, html_filepath, fingerprint, self.converter_version):
+                convert(html_filepath, json_filepath, True)
+                manifest.record([(json_filepath, html_filepath, fingerprint)], self.converter_version)
+        elif not Path(json_filepath).is_file() or overwrite:
+            convert(html_filepath, json_filepath, overwrite)
+
+        with open(json_filepath) as json_file:
+            return json.load(json_file)
+
+    def convert_topics(self, topic_filepaths: list, text_store, overwrite=False, supress_output=False) -> int:
+        """
+        Extracts the full texts of the posts of topic pages and writes them to a text store,
+        the posts are written while the pages are read.
+        Every topic is parsed once, topics that are stored from the same page are skipped
+
+        Input:
+        :param topic_filepaths: list of strings, locations of the topic pages
+        :param text_store: DiscourseTextStore, store for the texts
+        :param overwrite: boolean, should stored topics be parsed again
+        :param supress_output: boolean, should the detailed output print be supressed?
+
+        Output:
+        number of posts that were written
+        """
+        number_of_posts = 0
+        for index, topic_filepath in enumerate(tqdm(topic_filepaths, desc="saving topic texts")):
+            topic_id = self.get_topic_id_from_topic_filepath(topic_filepath)
+            fingerprint = self.page_store.fingerprint(topic_filepath)
+            if not overwrite and text_store.is_current(topic_id, fingerprint): continue
+
+            if not supress_output: print("( " + str(index + 1).zfill(4) + " / " + str(len(topic_filepaths)) + " ): topic " + str(topic_id))
+            number_of_posts = number_of_posts + text_store.write_topic(topic_id, fingerprint, self.iter_topic_posts(topic_filepath))
+        return number_of_posts
+
+    def write_columnar(self, profile_json_filepaths: list, post_history_json_filepaths: list, batch_size=1000):
+        """
+        Writes the converted profiles and post histories to the columnar store,
+        the json files are read in batches of users while the store is written
+
+        Input:
+        :param profile_json_filepaths: list of strings, locations of the profile json files
+        :param post_history_json_filepaths: list of strings, locations of the post history json files
+        :param batch_size: int, number of users that are written at once
+        """
+        def users():
+            # same pairing as the data loader
+            for profile_json_filepath, post_history_json_filepath in zip(sorted(profile_json_filepaths), sorted(post_history_json_filepaths)):
+                with open(profile_json_filepath) as profile_json:
+                    profile_dict = json.load(profile_json)
+                with open(post_history_json_filepath) as post_history_json:
+                    post_history_list = json.load(post_history_json)
+                yield profile_dict, post_history_list
+
+        DiscourseColumnarStore(self.columnar_folder).write(users(), batch_size=batch_size)
+
+    # ====================================================================================== #
+    # EXTRACTORS:                                                                            #
+    # ====================================================================================== #
+
+    def extract_profile(self, profile_html_filepath: str) -> dict:
+        """
+        Extracts the profile data of a profile html file, or of a profile json file of the api backend
+        """
+        username = self.get_username_from_profile_filepath(profile_html_filepath)
+
+        if profile_html_filepath.endswith(".json"):
+            # profile downloaded from the api
+            with self.page_store.open(profile_html_filepath) as user_profile_json:
+                return self.convert_api_profile(json.load(user_profile_json), username)
+
+        if self.parser_backend is not None:
+            return self.parser_backend.parse_profile(self.page_store.read(profile_html_filepath), username)
+
+        # read the html file
+        profile_html = self.page_store.read(profile_html_filepath)
+        # create soup of the user header
+        profile_soup = soup(self._slice_elements(profile_html, self.profile_start_pattern), "html.parser", parse_only=self.profile_strainer, from_encoding="utf-8")
+        profile_dict = self.extract_profile_from_soup(profile_soup, username)
+
+        if len(profile_dict) == 1:
+            # no user header found, look at the whole page
+            profile_dict = self.extract_profile_from_soup(soup(profile_html, "html.parser"), username)
+        return profile_dict
+
+    def extract_post_history(self, post_history_html_filepath: str) -> list:
+        """
+        Extracts the posts of a post history html file, or of a post history json file of the api backend
+        """
+        username = self.get_username_from_post_history_filepath(post_history_html_filepath)
+
+        if post_history_html_filepath.endswith(".json"):
+            # post history downloaded from the api
+            with self.page_store.open(post_history_html_filepath) as user_post_history_json:
+                return self.convert_api_post_history(json.load(user_post_history_json), username)
+
+        if self.parser_backend is not None:
+            return self.parser_backend.parse_post_history(self.page_store.read(post_history_html_filepath), username)
+
+        # read the html file
+        post_history_html = self.page_store.read(post_history_html_filepath)
+        # create soup of the posts
+        post_history_soup = soup(self._slice_elements(post_history_html, self.post_history_start_pattern), "html.parser", parse_only=self.post_history_strainer, from_encoding="utf-8")
+        return self.extract_post_history_from_soup(post_history_soup, username)
+
+    def iter_post_history(self, post_history_html_filepath: str):
+        """
+        Yields the posts of a post history html file one by one,
+        with the "lxml-iterparse" parser the page is read as a stream and the whole page is never in memory
+        """
+        if self.parser != "lxml-iterparse" or post_history_html_filepath.endswith(".json"):
+            yield from self.extract_post_history(post_history_html_filepath)
+            return
+
+        username = self.get_username_from_post_history_filepath(post_history_html_filepath)
+        if self.page_store.size(post_history_html_filepath) == 0: return
+        with self.page_store.open(post_history_html_filepath) as user_post_history_html:
+            yield from self.parser_backend.iter_post_history(user_post_history_html, username)
+
+    def iter_topic_posts(self, topic_filepath: str):
+        """
+        Yields the post number, username and full text of the posts of a topic page one by one,
+        html pages are read as a stream, json pages of the api backend are the posts of the topic
+        """
+        if topic_filepath.endswith(".json"):
+            # topic downloaded from the api
+            with self.page_store.open(topic_filepath) as topic_json:
+                for post in json.load(topic_json):
+                    yield self.convert_api_topic_post(post)
+            return
+
+        if self.page_store.size(topic_filepath) == 0: return
+        with self.page_store.open(topic_filepath) as topic_html:
+            yield from self.get_parser_backend("lxml", self.website_url).iter_topic_posts(topic_html)
+
+    @staticmethod
+    def extract_profile_from_soup(profile: soup, username: str) -> dict:
+        """
+        Extracts the profile data in one pass over the document,
+        gives the same data as the get_username, get_full_name, ... extractors
+
+        Input:
+        :param profile: soup, the profile html
+        :param username: string, username from the filepath, used for empty profiles
+        """
+        username_h1 = None
+        full_name_h2 = None
+        member_status_h3 = None
+        secondary_div = None
+        timestamps = {}
+        label = None
+
+        # go through the elements in document order until every field is found
+        for element in profile.descendants:
+            if not isinstance(element, Tag): continue
+            classes = element.get('class', [])
+            if element.name == 'h1' and username_h1 is None and 'username' in classes:
+                username_h1 = element
+            elif element.name == 'h2' and full_name_h2 is None and 'full-name' in classes:
+                full_name_h2 = element
+            elif element.name == 'h3' and member_status_h3 is None:
+                member_status_h3 = element
+            elif element.name == 'div' and secondary_div is None and 'secondary' in classes:
+                secondary_div = element
+            elif element.name == 'dt' and secondary_div is not None and DiscourseConverter._is_inside(element, secondary_div):
+                # the label of the next timestamp, e.g. "Joined"
+                label = element.find(text=True, recursive=False)
+            elif element.name == 'span' and label in ["Joined", "Last Post"] and label not in timestamps and DiscourseConverter._is_inside(element, secondary_div):
+                timestamps[label] = int(element.get('data-time'))
+                label = None
+                if len(timestamps) == 2 and username_h1 is not None and full_name_h2 is not None and member_status_h3 is not None: break
+
+        profile_dict = {}
+
+        # check if profile is empty
+        if username_h1 is None:
+            profile_dict['username'] = username
+            return profile_dict
+
+        profile_dict['username'] = username_h1.find(text=True, recursive=False).replace(" ", "")
+        profile_dict['full_name'] = full_name_h2.find(text=True, recursive=False)
+        profile_dict['member_status'] = DiscourseConverter.get_member_status_from_title(member_status_h3.find(text=True, recursive=False))
+        if timestamps.get("Joined") is not None:
+            profile_dict['join_timestamp'] = timestamps["Joined"]
+        if timestamps.get("Last Post") is not None:
+            profile_dict['last_post_timestamp'] = timestamps["Last Post"]
+
+        return profile_dict
+
+    def extract_post_history_from_soup(self, post_history: soup, username: str) -> list:
+        """
+        Extracts the posts with one pass over every post,
+        gives the same data as the get_post_topic, get_post_category, ... extractors
+
+        Input:
+        :param post_history: soup, the post history html
+        :param username: string, username from the filepath
+        """
+        post_history_list = []
+        for post_soup in post_history.find_all('div', {'class': 'user-stream-item item ember-view'}):
+            title_span = None
+            title_a = None
+            category_span = None
+            time_span = None
+            excerpt_p = None
+
+            # go through the elements of the post in document order until every field is found
+            for element in post_soup.descendants:
+                if not isinstance(element, Tag): continue
+                classes = element.get('class', [])
+                if element.name == 'span':
+                    if title_span is None and 'title' in classes: title_span = element
+                    if category_span is None and 'category-name' in classes: category_span = element
+                    if time_span is None and " ".join(classes) == 'relative-date date': time_span = element
+                elif element.name == 'a':
+                    if title_a is None and title_span is not None and DiscourseConverter._is_inside(element, title_span): title_a = element
+                elif element.name == 'p':
+                    if excerpt_p is None and 'excerpt' in classes: excerpt_p = element
+                if title_a is not None and category_span is not None and time_span is not None and excerpt_p is not None: break
+
+            text = excerpt_p.find(text=True, recursive=False)
+
+            post_dict = {}
+            post_dict['username'] = username
+            post_dict['topic'] = title_a.find(text=True, recursive=False)
+            post_dict['topic_link'] = self.website_url + title_a.get('href')
+            post_dict['category'] = category_span.find(text=True, recursive=False)
+            post_dict['post_timestamp'] = int(time_span.get('data-time'))
+            post_dict['text'] = text.strip() if text is not None else None
+
+            post_history_list.append(post_dict)
+
+        return post_history_list
+
+    @staticmethod
+    def _slice_elements(page: bytes, start_pattern) -> bytes:
+        """
+        Cuts the page from the start tag of the first element that matches to the end tag of the last one,
+        by counting the div tags after the last start tag.
+        The whole page is returned if no element is found or the divs are not closed.
+
+        Input:
+        :param page: bytes, the html page
+        :param start_pattern: compiled regular expression of the start tag of the elements
+        """
+        starts = [match.start() for match in start_pattern.finditer(page)]
+        if len(starts) == 0: return page
+
+        depth = 0
+        for div_tag in DiscourseConverter.div_tag_pattern.finditer(page, starts[-1]):
+            depth = depth - 1 if div_tag.group(1) else depth + 1
+            if depth == 0: return page[starts[0]:div_tag.end()]
+        return page
+
+    @staticmethod
+    def _is_inside(element: soup, ancestor: soup) -> bool:
+        # compare by identity, comparing tags with == compares their whole content
+        for parent in element.parents:
+            if parent is ancestor: return True
+        return False
+
+    @staticmethod
+    def get_parser_backend(parser: str, website_url: str):
+        """
+        get the extractors of a fast parser, None for the BeautifulSoup extractors of this class
+        """
+        if parser == "html.parser": return None
+
+        # the backends use the helpers of this class, so they are imported when they are needed
+        from python_script.data.discourse_parsers import LxmlParser, SelectolaxParser
+        if parser in ["lxml", "lxml-iterparse"]: return LxmlParser(website_url)
+        return SelectolaxParser(website_url)
+
+    def get_profile_json_filepath(self, profile_html_filepath: str) -> str:
+        username = self.get_username_from_profile_filepath(profile_html_filepath)
+        return os.path.join(self.dataset_folder, "profiles", username + ".json")
+
+    def get_post_history_json_filepath(self, post_history_html_filepath: str) -> str:
+        username = self.get_username_from_post_history_filepath(post_history_html_filepath)
+        return os.path.join(self.dataset_folder, "post_histories", username + ".json")
 
     # ====================================================================================== #
     # JSON HANDLER:                                                                         #
@@ -176,31 +578,15 @@ class DiscourseConverter():
     @staticmethod
     def _write_data_to_json_file(filename: str, data, overwrite: bool):
         """
-        Writes a json file to disk.
+        Writes a json file to disk, see DiscourseJsonWriter.
 
         Input:
         :param filename: string, path to file
-        :param data: list, dict, ... , data that should be written to disk
+        :param data: list, dict, generator of posts, ... , data that should be written to disk
         :param overwrite: boolean, should the file be overwritten if it already exists
         """
-        # convert data to json
-        json_string = json.dumps(data)
-
-        if Path(filename).is_file() and not overwrite:
-            # html file already exists, dont overwrite
-            pass
-        elif not Path(filename).is_file():
-            # write to file
-            open(filename, 'x') # create file
-            with io.open(filename, 'w') as outfile:
-                outfile.write(json_string)
-                outfile.close()            
-        elif Path(filename).is_file() and overwrite:
-            # html file should be overwritten
-            with io.open(filename, 'w') as outfile:
-                outfile.write(json_string)
-                outfile.close()
-    
+        DiscourseJsonWriter.write(filename, data, overwrite)
+
     # ====================================================================================== #
     # HELPER FUNCTIONS PROFILE:                                                              #
     # ====================================================================================== #
@@ -228,6 +614,11 @@ class DiscourseConverter():
     def get_member_status(profile: soup) -> str:
         member_status_h3 = profile.find('h3')
         member_status = member_status_h3.find(text=True, recursive=False)
+        return DiscourseConverter.get_member_status_from_title(member_status)
+
+    @staticmethod
+    def get_member_status_from_title(member_status: str) -> str:
+        if member_status is None: member_status = ""
         if member_status[0:6] == "Member":
             return "Member"
         if member_status[0:8] == "Director":
@@ -295,6 +686,121 @@ class DiscourseConverter():
         else: return None
 
     
+    # ====================================================================================== #
+    # HELPER FUNCTIONS TOPICS:                                                               #
+    # ====================================================================================== #
+
+    @staticmethod
+    def iter_topic_links(post_history_json_filepaths: list):
+        """
+        Yields the topic links of the posts of converted post histories
+        """
+        for post_history_json_filepath in post_history_json_filepaths:
+            with open(post_history_json_filepath) as post_history_json:
+                for post in json.load(post_history_json):
+                    if post.get('topic_link') is not None: yield post['topic_link']
+
+    @staticmethod
+    def _get_topic_link_parts(topic_link: str) -> list:
+        # the parts after /t/: slug, topic id and the post number if it is not the first post
+        position = topic_link.find("/t/")
+        if position == -1: return []
+        path = topic_link[position + len("/t/"):].split("?")[0].split("#")[0]
+        parts = [part for part in path.split("/") if part != ""]
+        if len(parts) > 0 and parts[0].isdigit() and (len(parts) == 1 or not parts[1].isdigit()):
+            # link without slug
+            parts = [""] + parts
+        return parts
+
+    @staticmethod
+    def get_topic_id_from_link(topic_link: str) -> int:
+        """
+        get the topic id of a topic link, e.g. 4190 for /t/appreciation-thread/4190/222, None if it is no topic link
+        """
+        parts = DiscourseConverter._get_topic_link_parts(topic_link)
+        if len(parts) < 2 or not parts[1].isdigit(): return None
+        return int(parts[1])
+
+    @staticmethod
+    def get_post_number_from_link(topic_link: str) -> int:
+        """
+        get the post number of a topic link, e.g. 222 for /t/appreciation-thread/4190/222, 1 for a link to the topic
+        """
+        parts = DiscourseConverter._get_topic_link_parts(topic_link)
+        if len(parts) < 3 or not parts[2].isdigit(): return 1
+        return int(parts[2])
+
+    @staticmethod
+    def get_topic_id_from_topic_filepath(filepath: str) -> int:
+        return int(Path(filepath).stem)
+
+    # ====================================================================================== #
+    # HELPER FUNCTIONS API:                                                                  #
+    # ====================================================================================== #
+
+    @staticmethod
+    def convert_api_profile(profile: dict, username: str) -> dict:
+        """
+        Extracts the profile data from the user dict of the /u/{username}.json endpoint
+        """
+        profile_dict = {}
+
+        # check if profile is empty
+        if profile is None or profile.get('username') is None:
+            profile_dict['username'] = username
+            return profile_dict
+
+        profile_dict['username'] = profile['username']
+        profile_dict['full_name'] = profile.get('name')
+        profile_dict['member_status'] = DiscourseConverter.get_member_status_from_title(profile.get('title'))
+
+        join_timestamp = DiscourseApiClient.iso_to_timestamp(profile.get('created_at'))
+        if join_timestamp is not None:
+            profile_dict['join_timestamp'] = join_timestamp
+        last_post_timestamp = DiscourseApiClient.iso_to_timestamp(profile.get('last_posted_at'))
+        if last_post_timestamp is not None:
+            profile_dict['last_post_timestamp'] = last_post_timestamp
+
+        return profile_dict
+
+    def convert_api_post_history(self, user_actions: list, username: str) -> list:
+        """
+        Extracts the post data from the user actions of the /user_actions.json endpoint
+        """
+        post_history_list = []
+        for action in user_actions:
+            post_dict = {}
+            post_dict['username'] = username
+            post_dict['topic'] = action.get('title')
+            post_dict['topic_link'] = self.website_url + "/t/" + str(action.get('slug')) + "/" + str(action.get('topic_id')) + "/" + str(action.get('post_number'))
+            post_dict['category'] = action.get('category_name')
+            post_dict['post_timestamp'] = DiscourseApiClient.iso_to_timestamp(action.get('created_at'))
+            post_dict['text'] = self.get_api_post_text(action.get('excerpt'))
+
+            post_history_list.append(post_dict)
+
+        return post_history_list
+
+    @staticmethod
+    def convert_api_topic_post(post: dict) -> dict:
+        """
+        Extracts the post number, username and full text from a post of the /t/{topic_id}.json endpoint
+        """
+        post_dict = {}
+        post_dict['post_number'] = post.get('post_number')
+        post_dict['username'] = post.get('username')
+        post_dict['text'] = soup(post.get('cooked') or "", "html.parser").get_text().strip()
+        return post_dict
+
+    @staticmethod
+    def get_api_post_text(excerpt: str) -> str:
+        # the excerpt of the api is html, keep the first text like the excerpt paragraph of the html
+        if excerpt is None: return None
+        text = soup(excerpt, "html.parser").find(text=True, recursive=False)
+        if text is not None:
+            return text.strip()
+        else: return None
+
     # ====================================================================================== #
     # USER INTERFACE:                                                                        #
     # ====================================================================================== #
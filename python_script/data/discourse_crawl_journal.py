@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+import time
+
+class DiscourseCrawlJournal():
+    """
+    Discourse crawl journal class
+    Keeps the state of every page of a crawl in a sqlite database,
+    so an interrupted crawl can continue with the pages that are still pending
+    """
+
+    PENDING = "pending"
+    FETCHED = "fetched"
+    FAILED = "failed"
+
+    PROFILE = "profile"
+    POST_HISTORY = "post_history"
+    TOPIC = "topic"
+
+    def __init__(self, filepath: str):
+        """
+        Open the journal, the database is created if it does not exist
+
+        Input:
+        :param filepath: string, location of the sqlite database
+        """
+        self.filepath = filepath
+        self.lock = threading.Lock()
+
+        # the connection is shared by the download workers, the lock serializes the access
+        self.connection = sqlite3.connect(filepath, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS pages (
+                                       url TEXT PRIMARY KEY,
+                                       profile_link TEXT NOT NULL,
+                                       page_type TEXT NOT NULL,
+                                       filepath TEXT NOT NULL,
+                                       position INTEGER NOT NULL,
+                                       state TEXT NOT NULL,
+                                       retries INTEGER NOT NULL DEFAULT 0,
+                                       bytes INTEGER,
+                                       duration REAL,
+                                       updated REAL)""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS pages_state ON pages (state, position)")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    # ====================================================================================== #
+    # WRITE:                                                                                 #
+    # ====================================================================================== #
+
+    def add_pages(self, pages: list):
+        """
+        Add pages as pending, pages that are already in the journal keep their state
+
+        Input:
+        :param pages: list of tuples (url, profile_link, page_type, filepath)
+        """
+        with self.lock:
+            position = self.connection.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM pages").fetchone()[0]
+            self.connection.executemany("INSERT OR IGNORE INTO pages (url, profile_link, page_type, filepath, position, state) VALUES (?, ?, ?, ?, ?, ?)",
+                                        [(url, profile_link, page_type, filepath, position + index, self.PENDING)
+                                         for index, (url, profile_link, page_type, filepath) in enumerate(pages)])
+            self.connection.commit()
+
+    def mark_fetched(self, url: str, number_of_bytes: int, duration: float):
+        with self.lock:
+            self.connection.execute("UPDATE pages SET state = ?, bytes = ?, duration = ?, updated = ? WHERE url = ?",
+                                    (self.FETCHED, number_of_bytes, duration, time.time(), url))
+            self.connection.commit()
+
+    def mark_failed(self, url: str, duration: float):
+        with self.lock:
+            self.connection.execute("UPDATE pages SET state = ?, retries = retries + 1, duration = ?, updated = ? WHERE url = ?",
+                                    (self.FAILED, duration, time.time(), url))
+            self.connection.commit()
+
+    def mark_all_pending(self):
+        """
+        Start a new round over all pages, e.g. for an incremental download
+        """
+        with self.lock:
+            self.connection.execute("UPDATE pages SET state = ?, retries = 0", (self.PENDING,))
+            self.connection.commit()
+
+    # ====================================================================================== #
+    # READ:                                                                                  #
+    # ====================================================================================== #
+
+    def is_empty(self) -> bool:
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM pages LIMIT 1").fetchone() is None
+
+    def get_state(self, url: str) -> str:
+        with self.lock:
+            row = self.connection.execute("SELECT state FROM pages WHERE url = ?", (url,)).fetchone()
+        return None if row is None else row[0]
+
+    def get_retries(self, url: str) -> int:
+        with self.lock:
+            row = self.connection.execute("SELECT retries FROM pages WHERE url = ?", (url,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def get_pending_profile_links(self, max_retries=3) -> list:
+        """
+        get the profile links of all users with a page that is pending,
+        or that failed less than max_retries times, in the order they were added
+        """
+        with self.lock:
+            rows = self.connection.execute("""SELECT profile_link, MIN(position) FROM pages
+                                              WHERE state = ? OR (state = ? AND retries < ?)
+                                              GROUP BY profile_link ORDER BY MIN(position)""",
+                                           (self.PENDING, self.FAILED, max_retries)).fetchall()
+        return [row[0] for row in rows]
+
+    def get_filepaths(self, page_type: str) -> list:
+        """
+        get the filepaths of all pages of a type, in the order they were added
+        """
+        with self.lock:
+            rows = self.connection.execute("SELECT filepath FROM pages WHERE page_type = ? ORDER BY position", (page_type,)).fetchall()
+        return [row[0] for row in rows]
+
+    def get_summary(self) -> dict:
+        """
+        get the number of pages, bytes and the download time per state
+        """
+        with self.lock:
+            rows = self.connection.execute("SELECT state, COUNT(*), COALESCE(SUM(bytes), 0), COALESCE(SUM(duration), 0) FROM pages GROUP BY state").fetchall()
+        return {state: {'pages': pages, 'bytes': number_of_bytes, 'duration': duration} for state, pages, number_of_bytes, duration in rows}
@@ -0,0 +1,204 @@
+from collections import deque
+import threading
+import time
+import os
+
+class DiscourseCrawlMetrics():
+    """
+    Discourse crawl metrics class
+    Collects the fetch latency, scroll time, size and retries of every request of a crawl
+    and aggregates them into throughput and latency percentiles.
+    The totals are running counters, only the most recent requests are kept for the percentiles,
+    so the memory and the time of a summary do not grow with the length of the crawl.
+    The summary can be written periodically to a text file in the Prometheus format,
+    e.g. for the textfile collector of the node exporter, or read with get_summary().
+    """
+
+    percentiles = [50, 90, 99]
+
+    def __init__(self, window_size=1000):
+        """
+        Input:
+        :param window_size: int, number of recent requests that are kept for the percentiles and the windowed summary
+        """
+        self.lock = threading.Lock()
+        self.recent_requests = deque(maxlen=window_size)
+        self.totals = {'requests': 0, 'failed': 0, 'retries': 0, 'bytes': 0, 'scrolls': 0, 'successful': 0, 'fetch_time_sum': 0.0, 'scroll_time_sum': 0.0}
+        self.scrolls = {}
+        self.start_time = time.monotonic()
+
+        self.export_thread = None
+        self.export_stop = threading.Event()
+
+    # ====================================================================================== #
+    # RECORD:                                                                                #
+    # ====================================================================================== #
+
+    def record_scroll(self, url: str, load_time: float, scroll_time: float, scrolls: int):
+        """
+        remember the browser timing of a page until the request is recorded
+        """
+        with self.lock:
+            self.scrolls[url] = {'load_time': load_time, 'scroll_time': scroll_time, 'scrolls': scrolls}
+
+    def record_request(self, url: str, page_type: str, fetch_time: float, number_of_bytes: int, retries=0, success=True):
+        """
+        record one request
+
+        Input:
+        :param url: string, url of the page
+        :param page_type: string, e.g. "profile" or "post_history"
+        :param fetch_time: float, seconds from the start of the request until the page was complete
+        :param number_of_bytes: int, size of the page
+        :param retries: int, number of earlier failed attempts for this page
+        :param success: boolean, was the page downloaded
+        """
+        with self.lock:
+            scroll = self.scrolls.pop(url, {})
+            request = {'url': url,
+                       'page_type': page_type,
+                       'fetch_time': fetch_time,
+                       'scroll_time': scroll.get('scroll_time', 0),
+                       'scrolls': scroll.get('scrolls', 0),
+                       'bytes': number_of_bytes if success else 0,
+                       'retries': retries,
+                       'success': success,
+                       'time': time.monotonic()}
+            self.recent_requests.append(request)
+
+            self.totals['requests'] += 1
+            self.totals['failed'] += 0 if success else 1
+            self.totals['retries'] += retries
+            self.totals['scrolls'] += request['scrolls']
+            if success:
+                self.totals['successful'] += 1
+                self.totals['bytes'] += number_of_bytes
+                self.totals['fetch_time_sum'] += fetch_time
+                self.totals['scroll_time_sum'] += request['scroll_time']
+
+    # ====================================================================================== #
+    # SUMMARY:                                                                               #
+    # ====================================================================================== #
+
+    def get_summary(self, window=None) -> dict:
+        """
+        aggregate the recorded requests, the percentiles are computed from the recent requests
+
+        Input:
+        :param window: float, only use the recent requests of the last seconds, all requests if None
+
+        Output:
+        dict with counts, throughput in requests and bytes per second, the latency percentiles in seconds
+        and the latency sums of the successful requests
+        """
+        now = time.monotonic()
+        with self.lock:
+            recent_requests = list(self.recent_requests)
+            totals = dict(self.totals)
+        if window is not None:
+            recent_requests = [request for request in recent_requests if request['time'] >= now - window]
+            elapsed = min(window, now - self.start_time)
+            successful = [request for request in recent_requests if request['success']]
+            totals = {'requests': len(recent_requests),
+                      'failed': len(recent_requests) - len(successful),
+                      'retries': sum([request['retries'] for request in recent_requests]),
+                      'bytes': sum([request['bytes'] for request in successful]),
+                      'scrolls': sum([request['scrolls'] for request in recent_requests]),
+                      'successful': len(successful),
+                      'fetch_time_sum': sum([request['fetch_time'] for request in successful]),
+                      'scroll_time_sum': sum([request['scroll_time'] for request in successful])}
+        else:
+            elapsed = now - self.start_time
+
+        summary = dict(totals)
+        summary['elapsed'] = elapsed
+        summary['requests_per_second'] = totals['successful'] / elapsed if elapsed > 0 else 0
+        summary['bytes_per_second'] = totals['bytes'] / elapsed if elapsed > 0 else 0
+        for key in ['fetch_time', 'scroll_time']:
+            values = sorted([request[key] for request in recent_requests if request['success']])
+            summary[key] = {percentile: self.get_percentile(values, percentile) for percentile in self.percentiles}
+        return summary
+
+    @staticmethod
+    def get_percentile(sorted_values: list, percentile: float) -> float:
+        """
+        percentile of sorted values with linear interpolation, 0 for no values
+        """
+        if len(sorted_values) == 0: return 0
+        position = (len(sorted_values) - 1) * percentile / 100
+        lower = int(position)
+        upper = min(lower + 1, len(sorted_values) - 1)
+        return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+    def get_postfix(self) -> dict:
+        """
+        short summary for the progress bar, only sorts the fetch times of the recent requests
+        """
+        elapsed = time.monotonic() - self.start_time
+        with self.lock:
+            fetch_times = sorted([request['fetch_time'] for request in self.recent_requests if request['success']])
+            successful, failed = self.totals['successful'], self.totals['failed']
+        return {'req/s': round(successful / elapsed if elapsed > 0 else 0, 2),
+                'p90': round(self.get_percentile(fetch_times, 90), 2),
+                'failed': failed}
+
+    # ====================================================================================== #
+    # EXPORT:                                                                                #
+    # ====================================================================================== #
+
+    def to_prometheus(self) -> str:
+        """
+        summary in the Prometheus text format
+        """
+        summary = self.get_summary()
+        lines = []
+
+        def add(name, metric_type, help_text, samples):
+            lines.append("# HELP discourse_crawl_" + name + " " + help_text)
+            lines.append("# TYPE discourse_crawl_" + name + " " + metric_type)
+            for labels, value in samples:
+                lines.append("discourse_crawl_" + name + labels + " " + repr(float(value)))
+
+        add("requests_total", "counter", "Number of requests.", [("", summary['requests'])])
+        add("failed_requests_total", "counter", "Number of failed requests.", [("", summary['failed'])])
+        add("retries_total", "counter", "Number of earlier failed attempts of the requested pages.", [("", summary['retries'])])
+        add("bytes_total", "counter", "Size of the downloaded pages in bytes.", [("", summary['bytes'])])
+        add("scrolls_total", "counter", "Number of scrolls in the browser.", [("", summary['scrolls'])])
+        add("elapsed_seconds", "gauge", "Time since the start of the crawl.", [("", summary['elapsed'])])
+        add("requests_per_second", "gauge", "Successful requests per second.", [("", summary['requests_per_second'])])
+        add("bytes_per_second", "gauge", "Downloaded bytes per second.", [("", summary['bytes_per_second'])])
+        for key in ['fetch_time', 'scroll_time']:
+            add(key + "_seconds", "summary", key.replace("_", " ").capitalize() + " of the successful requests, quantiles of the recent requests.",
+                [('{quantile="' + str(percentile / 100) + '"}', value) for percentile, value in summary[key].items()]
+                + [("_sum", summary[key + "_sum"]), ("_count", summary['successful'])])
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, filepath: str):
+        """
+        write the summary to a text file, the file is replaced at once so a reader never sees a partial file
+        """
+        temporary_filepath = filepath + ".tmp"
+        with open(temporary_filepath, 'w') as metrics_file:
+            metrics_file.write(self.to_prometheus())
+        os.replace(temporary_filepath, filepath)
+
+    def start_export(self, filepath: str, interval=10):
+        """
+        write the summary to a text file every interval seconds until stop_export() is called
+        """
+        self.stop_export()
+        self.export_stop.clear()
+
+        def export():
+            while not self.export_stop.wait(interval):
+                self.write_prometheus(filepath)
+
+        self.export_thread = threading.Thread(target=export, daemon=True)
+        self.export_thread.start()
+
+    def stop_export(self):
+        if self.export_thread is None: return
+        self.export_stop.set()
+        self.export_thread.join()
+        self.export_thread = None
@@ -1,8 +1,22 @@
+from python_script.data.discourse_columnar_store import DiscourseColumnarStore
+from python_script.data.discourse_json_writer import DiscourseJsonWriter
+from python_script.data.discourse_dataset_cache import DiscourseDatasetCache
+from python_script.data.discourse_post_table import DiscoursePostTable
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import json
 import os
 from pathlib import Path
 import sys
-import io
+
+# fast json decoders, the json module is used if neither is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
 
 class DiscourseDataLoader():
     """
@@ -13,17 +27,25 @@ class DiscourseDataLoader():
     post_histories = []
 
 
-    def __init__(self, dataset_folder=os.path.join("datasets","Discourse","json_files")):
+    def __init__(self, dataset_folder=os.path.join("datasets","Discourse","json_files"), workers=1, use_processes=False, use_cache=True):
         """
         Set up the data loader
         
         Input:
         :param dataset_folder: string, the location of the dataset
+        :param workers: int, number of threads or processes that read the json files at the same time,
+                        with more than one worker the files are decoded with orjson or msgspec if one of them is installed
+        :param use_processes: boolean, should the workers be processes instead of threads,
+                              processes also decode in parallel, threads only read in parallel
+        :param use_cache: boolean, should the dataset file be loaded from its binary cache, see DiscourseDatasetCache
         """
         self.dataset_folder = dataset_folder
+        self.workers = max(1, workers)
+        self.use_processes = use_processes
+        self.cache = DiscourseDatasetCache(os.path.join(dataset_folder, "dataset_cache")) if use_cache else None
 
 
-    def __call__(self, profiles_json_list=None, post_histories_json_list=None, overwrite=False) -> list:
+    def __call__(self, profiles_json_list=None, post_histories_json_list=None, overwrite=False) -> list or DiscoursePostTable:
         """
         Loads the data from json files into memory
         
@@ -38,10 +60,13 @@ class DiscourseDataLoader():
             # get data directly from the dataset file
             filename = os.path.join(self.dataset_folder, "dataset.json")
             if Path(filename).is_file():
-                with open(filename) as datasetFile:
-                    posts = json.load(datasetFile)
-                    datasetFile.close()
-                    return posts
+                # the cache is only mapped, the posts are read when they are accessed
+                if self.cache is not None and self.cache.is_current(filename):
+                    return self.cache.open()
+                posts = self.load_json_file(filename)
+                if self.cache is not None:
+                    self.cache.write(posts, filename)
+                return posts
 
         # overwrite protection
         if overwrite:
@@ -54,6 +79,12 @@ class DiscourseDataLoader():
         # sorting both lists
         post_histories_json_list = sorted(post_histories_json_list)
         profiles_json_list = sorted(profiles_json_list)
+
+        if self.workers > 1:
+            # read the users with a pool of workers and write the posts directly to the dataset
+            posts = self._load_users(profiles_json_list, post_histories_json_list)
+            self._write_dataset(posts, overwrite=overwrite)
+            return posts
         
         # loading the profile files
         for profile_path in profiles_json_list:
@@ -71,35 +102,106 @@ class DiscourseDataLoader():
 
             self.post_histories.append(post_history)
 
+        return self.make_dataset(self.profiles, self.post_histories, overwrite=overwrite)
+
+    def load_columnar(self, columnar_folder=None, overwrite=False) -> list:
+        """
+        Loads the data from the columnar store of the converter, each column is read with one memory map
+        instead of one file open per user
+
+        Input:
+        :param columnar_folder: string, location of the columnar store, the "columnar" folder of the dataset if None
+        :param overwrite: boolean, should the dataset file be overwritten
+        """
+        if columnar_folder is None:
+            columnar_folder = os.path.join(self.dataset_folder, "columnar")
+
+        profiles = []
+        post_histories = []
+        for profile, post_history in DiscourseColumnarStore(columnar_folder).iter_users():
+            profiles.append(profile)
+            post_histories.append(post_history)
+
+        return self.make_dataset(profiles, post_histories, overwrite=overwrite)
+
+    def make_dataset(self, profiles: list, post_histories: list, overwrite=False) -> DiscoursePostTable:
+        """
+        Combines the profiles and the post histories into a table of posts and saves them to the dataset.json file,
+        the profile of a user is stored once in the table and written into each of its posts in the file
+
+        Input:
+        :param profiles: list of profile dicts
+        :param post_histories: list of lists of post dicts, in the same order as the profiles
+        :param overwrite: boolean, should the dataset file be overwritten
+        """
         # write all profile data into each post datapoint for that username
-        posts = self._combine_profiles_and_post_histories(self.profiles, self.post_histories)
+        posts = self._combine_profiles_and_post_histories(profiles, post_histories)
 
-        self._write_data_to_json_file(os.path.join(self.dataset_folder, "dataset.json"), posts, overwrite=overwrite)
+        self._write_dataset(posts, overwrite=overwrite)
 
         return posts
 
+    def _write_dataset(self, posts: DiscoursePostTable, overwrite: bool):
+        """
+        Writes the posts to the dataset.json file and its cache
+        """
+        filename = os.path.join(self.dataset_folder, "dataset.json")
+        written = overwrite or not Path(filename).is_file()
+        self._write_data_to_json_file(filename, posts.iter_dicts(), overwrite=overwrite)
 
-    def _combine_profiles_and_post_histories(self, profiles: list, post_histories: list) -> list:
-        # set all the information about the poster/profile in each dict of each post of that poster / profile
-        
-        assert len(profiles) == len(post_histories)
-        all_posts = []
-        for profile, post_history in zip(profiles, post_histories):
-            
-            # check if post history is empty
-            if len(post_history) == 0:
-                profile.update({'empty': True})
-                all_posts.append(profile)
-            if len(post_history) > 0:
-                profile.update({'empty': False})
-
-            
-            for post in post_history:
-                assert(post['username'] == profile['username'])
-                post.update(profile)
-                all_posts.append(post)
-
-        return all_posts
+        # the cache follows the file, an existing file that is not overwritten keeps its cache
+        if written and self.cache is not None:
+            self.cache.write(posts.iter_dicts(), filename)
+
+
+    def _combine_profiles_and_post_histories(self, profiles: list, post_histories: list) -> DiscoursePostTable:
+        # the posts get the id of their poster / profile in the user table instead of a copy of the profile
+        return DiscoursePostTable.from_users(profiles, post_histories)
+
+    # ====================================================================================== #
+    # PARALLEL LOADING:                                                                      #
+    # ====================================================================================== #
+
+    def _load_users(self, profiles_json_list: list, post_histories_json_list: list) -> DiscoursePostTable:
+        """
+        Reads the profile and post history files with a pool of workers, in chunks of users,
+        every chunk is added to the table of posts as soon as it is read, in the order of the files
+
+        Input:
+        :param profiles_json_list: list of strings, sorted locations of the profile json files
+        :param post_histories_json_list: list of strings, sorted locations of the post history json files, in the same order
+        """
+        assert len(profiles_json_list) == len(post_histories_json_list)
+        users = list(zip(profiles_json_list, post_histories_json_list))
+        chunksize = max(1, min(500, len(users) // (self.workers * 4)))
+        chunks = [users[position:position + chunksize] for position in range(0, len(users), chunksize)]
+
+        executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        posts = DiscoursePostTable([], [], [])
+        with executor_class(max_workers=self.workers) as executor:
+            for chunk_profiles, chunk_post_histories in executor.map(self._load_chunk, chunks):
+                posts.add_users(chunk_profiles, chunk_post_histories)
+        return posts
+
+    @staticmethod
+    def _load_chunk(users: list) -> tuple:
+        """
+        Reads a chunk of users and returns their profiles and their post histories
+        """
+        profiles = [DiscourseDataLoader.load_json_file(profile_path) for profile_path, _ in users]
+        post_histories = [DiscourseDataLoader.load_json_file(post_history_path) for _, post_history_path in users]
+        return profiles, post_histories
+
+    @staticmethod
+    def load_json_file(filename: str):
+        """
+        Reads a json file with the fastest installed decoder: orjson, msgspec or the json module
+        """
+        with open(filename, 'rb') as json_file:
+            data = json_file.read()
+        if orjson is not None: return orjson.loads(data)
+        if msgspec is not None: return msgspec.json.decode(data)
+        return json.loads(data)
 
     # ====================================================================================== #
     # JSON HANDLER:                                                                          #
@@ -108,30 +210,14 @@ class DiscourseDataLoader():
     @staticmethod
     def _write_data_to_json_file(filename: str, data, overwrite: bool):
         """
-        Writes a json file to disk.
+        Writes a json file to disk, see DiscourseJsonWriter.
 
         Input:
         :param filename: string, path to file
         :param data: list, dict, ... , data that should be written to disk
         :param overwrite: boolean, should the file be overwritten if it already exists
         """
-        # convert data to json
-        json_string = json.dumps(data)
-
-        if Path(filename).is_file() and not overwrite:
-            # html file already exists, dont overwrite
-            pass
-        elif not Path(filename).is_file():
-            # write to file
-            open(filename, 'x') # create file
-            with io.open(filename, 'w') as outfile:
-                outfile.write(json_string)
-                outfile.close()            
-        elif Path(filename).is_file() and overwrite:
-            # html file should be overwritten
-            with io.open(filename, 'w') as outfile:
-                outfile.write(json_string)
-                outfile.close()
+        DiscourseJsonWriter.write(filename, data, overwrite)
 
 
     # ====================================================================================== #
@@ -2,6 +2,11 @@ from seaborn.distributions import distplot
 from python_script.data.discourse_downloader import DiscourseDownloader
 from python_script.data.discourse_converter import DiscourseConverter
 from python_script.data.discourse_data_loader import DiscourseDataLoader
+from python_script.data.discourse_pipeline import DiscoursePipeline
+from python_script.data.discourse_text_store import DiscourseTextStore
+from python_script.data.discourse_dataset_cache import DiscourseCachedPosts
+from python_script.data.discourse_post_table import DiscoursePostTable, DiscoursePostView
+from python_script.data.discourse_columnar_posts import DiscourseColumnarPosts
 import os
 import io
 import sys
@@ -18,8 +23,12 @@ class DiscourseDataset():
     """
     Discourse dataset class
     Defines a dataset that can be filtered and plotted 
+    The posts of a filtered dataset are a view of the posts of the dataset it is filtered from, see materialize()
     """
 
+    # storage of the posts: a DiscoursePostTable or the NumPy columns of DiscourseColumnarPosts
+    engines = ["table", "columnar"]
+
     # ====================================================================================== #
     # USER INTERACTION:                                                                      #
     # ====================================================================================== #
@@ -31,30 +40,66 @@ class DiscourseDataset():
                  supress_output=True,
                  overwrite_html=False,
                  overwrite_json=False,
-                 sleep_time=1
+                 sleep_time=1,
+                 workers=1,
+                 backend="browser",
+                 page_store=None,
+                 streaming=False,
+                 conversion_workers=1,
+                 parser="html.parser",
+                 full_text=False,
+                 text_store=None,
+                 engine="table"
                  ):
         """
         Parameters:
-        :param posts: list, post dictionaries
+        :param posts: list, post dictionaries, the profiles of the posts are stored once in a DiscoursePostTable
         :param website_url: string, the base url of the discourse website
         :param dataset_folder: string, the location of the dataset
         :param supress_output: bool, if the output should be supressed
         :param overwrite_html: bool, if the html files should be overwritten
         :param overwrite_json: bool, if the json files should be overwritten
         :param sleep_time: int, time in seconds that the web crawler should wait for the page to load
+        :param workers: int, number of browser sessions that download at the same time and of the threads that read the json files
+        :param backend: string, "browser" downloads the rendered html pages, "api" downloads the json endpoints
+        :param page_store: page store for the downloaded pages, e.g. a PackedPageStore, defaults to one file per page
+        :param streaming: bool, if the pages should be converted while the download goes on
+        :param conversion_workers: int, number of processes that convert pages at the same time
+        :param parser: string, parser of the converter, "html.parser", "lxml", "selectolax" or "lxml-iterparse"
+        :param full_text: bool, if the topic pages of the posts should be downloaded for the full texts of the posts, see get_full_text()
+        :param text_store: DiscourseTextStore, store with the full texts of the posts, made from the topic pages if full_text is set
+        :param engine: string, storage of the posts, "table" or "columnar" for NumPy columns with vectorized filters
         """
+        if engine not in self.engines:
+            raise ValueError("invalid engine: '%s'" % engine)
 
         self.website_url = website_url
         self.dataset_folder = dataset_folder
+        self.engine = engine
 
         # initialize with downloader
         if posts is None:
             # download html files and json files and make posts dataset
-            posts = self._make_dataset(website_url, dataset_folder=dataset_folder, supress_output=supress_output, overwrite_html=overwrite_html, overwrite_json=overwrite_json, sleep_time=sleep_time) 
+            posts = self._make_dataset(website_url, dataset_folder=dataset_folder, supress_output=supress_output, overwrite_html=overwrite_html, overwrite_json=overwrite_json, sleep_time=sleep_time, workers=workers, backend=backend, page_store=page_store, streaming=streaming, conversion_workers=conversion_workers, parser=parser) 
         
         # sort posts by post times
-        sorted_posts = sorted(posts, key=lambda p: p.get('post_timestamp', sys.maxsize))
-        self.posts = sorted_posts
+        if engine == "columnar":
+            self.posts = DiscourseColumnarPosts.from_posts(posts).sorted_by_post_timestamp()
+        elif isinstance(posts, DiscourseCachedPosts):
+            # the cache has the order of the post times, no post is read
+            self.posts = posts.sorted_by_post_timestamp()
+        else:
+            # the posts are a view of a shared table, changed posts are copied in the view
+            if isinstance(posts, DiscoursePostTable):
+                posts = DiscoursePostView(posts)
+            elif not isinstance(posts, DiscoursePostView):
+                posts = DiscoursePostView(DiscoursePostTable.from_posts(posts))
+            self.posts = posts.sorted_by_post_timestamp()
+
+        # full texts of the posts
+        if full_text and text_store is None:
+            text_store = self._make_text_store(website_url, self.posts, dataset_folder=dataset_folder, supress_output=supress_output, overwrite_html=overwrite_html, overwrite_json=overwrite_json, workers=workers, backend=backend, page_store=page_store)
+        self.text_store = text_store
 
     def __call__(self, 
                username=None,
@@ -93,7 +138,7 @@ class DiscourseDataset():
         """
 
         posts = self._filter_posts(username, full_name, join_before, join_after, last_post_before, last_post_after, member_status, topic, topic_link, post_before, post_after, text, category, empty)
-        return DiscourseDataset(self.website_url, posts=posts)
+        return DiscourseDataset(self.website_url, posts=posts, text_store=self.text_store, engine=self.engine)
 
     def search(self, *strings):
         """
@@ -103,14 +148,49 @@ class DiscourseDataset():
         :param args: str or list, looking for this string in either text or topic
         """
 
-        posts = copy.deepcopy(self.posts) # returns new dataset, so copy of posts is required
-        
+        if isinstance(self.posts, DiscourseColumnarPosts):
+            # searched in the columns
+            return DiscourseDataset(self.website_url, posts=self.posts.search(*strings), text_store=self.text_store, engine=self.engine)
+
         strings = [string.lower() for string in strings] # ignore case(upper/lower)
-        posts = [post for post in posts if 'text' in post and 'topic' in post and post['text'] is not None and post['topic'] is not None ]
-        posts = [post for post in posts if any([string in post['text'].lower() or string in post['topic'].lower() or string in post['username'].lower()] for string in strings)]
 
-        return DiscourseDataset(self.website_url, posts=posts)
+        # the fields are read from the rows, no post is made
+        rows = []
+        for row in range(len(self.posts)):
+            text = self.posts.get_value(row, 'text')
+            topic = self.posts.get_value(row, 'topic')
+            if text is None or topic is None: continue
+            username = self.posts.get_value(row, 'username')
+            if any(string in text.lower() or string in topic.lower() or string in username.lower() for string in strings):
+                rows.append(row)
+
+        # returns new dataset with a view of the found posts
+        return DiscourseDataset(self.website_url, posts=self.posts.select(rows), text_store=self.text_store, engine=self.engine)
+
     
+    def get_full_text(self, post: dict) -> str:
+        """
+        Get the full text of a post from the topic page, the dataset needs the full texts (full_text=True).
+        The texts are read from the text store when they are needed, they are not kept with the posts
+
+        Parameters:
+        :param post: dict, post of the dataset
+        """
+        if self.text_store is None:
+            raise ValueError("the dataset has no full texts, make it with full_text=True")
+        if post.get('topic_link') is None: return None
+
+        topic_id = DiscourseConverter.get_topic_id_from_link(post['topic_link'])
+        if topic_id is None: return None
+        return self.text_store.get_text(topic_id, DiscourseConverter.get_post_number_from_link(post['topic_link']))
+
+    def materialize(self):
+        """
+        Get dataset with copies of the posts. The posts of a filtered dataset are a view of the posts it is filtered from,
+        which stay in memory as long as the view exists, the copies do not need them.
+        """
+        return DiscourseDataset(self.website_url, posts=[copy.deepcopy(post) for post in self.posts], text_store=self.text_store, engine=self.engine)
+
     def display(self):
         display(HTML(self._create_posts_html()))
 
@@ -156,7 +236,13 @@ class DiscourseDataset():
                  overwrite_html=False,
                  overwrite_json=False,
                  overwrite_dataset=False,
-                 sleep_time=1
+                 sleep_time=1,
+                 workers=1,
+                 backend="browser",
+                 page_store=None,
+                 streaming=False,
+                 conversion_workers=1,
+                 parser="html.parser"
                  ) -> list:
         
         # load data directly from dataset file
@@ -167,67 +253,74 @@ class DiscourseDataset():
             if directly_loaded_posts is not None: return directly_loaded_posts
 
 
-        downloader = DiscourseDownloader(website_url, dataset_folder=os.path.join(dataset_folder, "html_files"))
+        downloader = DiscourseDownloader(website_url, dataset_folder=os.path.join(dataset_folder, "html_files"), workers=workers, backend=backend, page_store=page_store)
+
+        if streaming:
+            # convert every user as soon as it is downloaded
+            converter = DiscourseConverter(website_url, dataset_folder=os.path.join(dataset_folder,"json_files"), page_store=page_store, parser=parser)
+            dataLoader = DiscourseDataLoader(dataset_folder=os.path.join(dataset_folder,"json_files"))
+            pipeline = DiscoursePipeline(downloader, converter, dataLoader, conversion_workers=conversion_workers)
+            return pipeline(sleep_time, overwrite_html=overwrite_html, overwrite_json=overwrite_json, overwrite_dataset=overwrite_dataset, supress_output=supress_output)
+
         _, profiles_html, post_histories_html = downloader(sleep_time=sleep_time, overwrite=overwrite_html, supress_output = supress_output)
         
-        converter = DiscourseConverter(website_url, dataset_folder=os.path.join(dataset_folder,"json_files"))
+        converter = DiscourseConverter(website_url, dataset_folder=os.path.join(dataset_folder,"json_files"), page_store=page_store, workers=conversion_workers, parser=parser)
         profiles_json, post_histories_json = converter(profiles_html, post_histories_html, overwrite=overwrite_json, supress_output=supress_output)
             
-        dataLoader = DiscourseDataLoader(dataset_folder=os.path.join(dataset_folder,"json_files"))
+        dataLoader = DiscourseDataLoader(dataset_folder=os.path.join(dataset_folder,"json_files"), workers=workers)
         indirectly_loaded_posts = dataLoader(profiles_json, post_histories_json, overwrite=overwrite_dataset)
 
         return indirectly_loaded_posts
 
+    @staticmethod
+    def _make_text_store(website_url: str,
+                         posts: list,
+                         dataset_folder=os.path.join("datasets","Discourse"),
+                         supress_output=True,
+                         overwrite_html=False,
+                         overwrite_json=False,
+                         workers=1,
+                         backend="browser",
+                         page_store=None
+                         ) -> DiscourseTextStore:
+        # every topic of the posts is downloaded and parsed once
+        downloader = DiscourseDownloader(website_url, dataset_folder=os.path.join(dataset_folder, "html_files"), workers=workers, backend=backend, page_store=page_store)
+        topic_filepaths = downloader.download_topics([post['topic_link'] for post in posts if post.get('topic_link') is not None], overwrite=overwrite_html, supress_output=supress_output)
+
+        converter = DiscourseConverter(website_url, dataset_folder=os.path.join(dataset_folder,"json_files"), page_store=page_store)
+        if not os.path.isdir(converter.dataset_folder):
+            os.makedirs(converter.dataset_folder)
+        text_store = DiscourseTextStore(os.path.join(dataset_folder, "json_files", "texts.sqlite"))
+        converter.convert_topics(topic_filepaths, text_store, overwrite=overwrite_json, supress_output=supress_output)
+        return text_store
+
     # ====================================================================================== #
     # FILTER POSTS:                                                                          #
     # ====================================================================================== #
 
-    def _search_for_post(self, search_dict, posts):
+    def _search_for_rows(self, search_dict: dict) -> list:
         """
-        recursively searches for posts with the specified properties and returns new list
+        positions of the posts with the specified properties: the field is the value or in the value,
+        timestamps are before or after the value. The fields are read with get_value(), no post is made
         """
-        def timestamp_search(search_key, search_dict, posts):
-            if search_key[0:4] == 'post': post_key = 'post_timestamp'
-            if search_key[0:4] == 'join': post_key = 'join_timestamp'
-            if search_key[0:9] == 'last_post': post_key = 'last_post_timestamp'
-            if search_key[len(search_key) - 6:] == 'before': before_after = 'before'
-            if search_key[len(search_key) - 5:] == 'after': before_after = 'after'
-
-            # remove dicts that dont have the post key
-            posts = [post for post in posts if post_key in post]
-
-            # searches for timestamps before or after at the specified key
-            if before_after == 'before':
-                new_posts = [post for post in posts if post[post_key] < search_dict[search_key]]
-            if before_after == 'after':
-                new_posts = [post for post in posts if post[post_key] > search_dict[search_key]]
-            
-            # search for dict with the remaining search keys and values
-            search_dict.pop(search_key)
-            return self._search_for_post(search_dict, new_posts)
-
-        time_search_keys = ['post_before', 'post_after', 'join_before', 'join_afer', 'last_post_before', 'last_post_after']
-        
-
-        if search_dict == {}: return posts
-
-        if all((time_key not in search_dict) for time_key in time_search_keys):
-            # do normal dict search, recursion terminated
-            
-            # check if the keys are in the posts
-            filtered_posts = [post for post in posts if all((target_key in post) for target_key, _ in search_dict.items())] 
-            # filter the posts, check if the post has the target value or if the post is in the list of target values            
-            filtered_posts = [post for post in filtered_posts if all(((post[target_key] == target_value) or (post[target_key] in target_value)) for target_key, target_value in search_dict.items())]
-                    
-            return filtered_posts
-        
-        else:
-            # do recursive search until all timestamp searches have been resolved
-            for key in time_search_keys:
-                # go through all the possible timestamp keys
-                if key in search_dict:
-                    # if the key is in the search dict, do the timestamp search
-                    return timestamp_search(key, search_dict, posts)
+        time_search_keys = {'post_before': 'post_timestamp', 'post_after': 'post_timestamp',
+                            'join_before': 'join_timestamp', 'join_after': 'join_timestamp',
+                            'last_post_before': 'last_post_timestamp', 'last_post_after': 'last_post_timestamp'}
+        missing = object()
+
+        def matches(row, search_key, target_value):
+            if search_key in time_search_keys:
+                value = self.posts.get_value(row, time_search_keys[search_key], missing)
+                if value is missing: return False
+                return value < target_value if search_key.endswith('before') else value > target_value
+            # the post has the target value or is in the list of target values
+            value = self.posts.get_value(row, search_key, missing)
+            return value is not missing and (value == target_value or value in target_value)
+
+        rows = range(len(self.posts))
+        for search_key, target_value in search_dict.items():
+            rows = [row for row in rows if matches(row, search_key, target_value)]
+        return list(rows)
 
     def _filter_posts(self, username, full_name, join_before, join_after, last_post_before, last_post_after, member_status, topic, topic_link, post_before, post_after, text, category, empty):
         """
@@ -291,12 +384,12 @@ class DiscourseDataset():
             if argument is not None:
                 dict_to_search_for[key] = self.datetime_to_timestamp(argument)        
 
-        # filter posts
-        posts = copy.deepcopy(self.posts) # returns new list, so copy of posts is required
-        filtered_posts = self._search_for_post(dict_to_search_for, posts)
+        # filter the columns
+        if isinstance(self.posts, DiscourseColumnarPosts):
+            return self.posts.filter(dict_to_search_for)
 
-        # return dataset of filtered posts
-        return filtered_posts
+        # return view of the filtered rows, no post is made or copied
+        return self.posts.select(self._search_for_rows(dict_to_search_for))
     
     def __iter__(self) -> iter:
         if self.posts is not None:
@@ -317,6 +410,7 @@ class DiscourseDataset():
 
         # if key is string, return unique list with key property from the posts
         if isinstance(key, str): 
+            if isinstance(self.posts, DiscourseColumnarPosts): return self.posts.get_values(key)
             return list(set([post[key] for post in self.posts if key in post]))
         
     def __eq__(self, obj) -> bool:
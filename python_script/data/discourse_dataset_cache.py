@@ -0,0 +1,274 @@
+from python_script.data.discourse_columnar_store import DiscourseColumnarStore
+from python_script.data.discourse_post_table import DiscoursePostOverlay
+from pathlib import Path
+import numpy as np
+import json
+import os
+import sys
+
+class DiscourseDatasetCache():
+    """
+    Discourse dataset cache class
+    Binary cache of the dataset.json file, the posts are stored in a columnar store (see DiscourseColumnarStore)
+    with the profile of every user stored once, and the rows of the dataset in the order of the file and of the post times.
+    Opening the cache only maps the files, the posts are read from the columns when they are accessed.
+    The cache belongs to one version of the dataset file, it is not current when the file changes.
+    """
+
+    cache_version = 1
+
+    profile_keys = [column for column, _ in DiscourseColumnarStore.schemas['profiles'] if column != 'post_count']
+    post_keys = [column for column, _ in DiscourseColumnarStore.schemas['posts']]
+    column_types = dict(DiscourseColumnarStore.schemas['profiles'] + DiscourseColumnarStore.schemas['posts'])
+
+    def __init__(self, folder: str):
+        """
+        Set up the cache
+
+        Input:
+        :param folder: string, location of the cache files
+        """
+        self.folder = folder
+        self.store = DiscourseColumnarStore(os.path.join(folder, "columns"))
+        self.rows_filepath = os.path.join(folder, "dataset.rows")
+        self.sorted_rows_filepath = os.path.join(folder, "dataset.sorted_rows")
+        self.metadata_filepath = os.path.join(folder, "cache.json")
+
+    @staticmethod
+    def fingerprint(filename: str) -> str:
+        """
+        size and modification time of the source file, changes when the file is written again
+        """
+        stat = os.stat(filename)
+        return str(stat.st_size) + ":" + str(stat.st_mtime_ns)
+
+    def is_current(self, source_filename: str) -> bool:
+        """
+        Is the cache made from this version of the source file
+
+        Input:
+        :param source_filename: string, path to the dataset.json file
+        """
+        if not Path(self.metadata_filepath).is_file() or not Path(source_filename).is_file():
+            return False
+        with open(self.metadata_filepath) as metadata_file:
+            metadata = json.load(metadata_file)
+        return metadata['cache_version'] == self.cache_version and metadata['source'] == self.fingerprint(source_filename)
+
+    # ====================================================================================== #
+    # WRITE:                                                                                 #
+    # ====================================================================================== #
+
+    def write(self, posts, source_filename: str) -> bool:
+        """
+        Write the cache of the posts of the source file, an existing cache is replaced
+
+        Input:
+        :param posts: iterable of post dicts, the posts of the source file in the order of the file
+        :param source_filename: string, path to the dataset.json file
+
+        Output:
+        boolean, False if the posts can not be stored in the columns, then there is no cache
+        """
+        # the metadata is written last, without it the cache is not current
+        self.clear()
+        os.makedirs(self.folder, exist_ok=True)
+        try:
+            self.store.write(self.iter_users(posts))
+        except ValueError:
+            return False
+
+        profiles = self.store.read_table('profiles')
+        posts_table = self.store.read_table('posts')
+        rows = self._get_rows(np.asarray(profiles['post_count']['values']))
+
+        # rows without post time are at the end, like the sorting of the dataset
+        timestamps = np.where(posts_table['post_timestamp']['valid'], posts_table['post_timestamp']['values'], sys.maxsize)
+        keys = np.full(len(rows), sys.maxsize, dtype=np.int64)
+        if len(timestamps) > 0:
+            keys = np.where(rows >= 0, timestamps[np.maximum(rows, 0)], sys.maxsize)
+        sorted_rows = rows[np.argsort(keys, kind='stable')]
+
+        rows.tofile(self.rows_filepath)
+        sorted_rows.tofile(self.sorted_rows_filepath)
+
+        metadata = {'cache_version': self.cache_version, 'source': self.fingerprint(source_filename), 'rows': len(rows)}
+        with open(self.metadata_filepath + ".tmp", 'w') as metadata_file:
+            json.dump(metadata, metadata_file)
+        os.replace(self.metadata_filepath + ".tmp", self.metadata_filepath)
+        return True
+
+    def clear(self):
+        if Path(self.metadata_filepath).is_file():
+            os.remove(self.metadata_filepath)
+
+    @staticmethod
+    def _get_rows(post_counts: np.ndarray) -> np.ndarray:
+        """
+        rows of the dataset in the order of the users:
+        the post rows of the users, users without posts are one row -(user + 1)
+        """
+        rows_per_user = np.maximum(post_counts, 1)
+        users = np.repeat(np.arange(len(post_counts), dtype=np.int64), rows_per_user)
+        position = np.arange(len(users), dtype=np.int64) - np.repeat(np.cumsum(rows_per_user) - rows_per_user, rows_per_user)
+        first_posts = np.cumsum(post_counts) - post_counts
+        return np.where(post_counts[users] > 0, first_posts[users] + position, -(users + 1)).astype(np.int64)
+
+    @classmethod
+    def iter_users(cls, posts):
+        """
+        Yields the profile and the post history of every user of the posts of a dataset file,
+        the posts of a user follow each other like in the files of the data loader
+
+        Raises ValueError if the posts have other fields than the columns of the store
+        """
+        all_keys = set(cls.profile_keys + cls.post_keys + ['empty'])
+        profile = None
+        post_history = []
+        for post in posts:
+            if not set(post.keys()) <= all_keys:
+                raise ValueError("fields that are no columns: %s" % sorted(set(post.keys()) - all_keys))
+            for key, value in post.items():
+                cls._check_value(key, value)
+            post_profile = {key: post[key] for key in cls.profile_keys if key in post}
+
+            if post.get('empty') is True:
+                # user without posts
+                if profile is not None: yield profile, post_history
+                profile, post_history = None, []
+                yield post_profile, []
+                continue
+
+            if post.get('empty') is not False or not all(key in post for key in cls.post_keys):
+                raise ValueError("post without all post fields: '%s'" % post.get('username'))
+            if profile is None or profile['username'] != post_profile['username']:
+                if profile is not None: yield profile, post_history
+                profile, post_history = post_profile, []
+            elif profile != post_profile:
+                raise ValueError("posts of '%s' with different profiles" % profile['username'])
+            post_history.append({key: post[key] for key in cls.post_keys})
+
+        if profile is not None: yield profile, post_history
+
+    @classmethod
+    def _check_value(cls, key: str, value):
+        # only values that come back the same from the columns
+        if key == 'empty' or value is None: return
+        if cls.column_types[key] == DiscourseColumnarStore.TIMESTAMP:
+            if type(value) is not int: raise ValueError("timestamp is no integer: '%s'" % key)
+        elif type(value) is not str:
+            raise ValueError("value is no string: '%s'" % key)
+
+    # ====================================================================================== #
+    # READ:                                                                                  #
+    # ====================================================================================== #
+
+    def open(self) -> 'DiscourseCachedPosts':
+        """
+        Map the cache, the posts are in the order of the source file
+        """
+        with open(self.metadata_filepath) as metadata_file:
+            number_of_rows = json.load(metadata_file)['rows']
+        return DiscourseCachedPosts(self.store,
+                                    DiscourseColumnarStore._map(self.rows_filepath, np.int64, number_of_rows),
+                                    DiscourseColumnarStore._map(self.sorted_rows_filepath, np.int64, number_of_rows))
+
+
+class DiscourseCachedPosts(DiscoursePostOverlay):
+    """
+    Posts of a dataset cache, a list of posts that reads the posts from the memory mapped columns when they are accessed.
+    The cache is never changed, a changed post is copied on write like in a DiscoursePostView (see DiscoursePostOverlay),
+    with the row of the cache as key. A selection of the posts is an array of rows of the same mapped columns.
+    """
+
+    def __init__(self, store: DiscourseColumnarStore, rows: np.ndarray, sorted_rows=None, changed=None):
+        """
+        Input:
+        :param store: DiscourseColumnarStore, columns of the cache
+        :param rows: array, rows of the posts, see DiscourseDatasetCache._get_rows()
+        :param sorted_rows: array, the same rows sorted by post time, sorted from the timestamp column if None
+        :param changed: dict, the changed posts with the row of the cache as key, the dicts are shared until they are changed
+        """
+        self.store = store
+        self.rows = rows
+        self.sorted_rows = sorted_rows
+        self.changed = {} if changed is None else changed
+        self.owned = set() # rows of the cache with a changed post that only these posts have
+        self._tables = None
+
+    def sorted_by_post_timestamp(self) -> 'DiscourseCachedPosts':
+        """
+        the same posts sorted by post time, posts without post time at the end
+        """
+        if self.sorted_rows is not None and len(self.changed) == 0:
+            return self._with_rows(self.sorted_rows, self.sorted_rows)
+
+        _, posts, _ = self._get_tables()
+        keys = np.full(len(self.rows), sys.maxsize, dtype=np.int64)
+        if len(posts['post_timestamp']['values']) > 0:
+            post_rows = np.maximum(self.rows, 0)
+            has_timestamp = (self.rows >= 0) & posts['post_timestamp']['valid'][post_rows]
+            keys = np.where(has_timestamp, posts['post_timestamp']['values'][post_rows], sys.maxsize)
+
+        # the changed posts are sorted by their own post time
+        for position in np.flatnonzero(np.isin(self.rows, list(self.changed))).tolist():
+            timestamp = self.changed[int(self.rows[position])].get('post_timestamp')
+            keys[position] = timestamp if isinstance(timestamp, int) else sys.maxsize
+
+        sorted_rows = self.rows[np.argsort(keys, kind='stable')]
+        if len(self.changed) == 0: self.sorted_rows = sorted_rows
+        return self._with_rows(sorted_rows, sorted_rows if len(self.changed) == 0 else None)
+
+    def select(self, rows) -> 'DiscourseCachedPosts':
+        """
+        Posts at some of the positions, in the order of the positions
+
+        Input:
+        :param rows: iterable of ints, positions of the posts
+        """
+        return self._with_rows(self.rows[np.asarray(rows if isinstance(rows, np.ndarray) else list(rows), dtype=np.int64)])
+
+    def _with_rows(self, rows: np.ndarray, sorted_rows=None) -> 'DiscourseCachedPosts':
+        # the mapped columns and the changed posts are shared
+        posts = DiscourseCachedPosts(self.store, rows, sorted_rows, self._select_changed(rows))
+        posts._tables = self._tables
+        return posts
+
+    def _get_tables(self) -> tuple:
+        # the columns are mapped when the first post is read
+        if self._tables is None:
+            profiles = self.store.read_table('profiles')
+            self._tables = (profiles, self.store.read_table('posts'), np.cumsum(profiles['post_count']['values']))
+        return self._tables
+
+    def _read_row(self, shared_row: int) -> dict:
+        profiles, posts, post_ends = self._get_tables()
+        if shared_row < 0:
+            profile = self.store.get_row(profiles, 'profiles', -shared_row - 1)
+            profile.pop('post_count')
+            profile['empty'] = True
+            return profile
+
+        post = self.store.get_row(posts, 'posts', shared_row)
+        profile = self.store.get_row(profiles, 'profiles', int(np.searchsorted(post_ends, shared_row, side='right')))
+        profile.pop('post_count')
+        post.update(profile)
+        post['empty'] = False
+        return post
+
+    def _read_value(self, shared_row: int, key: str, default=None):
+        # the same field as in the dict of _read_row(), read from its column only
+        if key == 'empty': return shared_row < 0
+        profiles, posts, post_ends = self._get_tables()
+        profile_row = -shared_row - 1 if shared_row < 0 else int(np.searchsorted(post_ends, shared_row, side='right'))
+        if key in DiscourseDatasetCache.profile_keys:
+            missing = object()
+            value = self.store.get_row_value(profiles, 'profiles', profile_row, key, missing)
+            if value is not missing: return value
+        if shared_row >= 0 and key in DiscourseDatasetCache.post_keys:
+            return self.store.get_row_value(posts, 'posts', shared_row, key, default)
+        return default
+
+    def __deepcopy__(self, memo):
+        # the same mapped posts, changes of the copy are not seen by these posts
+        return self._with_rows(self.rows, self.sorted_rows)
@@ -5,7 +5,15 @@ import io
 import os
 from pathlib import Path
 from bs4 import BeautifulSoup as soup
-from tqdm.notebook import tqdm
+from python_script.data.discourse_api_client import DiscourseApiClient
+from python_script.data.discourse_converter import DiscourseConverter
+from python_script.data.discourse_crawl_journal import DiscourseCrawlJournal
+from python_script.data.discourse_crawl_metrics import DiscourseCrawlMetrics
+from python_script.data.discourse_page_store import DirectoryPageStore
+from tqdm.auto import tqdm
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import queue
+import json
 import shutil
 import sys
 
@@ -15,23 +23,97 @@ class DiscourseDownloader():
     Defines a downloader for user profiles and post histories of a Discourse website
     """
 
-    user_list_html_filepath = None
+    user_list_filepath = None
     user_profile_filepath_list = []
     user_post_history_filepath_list = []
 
-    def __init__(self, website_url: str, dataset_folder=os.path.join("datasets","Discourse","html_files")):
+    backends = ["browser", "api"]
+
+    # failed pages are tried again in the next run until they failed this often
+    max_retries = 3
+
+    # users that are added to the crawl journal at once
+    journal_batch_size = 1000
+
+    # scroll time for the user list, if it has to be downloaded without the call of the downloader
+    user_list_sleep_time = 1
+
+    # polling of the page while scrolling, in seconds
+    poll_interval = 0.1
+    settle_time = 0.3
+    # the running requests are counted by wrapping fetch and XMLHttpRequest once per page,
+    # the resource timings only list the finished requests, they are cleared after every read,
+    # so their number is the number since the last poll and does not stop at the size of the resource timing buffer
+    page_state_script = """
+        if (window.discourseRunningRequests === undefined) {
+            window.discourseRunningRequests = 0;
+            var send = XMLHttpRequest.prototype.send;
+            XMLHttpRequest.prototype.send = function() {
+                window.discourseRunningRequests++;
+                this.addEventListener('loadend', function() { window.discourseRunningRequests--; });
+                return send.apply(this, arguments);
+            };
+            var fetch = window.fetch;
+            if (fetch) window.fetch = function() {
+                window.discourseRunningRequests++;
+                return fetch.apply(this, arguments).finally(function() { window.discourseRunningRequests--; });
+            };
+        }
+        var finished = window.performance.getEntriesByType('resource').length;
+        window.performance.clearResourceTimings();
+        return [document.body.scrollHeight,
+                document.getElementsByClassName('user-stream-item').length,
+                window.discourseRunningRequests,
+                finished,
+                document.getElementsByClassName('spinner').length];
+    """
+    oldest_post_script = """
+        var dates = document.querySelectorAll('.user-stream-item span.relative-date');
+        return dates.length > 0 ? parseInt(dates[dates.length - 1].getAttribute('data-time')) : null;
+    """
+
+    def __init__(self, website_url: str, dataset_folder=os.path.join("datasets","Discourse","html_files"), workers=1, backend="browser", page_store=None, paged_user_list=False, metrics_filepath=None, metrics_interval=10):
         """
         Set up the downloader
 
         Input:
         :param website_url: string, the url of the discourse website
         :param dataset_folder: string, the location of the dataset
+        :param workers: int, number of browser sessions that download user data at the same time
+        :param backend: string, "browser" renders the pages with chrome and saves html files,
+                        "api" requests the json endpoints of the website and saves json files
+        :param page_store: page store for the profiles and post histories, defaults to a DirectoryPageStore
+        :param paged_user_list: boolean, should the user list be requested page by page from the json user directory,
+                                otherwise the browser scrolls through the whole user list (browser backend only),
+                                the api backend always uses the paged user list
+        :param metrics_filepath: string, text file that the crawl metrics are written to in the Prometheus format during the download
+        :param metrics_interval: float, seconds between two updates of the metrics file
         """
+        if backend not in self.backends:
+            raise ValueError("invalid backend: '%s'" % backend)
         
         self.website_url = website_url
         self.dataset_folder = dataset_folder
-
-    def __call__(self, sleep_time: int, overwrite=False, supress_output=False):
+        self.workers = max(1, workers)
+        self.backend = backend
+        self.file_extension = ".html" if backend == "browser" else ".json"
+        self.page_store = page_store if page_store is not None else DirectoryPageStore()
+        self.paged_user_list = paged_user_list or backend == "api"
+        self.driver = None
+        self.driver_pool = None
+        self.api_client = None
+        self.scroll_stats = []
+        self.crawl_state = {}
+        self.crawl_state_filepath = os.path.join(dataset_folder, "crawl_state.json")
+        self.crawl_journal_filepath = os.path.join(dataset_folder, "crawl_journal.sqlite")
+        self.crawl_journal = None
+        self.topic_journal_filepath = os.path.join(dataset_folder, "topic_journal.sqlite")
+        self.on_user_downloaded = None
+        self.metrics = DiscourseCrawlMetrics()
+        self.metrics_filepath = metrics_filepath
+        self.metrics_interval = metrics_interval
+
+    def __call__(self, sleep_time: int, overwrite=False, supress_output=False, incremental=False, on_user_downloaded=None):
         """
         Download the html files for:
         - the user list
@@ -39,9 +121,12 @@ class DiscourseDownloader():
         - post histories
 
         Input:
-        :param sleep_time: float, time that the browser waits for the page to update after scrolling
+        :param sleep_time: float, maximum time that the browser waits for the page to update after scrolling
         :param overwrite: boolean, should list html files be overwritten
         :param supress_output: boolean, should the detailed output print be supressed?
+        :param incremental: boolean, should existing users be updated with their posts since the last download
+        :param on_user_downloaded: function, called with the profile filepath and the post history filepath
+                                   as soon as both files of a user are written, e.g. to convert them while the download goes on
         """
 
         # overwrite protection
@@ -52,19 +137,25 @@ class DiscourseDownloader():
             if not confirm:
                 overwrite = False 
 
+        self.on_user_downloaded = on_user_downloaded
         self._set_up_folders(overwrite)
-        self._start_chrome_browser()
-        self._download_user_list(sleep_time, overwrite, supress_output)
-        self._download_user_data(sleep_time, overwrite, supress_output)
-        self._quit_chrome_browser()
+        if self.backend == "browser":
+            self._start_chrome_browser()
+        else:
+            self._start_api_client()
+        self._download_user_list(sleep_time, overwrite, supress_output, refresh=incremental)
+        self._download_user_data(sleep_time, overwrite, supress_output, incremental)
+        if self.backend == "browser":
+            self._quit_chrome_browser()
+            if not supress_output: print(self.get_scroll_time_summary())
 
-        return self.user_list_html_filepath, self.user_profile_filepath_list, self.user_post_history_filepath_list
+        return self.user_list_filepath, self.user_profile_filepath_list, self.user_post_history_filepath_list
 
     # ====================================================================================== #
     # DOWNLOADERS:                                                                           #
     # ====================================================================================== #
 
-    def _download_user_list(self, sleep_time: int, overwrite=False, supress_output=False):
+    def _download_user_list(self, sleep_time: int, overwrite=False, supress_output=False, refresh=False):
         """
         Download the html file of the user list
         
@@ -72,21 +163,26 @@ class DiscourseDownloader():
         :param sleep_time: float, time that the browser waits for the page to update after scrolling
         :param overwrite: boolean, should the html file be overwritten
         :param supress_output: boolean, should the detailed output print be supressed?
+        :param refresh: boolean, should an existing user list be downloaded again, e.g. for the new users of an incremental download
         """
 
+        if self.paged_user_list:
+            self._download_paged_user_list(overwrite, supress_output, refresh)
+            return
+
         # downloads the user list html
-        self.user_list_html_filepath = os.path.join(self.dataset_folder, "user_list.html")
+        self.user_list_filepath = os.path.join(self.dataset_folder, "user_list.html")
         
         # check if file already exists
-        if Path(self.user_list_html_filepath).is_file() and not overwrite:
+        if Path(self.user_list_filepath).is_file() and not overwrite and not refresh:
             # html file already exists, dont overwrite
             if not supress_output: print("user_data_html already exists, skipping download")
             
         else:
-            if Path(self.user_list_html_filepath).is_file() and overwrite:
+            if Path(self.user_list_filepath).is_file() and overwrite:
                 # html file should be overwritten
                 if not supress_output: print("downloading and overwriting user_data_html")
-            if not Path(self.user_list_html_filepath).is_file():
+            if not Path(self.user_list_filepath).is_file():
                 # html file not found
                 if not supress_output: print("user_data_html not found, downloading...")
 
@@ -94,9 +190,57 @@ class DiscourseDownloader():
             user_list_url = self.website_url + "/u?period=all"
             user_list_html = self._get_html_from_url(user_list_url, sleep_time)
             if user_list_html is not None:
-                self._write_html_to_file(self.user_list_html_filepath, user_list_html, overwrite)
-            
-    def _download_user_data(self, sleep_time: int, overwrite=False, supress_output=False):
+                self._write_html_to_file(self.user_list_filepath, user_list_html, overwrite or refresh)
+
+    def _download_paged_user_list(self, overwrite=False, supress_output=False, refresh=False):
+        """
+        Download the user directory page by page and write the profile links to an index file, one link per line.
+        Every page is saved to the user_list folder and only its links are kept, so the memory does not grow with the number of users.
+        Pages that were saved by an interrupted download are not requested again.
+
+        Input:
+        :param overwrite: boolean, should the pages and the index be overwritten
+        :param supress_output: boolean, should the detailed output print be supressed?
+        :param refresh: boolean, should an existing index be downloaded again, the saved pages are requested again
+        """
+        self.user_list_filepath = os.path.join(self.dataset_folder, "user_links.txt")
+        if Path(self.user_list_filepath).is_file() and not overwrite and not refresh:
+            if not supress_output: print("user links already exist, skipping download")
+            return
+
+        pages_folder = os.path.join(self.dataset_folder, "user_list")
+        if not os.path.isdir(pages_folder):
+            os.makedirs(pages_folder)
+        if self.api_client is None:
+            self._start_api_client()
+
+        # the index is only complete after the last page, until then it is a temporary file
+        temporary_filepath = self.user_list_filepath + ".tmp"
+        number_of_users = 0
+        with io.open(temporary_filepath, 'w', encoding="utf-8") as index_file:
+            page_number = 0
+            while True:
+                page_filepath = os.path.join(pages_folder, "page_" + str(page_number).zfill(5) + ".json")
+                if Path(page_filepath).is_file() and not overwrite and not refresh:
+                    with open(page_filepath, 'rb') as page_file:
+                        page = json.load(page_file)
+                else:
+                    page = self.api_client.get_json("/directory_items.json", {'period': 'all', 'page': page_number})
+                    if page is None:
+                        raise ConnectionError("user directory page " + str(page_number) + " could not be loaded, the download continues from this page next time")
+                    self._write_html_to_file(page_filepath, json.dumps(page), overwrite=True)
+
+                user_links = DiscourseApiClient.get_user_links_from_directory_page(page)
+                if len(user_links) == 0:
+                    break
+                index_file.writelines([user_link + "\n" for user_link in user_links])
+
+                number_of_users = number_of_users + len(user_links)
+                if not supress_output: print("user directory page " + str(page_number) + ": " + str(number_of_users) + " users")
+                page_number = page_number + 1
+        os.replace(temporary_filepath, self.user_list_filepath)
+
+    def _download_user_data(self, sleep_time: int, overwrite=False, supress_output=False, incremental=False):
         """
         Download the html files for profiles and post histories
 
@@ -104,49 +248,323 @@ class DiscourseDownloader():
         :param sleep_time: float, time that the browser waits for the page to update after scrolling
         :param overwrite: boolean, should the html files be overwritten
         :param supress_output: boolean, should the detailed output print be supressed?
+        :param incremental: boolean, should existing users be updated with their posts since the last download
         """
 
-        # get the links to the profiles first
-        if self.user_list_html_filepath is None:
-            self._download_user_list()
-        
-        # open the html file of the user list and get the profile links
-        with open(self.user_list_html_filepath, 'rb') as user_list_html:
-            user_links = self.get_user_links(user_list_html)
+        # newest post of every user from the last download
+        self._load_crawl_state()
 
-        # go through each profile link and download the profile html and the post history html        
-        for index, profile_link in enumerate(tqdm(user_links, desc="downloading user data")):
-            
-            # get user name and file names
-            username = self.get_user_name_from_profile_link(profile_link)
-            profile_filepath = os.path.join(self.dataset_folder, "profiles", username + ".html")
-            post_history_filepath = os.path.join(self.dataset_folder, "post_histories", username + ".html")
-
-            # save filepaths
-            self.user_profile_filepath_list.append(profile_filepath)
-            self.user_post_history_filepath_list.append(post_history_filepath)
-
-            # print progress update
-            if not supress_output: print("( " + str(index+1).zfill(4) + " / " + str(len(user_links)) + " ): " + username )
-
-            # check if files exist already
-            if Path(profile_filepath).is_file() and Path(post_history_filepath).is_file() and not overwrite:
-                # dont overwrite:
-                if not supress_output: print("files already exist, skipping download")
-            else:    
-                # profile:
-                if not supress_output: print("downloading profile html...")
-                profile_html = self._get_html_from_url(self.website_url + profile_link)
-                if profile_html is not None: # check for connection
-                    self._write_html_to_file(profile_filepath, profile_html, overwrite)
-
-                # post history:
-                post_history_link = profile_link + "/activity"
-                if not supress_output: print("downloading post history html...")
-                post_history_html = self._get_html_from_url(self.website_url + post_history_link, sleep_time)
-                if post_history_html is not None: # check for connection
-                    self._write_html_to_file(post_history_filepath, post_history_html, overwrite)
+        # state of every page of the crawl
+        self.crawl_journal = DiscourseCrawlJournal(self.crawl_journal_filepath)
+        if self.metrics_filepath is not None:
+            self.metrics.start_export(self.metrics_filepath, self.metrics_interval)
+        try:
+            user_links = self._get_user_links_to_download(overwrite, incremental)
+
+            # save filepaths in the order of the user list
+            self.user_profile_filepath_list.extend(self.crawl_journal.get_filepaths(DiscourseCrawlJournal.PROFILE))
+            self.user_post_history_filepath_list.extend(self.crawl_journal.get_filepaths(DiscourseCrawlJournal.POST_HISTORY))
+
+            if self.workers == 1:
+                # go through each profile link and download the profile html and the post history html
+                progress_bar = tqdm(user_links, desc="downloading user data")
+                for index, profile_link in enumerate(progress_bar):
+                    self._download_single_user(profile_link, index, len(user_links), sleep_time, overwrite, supress_output, incremental=incremental)
+                    progress_bar.set_postfix(self.metrics.get_postfix())
+                return
+
+            # download with a pool of browser sessions, each worker takes a free browser from the pool,
+            # the api client is shared by all workers
+            download = self._download_single_user_with_pooled_driver if self.backend == "browser" else self._download_single_user
+            if self.backend == "browser": self._start_browser_pool()
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    futures = [executor.submit(download, profile_link, index, len(user_links), sleep_time, overwrite, supress_output, incremental=incremental)
+                               for index, profile_link in enumerate(user_links)]
+                    progress_bar = tqdm(as_completed(futures), total=len(futures), desc="downloading user data")
+                    for future in progress_bar:
+                        future.result()
+                        progress_bar.set_postfix(self.metrics.get_postfix())
+            finally:
+                if self.backend == "browser": self._quit_browser_pool()
+        finally:
+            self._save_crawl_state()
+            if incremental or overwrite:
+                # the replaced pages of a packed store are reclaimed once they take up half of the pack
+                self.page_store.compact(threshold=0.5)
+            if self.metrics_filepath is not None:
+                self.metrics.stop_export()
+                self.metrics.write_prometheus(self.metrics_filepath)
+            if not supress_output: print(self.crawl_journal.get_summary())
+            if not supress_output: print(self.metrics.get_summary())
+            self.crawl_journal.close()
+
+    def _get_user_links_to_download(self, overwrite=False, incremental=False) -> list:
+        """
+        get the profile links of the users that still have to be downloaded.
+        A new crawl adds all users of the user list to the journal,
+        an interrupted crawl continues with the pending users of the journal without reading the user list again.
+        An incremental or overwriting crawl adds the new users of the downloaded user list and visits every user again.
+        """
+        new_crawl = self.crawl_journal.is_empty()
+        if new_crawl or overwrite or incremental:
+            # get the links to the profiles first
+            if self.user_list_filepath is None:
+                self._download_user_list(self.user_list_sleep_time, overwrite, refresh=incremental)
+
+            # add the users to the journal in batches, the users of an earlier crawl keep their state
+            pages = []
+            for profile_link in self._iter_user_links(self.user_list_filepath):
+                username = self.get_user_name_from_profile_link(profile_link)
+                pages.append((self.website_url + profile_link, profile_link, DiscourseCrawlJournal.PROFILE,
+                              os.path.join(self.dataset_folder, "profiles", username + self.file_extension)))
+                pages.append((self.website_url + profile_link + "/activity", profile_link, DiscourseCrawlJournal.POST_HISTORY,
+                              os.path.join(self.dataset_folder, "post_histories", username + self.file_extension)))
+                if len(pages) >= self.journal_batch_size:
+                    self.crawl_journal.add_pages(pages)
+                    pages = []
+            self.crawl_journal.add_pages(pages)
+
+        if not new_crawl and (overwrite or incremental):
+            # every user is visited again
+            self.crawl_journal.mark_all_pending()
+
+        return self.crawl_journal.get_pending_profile_links(self.max_retries)
+
+    def _download_single_user_with_pooled_driver(self, profile_link: str, index: int, number_of_users: int, sleep_time: int, overwrite=False, supress_output=False, incremental=False):
+        """
+        Take a browser from the pool, download the data of one user and return the browser to the pool
+        """
+        driver = self.driver_pool.get()
+        try:
+            self._download_single_user(profile_link, index, number_of_users, sleep_time, overwrite, supress_output, driver=driver, incremental=incremental)
+        finally:
+            self.driver_pool.put(driver)
+
+    def _download_single_user(self, profile_link: str, index: int, number_of_users: int, sleep_time: int, overwrite=False, supress_output=False, driver=None, incremental=False):
+        """
+        Download the profile html and the post history html of one user
+
+        Input:
+        :param profile_link: string, link to the profile of the user, e.g. /u/username
+        :param index: int, position of the user in the user list, for the progress update
+        :param number_of_users: int, length of the user list, for the progress update
+        :param sleep_time: float, time that the browser waits for the page to update after scrolling
+        :param overwrite: boolean, should the html files be overwritten
+        :param supress_output: boolean, should the detailed output print be supressed?
+        :param driver: selenium webdriver, browser that is used, defaults to self.driver
+        :param incremental: boolean, should an existing user be updated with the posts since the last download
+        """
+
+        # get user name and file names
+        username = self.get_user_name_from_profile_link(profile_link)
+        profile_filepath = os.path.join(self.dataset_folder, "profiles", username + self.file_extension)
+        post_history_filepath = os.path.join(self.dataset_folder, "post_histories", username + self.file_extension)
+
+        # print progress update
+        if not supress_output: print("( " + str(index+1).zfill(4) + " / " + str(number_of_users) + " ): " + username )
+
+        # check if files exist already, the files are written atomically so existing files are complete
+        files_exist = self.page_store.exists(profile_filepath) and self.page_store.exists(post_history_filepath)
+        if files_exist and incremental and not overwrite:
+            # only download the posts since the last download
+            self._update_single_user(profile_link, profile_filepath, post_history_filepath, sleep_time, supress_output, driver)
+        elif files_exist and not overwrite:
+            # dont overwrite:
+            if not supress_output: print("files already exist, skipping download")
+            self.crawl_journal.mark_fetched(self.website_url + profile_link, self.page_store.size(profile_filepath), 0)
+            self.crawl_journal.mark_fetched(self.website_url + profile_link + "/activity", self.page_store.size(post_history_filepath), 0)
+        else:    
+            # profile:
+            if not supress_output: print("downloading profile html...")
+            start = time.monotonic()
+            profile_html = self._get_profile_page(profile_link, driver)
+            if profile_html is not None: # check for connection
+                self.page_store.write(profile_filepath, profile_html, overwrite)
+            self._record_page(self.website_url + profile_link, DiscourseCrawlJournal.PROFILE, profile_html, time.monotonic() - start)
+
+            # post history:
+            if not supress_output: print("downloading post history html...")
+            start = time.monotonic()
+            post_history_html = self._get_post_history_page(profile_link, sleep_time, driver)
+            if post_history_html is not None: # check for connection
+                self.page_store.write(post_history_filepath, post_history_html, overwrite)
+            self._record_page(self.website_url + profile_link + "/activity", DiscourseCrawlJournal.POST_HISTORY, post_history_html, time.monotonic() - start)
+
+            # remember the newest post for the next incremental download
+            if profile_html is not None and post_history_html is not None:
+                self.crawl_state[username] = self.get_newest_timestamp(profile_html, post_history_html, self.backend)
+
+        # hand the complete user to the next step
+        if self.on_user_downloaded is not None and self.page_store.exists(profile_filepath) and self.page_store.exists(post_history_filepath):
+            self.on_user_downloaded(profile_filepath, post_history_filepath)
+
+    def _update_single_user(self, profile_link: str, profile_filepath: str, post_history_filepath: str, sleep_time: int, supress_output=False, driver=None):
+        """
+        Download the profile of a user and, if the profile shows activity since the last download,
+        the posts that are newer than the newest known post.
+        The new posts are added to the existing post history.
+        """
+        username = self.get_user_name_from_profile_link(profile_link)
+
+        # newest known post, from the last download or from the existing post history
+        known_timestamp = self.crawl_state.get(username)
+        if known_timestamp is None:
+            known_timestamp = self.get_newest_timestamp(None, self.page_store.read(post_history_filepath).decode("utf-8"), self.backend)
+
+        if not supress_output: print("checking profile for new activity...")
+        start = time.monotonic()
+        profile_html = self._get_profile_page(profile_link, driver)
+        self._record_page(self.website_url + profile_link, DiscourseCrawlJournal.PROFILE, profile_html, time.monotonic() - start)
+        if profile_html is None: return # check for connection
+        self.page_store.write(profile_filepath, profile_html, overwrite=True)
+
+        last_post_timestamp = self.get_newest_timestamp(profile_html, None, self.backend)
+        if known_timestamp is not None and (last_post_timestamp is None or last_post_timestamp <= known_timestamp):
+            if not supress_output: print("no new posts, skipping post history")
+            self.crawl_state[username] = known_timestamp
+            self.crawl_journal.mark_fetched(self.website_url + profile_link + "/activity", 0, 0)
+            return
+
+        # download the posts until the known posts are reached
+        if not supress_output: print("downloading new posts...")
+        start = time.monotonic()
+        new_post_history_html = self._get_post_history_page(profile_link, sleep_time, driver, stop_at_timestamp=known_timestamp)
+        self._record_page(self.website_url + profile_link + "/activity", DiscourseCrawlJournal.POST_HISTORY, new_post_history_html, time.monotonic() - start)
+        if new_post_history_html is None: return # check for connection
+
+        post_history_html = self.merge_post_histories(self.page_store.read(post_history_filepath).decode("utf-8"), new_post_history_html, known_timestamp, self.backend)
+        self.page_store.write(post_history_filepath, post_history_html, overwrite=True)
+
+        self.crawl_state[username] = self.get_newest_timestamp(profile_html, new_post_history_html, self.backend)
             
+    def _record_page(self, url: str, page_type: str, html: str, duration: float, crawl_journal=None):
+        """
+        write the result of a download to the crawl journal, defaults to the journal of the users, and the crawl metrics
+        """
+        if crawl_journal is None: crawl_journal = self.crawl_journal
+        retries = crawl_journal.get_retries(url)
+        if html is None:
+            crawl_journal.mark_failed(url, duration)
+            self.metrics.record_request(url, page_type, duration, 0, retries, success=False)
+        else:
+            number_of_bytes = len(html.encode("utf-8"))
+            crawl_journal.mark_fetched(url, number_of_bytes, duration)
+            self.metrics.record_request(url, page_type, duration, number_of_bytes, retries)
+
+    def _get_profile_page(self, profile_link: str, driver=None) -> str:
+        """
+        get the profile page of a user from the selected backend, None if the page could not be loaded
+        """
+        if self.backend == "browser":
+            return self._get_html_from_url(self.website_url + profile_link, driver=driver)
+
+        profile = self.api_client.get_profile(self.get_user_name_from_profile_link(profile_link))
+        if profile is None: return None
+        return json.dumps(profile)
+
+    def _get_post_history_page(self, profile_link: str, sleep_time: int, driver=None, stop_at_timestamp=None) -> str:
+        """
+        get the post history page of a user from the selected backend, None if the page could not be loaded.
+        With stop_at_timestamp, the posts are only loaded until a post at or before that time is reached.
+        """
+        if self.backend == "browser":
+            post_history_link = profile_link + "/activity"
+            return self._get_html_from_url(self.website_url + post_history_link, sleep_time, driver=driver, stop_at_timestamp=stop_at_timestamp)
+
+        user_actions = self.api_client.get_user_actions(self.get_user_name_from_profile_link(profile_link), stop_at_timestamp=stop_at_timestamp)
+        if user_actions is None: return None
+        return json.dumps(user_actions)
+
+    def _get_topic_page(self, topic_id: int) -> str:
+        """
+        get the posts of a topic as json, None if the page could not be loaded.
+        The topics are requested from the json endpoints with both backends:
+        the rendered topic only keeps a window of the posts of a long topic in the page, the other posts have no text
+        """
+        posts = self.api_client.get_topic_posts(topic_id)
+        if posts is None: return None
+        return json.dumps(posts)
+
+    # ====================================================================================== #
+    # TOPICS:                                                                                #
+    # ====================================================================================== #
+
+    def download_topics(self, topic_links, overwrite=False, supress_output=False) -> list:
+        """
+        Download the topic pages of posts, e.g. for the full texts of the posts, from the json endpoints (see _get_topic_page).
+        Every topic is downloaded once, however many posts link to it,
+        the topics are kept in a crawl journal of their own, so an interrupted download continues with the pending topics
+
+        Input:
+        :param topic_links: iterable of strings, topic links of the posts, e.g. from DiscourseConverter.iter_topic_links
+        :param overwrite: boolean, should the topic pages be downloaded again
+        :param supress_output: boolean, should the detailed output print be supressed?
+
+        Output:
+        list of the filepaths of the topic pages, in the order the topics first appear in the links
+        """
+        topics_folder = os.path.join(self.dataset_folder, "topics")
+        if not os.path.isdir(topics_folder):
+            os.makedirs(topics_folder)
+
+        # one page per topic
+        topic_ids = []
+        known_topic_ids = set()
+        for topic_link in topic_links:
+            topic_id = DiscourseConverter.get_topic_id_from_link(topic_link)
+            if topic_id is None or topic_id in known_topic_ids: continue
+            known_topic_ids.add(topic_id)
+            topic_ids.append(topic_id)
+
+        topic_journal = DiscourseCrawlJournal(self.topic_journal_filepath)
+        try:
+            pages = [(self.website_url + "/t/" + str(topic_id), "/t/" + str(topic_id), DiscourseCrawlJournal.TOPIC, self._get_topic_filepath(topic_id)) for topic_id in topic_ids]
+            for position in range(0, len(pages), self.journal_batch_size):
+                topic_journal.add_pages(pages[position:position + self.journal_batch_size])
+            if overwrite:
+                topic_journal.mark_all_pending()
+            pending_topic_ids = [int(topic_path[len("/t/"):]) for topic_path in topic_journal.get_pending_profile_links(self.max_retries)]
+            pending_topic_ids = [topic_id for topic_id in pending_topic_ids if topic_id in known_topic_ids]
+
+            # topics that an earlier download saved as rendered html pages are downloaded again as json
+            pending = set(pending_topic_ids)
+            pending_topic_ids = pending_topic_ids + [topic_id for topic_id in topic_ids if topic_id not in pending and not self.page_store.exists(self._get_topic_filepath(topic_id))
+                                                     and topic_journal.get_state(self.website_url + "/t/" + str(topic_id)) == DiscourseCrawlJournal.FETCHED]
+
+            if len(pending_topic_ids) > 0 and self.api_client is None:
+                self._start_api_client()
+
+            def download(topic_id):
+                topic_filepath = self._get_topic_filepath(topic_id)
+                if self.page_store.exists(topic_filepath) and not overwrite:
+                    topic_journal.mark_fetched(self.website_url + "/t/" + str(topic_id), self.page_store.size(topic_filepath), 0)
+                    return
+                if not supress_output: print("downloading topic " + str(topic_id) + "...")
+                start = time.monotonic()
+                topic_json = self._get_topic_page(topic_id)
+                if topic_json is not None: # check for connection
+                    self.page_store.write(topic_filepath, topic_json, overwrite)
+                self._record_page(self.website_url + "/t/" + str(topic_id), DiscourseCrawlJournal.TOPIC, topic_json, time.monotonic() - start, topic_journal)
+
+            # the api client is shared by all workers
+            if self.workers == 1 or len(pending_topic_ids) <= 1:
+                for topic_id in tqdm(pending_topic_ids, desc="downloading topics"):
+                    download(topic_id)
+            else:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    futures = [executor.submit(download, topic_id) for topic_id in pending_topic_ids]
+                    for future in tqdm(as_completed(futures), total=len(futures), desc="downloading topics"):
+                        future.result()
+        finally:
+            topic_journal.close()
+
+        return [self._get_topic_filepath(topic_id) for topic_id in topic_ids if self.page_store.exists(self._get_topic_filepath(topic_id))]
+
+    def _get_topic_filepath(self, topic_id: int) -> str:
+        # json with both backends, see _get_topic_page
+        return os.path.join(self.dataset_folder, "topics", str(topic_id) + ".json")
+
     # ====================================================================================== #
     # HTML HANDLER / DRIVER:                                                                 #
     # ====================================================================================== #
@@ -157,6 +575,9 @@ class DiscourseDownloader():
         if overwrite:
             shutil.rmtree(html_folder_profiles)
             shutil.rmtree(html_folder_post_histories)
+            # the journal would report the deleted files as fetched
+            if Path(self.crawl_journal_filepath).is_file():
+                os.remove(self.crawl_journal_filepath)
                     
         if not os.path.isdir(html_folder_profiles):
             os.makedirs(html_folder_profiles)
@@ -164,50 +585,119 @@ class DiscourseDownloader():
             os.makedirs(html_folder_post_histories)
 
     def _start_chrome_browser(self):
-        # prepare the options for the chrome driver
-        options = webdriver.ChromeOptions()
-        options.add_argument('headless')
-        options.add_experimental_option('excludeSwitches', ['enable-logging'])
-
         # start chrome browser
-        self.driver = webdriver.Chrome(options=options)
+        self.driver = self._new_chrome_driver()
         
     def _quit_chrome_browser(self):
         self.driver.quit()
+        self.driver = None
+
+    def _start_api_client(self):
+        # one connection per worker is kept alive
+        self.api_client = DiscourseApiClient(self.website_url, maxsize=self.workers)
+
+    @staticmethod
+    def _new_chrome_driver():
+        # prepare the options for the chrome driver
+        options = webdriver.ChromeOptions()
+        options.add_argument('headless')
+        options.add_experimental_option('excludeSwitches', ['enable-logging'])
 
-    def _scroll_down(self, sleep_time: int):
-            """A method for scrolling the page."""
+        return webdriver.Chrome(options=options)
+
+    def _start_browser_pool(self):
+        # the main browser is part of the pool, the other workers get their own browser
+        self.driver_pool = queue.Queue()
+        self.driver_pool.put(self.driver)
+        for _ in range(self.workers - 1):
+            self.driver_pool.put(self._new_chrome_driver())
+
+    def _quit_browser_pool(self):
+        # quit all browsers of the pool except the main browser
+        while not self.driver_pool.empty():
+            driver = self.driver_pool.get()
+            if driver is not self.driver:
+                driver.quit()
+        self.driver_pool = None
+
+    def _scroll_down(self, sleep_time: int, driver=None, stop_at_timestamp=None) -> int:
+            """
+            Scroll to the bottom of the page until no more content is loaded.
+            After every scroll the page is polled: as soon as new posts appear or the page grows,
+            the next scroll follows, the scrolling stops when the page has settled
+            (no new content, no running or finished requests and no loading spinner for settle_time) or sleep_time has passed.
+            With stop_at_timestamp, the scrolling also stops when a post at or before that time is loaded.
+
+            Output:
+            number of scrolls
+            """
+            if driver is None: driver = self.driver
+
+            # Get the state of the page: scroll height, posts, running requests, finished requests, spinners
+            last_height, last_items, _, _, _ = driver.execute_script(self.page_state_script)
+            scrolls = 0
 
-            # Get scroll height.
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
-                
             while True:
                 # Scroll down to the bottom.
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-
-                # Wait to load the page.
-                time.sleep(sleep_time)
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                scrolls = scrolls + 1
+
+                # Wait for new content, stop waiting when the page has settled or on timeout
+                grown = False
+                scroll_start = time.monotonic()
+                quiet_start = scroll_start
+                while True:
+                    time.sleep(self.poll_interval)
+                    height, items, running_requests, finished_requests, spinners = driver.execute_script(self.page_state_script)
+                    now = time.monotonic()
+
+                    if height > last_height or items > last_items:
+                        grown = True
+                        break
+                    if running_requests > 0 or finished_requests > 0 or spinners > 0:
+                        # the page is still loading
+                        quiet_start = now
+                    elif now - quiet_start >= self.settle_time:
+                        break
+                    if now - scroll_start >= sleep_time:
+                        break
+
+                if not grown:
+                    break
 
-                # Calculate new scroll height and compare with last scroll height.
-                new_height = self.driver.execute_script("return document.body.scrollHeight")
-                if new_height == last_height:
+                # stop when the known posts are reached
+                if stop_at_timestamp is not None:
+                    oldest_post_timestamp = driver.execute_script(self.oldest_post_script)
+                    if oldest_post_timestamp is not None and oldest_post_timestamp <= stop_at_timestamp:
+                        break
 
-                    break
+                last_height, last_items = height, items
 
-                last_height = new_height
+            return scrolls
 
-    def _get_html_from_url(self, url, sleep_time=1):
+    def _get_html_from_url(self, url, sleep_time=1, driver=None, stop_at_timestamp=None):
         """
         get the html file from a url with selenium including scrolling down
         """        
+        if driver is None: driver = self.driver
+        start = time.monotonic()
         try:
-            self.driver.get(url)
+            driver.get(url)
         except Exception as e:
             print(e)
             print("chromedriver could not get page, skipping to next")
             return None
-        self._scroll_down(sleep_time)
-        html = self.driver.page_source
+        load_time = time.monotonic() - start
+        scrolls = self._scroll_down(sleep_time, driver, stop_at_timestamp)
+        html = driver.page_source
+
+        # timing of the page
+        scroll_time = time.monotonic() - start - load_time
+        self.scroll_stats.append({'url': url,
+                                  'load_time': load_time,
+                                  'scroll_time': scroll_time,
+                                  'scrolls': scrolls})
+        self.metrics.record_scroll(url, load_time, scroll_time, scrolls)
         
         if html != "<html><head></head><body></body></html>":
             return html
@@ -215,30 +705,36 @@ class DiscourseDownloader():
             print("chromedriver could not get page, skipping to next")
             return None
 
+    def get_scroll_time_summary(self) -> dict:
+        """
+        summary of the time spent on loading and scrolling the pages
+
+        Output:
+        dict with the number of pages, scrolls and the total and mean times in seconds
+        """
+        number_of_pages = len(self.scroll_stats)
+        total_load_time = sum([stats['load_time'] for stats in self.scroll_stats])
+        total_scroll_time = sum([stats['scroll_time'] for stats in self.scroll_stats])
+        return {'pages': number_of_pages,
+                'scrolls': sum([stats['scrolls'] for stats in self.scroll_stats]),
+                'total_load_time': total_load_time,
+                'total_scroll_time': total_scroll_time,
+                'mean_load_time': total_load_time / number_of_pages if number_of_pages > 0 else 0,
+                'mean_scroll_time': total_scroll_time / number_of_pages if number_of_pages > 0 else 0}
+
     @staticmethod
     def _write_html_to_file(filename: str, html: HTML, overwrite=False):
         """
         Writes an html to disk.
+        The html is written to a temporary file first, which is then renamed,
+        so the file is either complete or does not exist.
 
         Input:
         :param filename: string, path to file
         :param html: html file, file that should be written to disk
         :param overwrite: boolean, should the file be overwritten if it already exists
         """
-        if Path(filename).is_file() and not overwrite:
-            # html file already exists, dont overwrite
-            pass
-        elif not Path(filename).is_file():
-            # write to file
-            open(filename, 'x') # create file
-            with io.open(filename, 'w', encoding="utf-8") as outfile:
-                outfile.write(html)
-                outfile.close()            
-        elif Path(filename).is_file() and overwrite:
-            # html file should be overwritten
-            with io.open(filename, 'w', encoding="utf-8") as outfile:
-                outfile.write(html)
-                outfile.close()
+        DirectoryPageStore().write(filename, html, overwrite)
 
     # ====================================================================================== #
     # HELPERS:                                                                               #
@@ -276,6 +772,98 @@ class DiscourseDownloader():
     def get_user_name_from_profile_link(profile_link: str) -> str:
         return profile_link[3:]
 
+    def _iter_user_links(self, user_list_filepath: str):
+        """
+        get the profile links from the user list file, the index of the paged user list is read line by line
+
+        Input:
+        :param user_list_filepath: string, user links index (.txt), list of links (.json) or user list html
+        """
+        if user_list_filepath.endswith(".txt"):
+            with io.open(user_list_filepath, 'r', encoding="utf-8") as index_file:
+                for line in index_file:
+                    if line.strip() != "": yield line.strip()
+            return
+
+        # open the html file of the user list and get the profile links
+        with open(user_list_filepath, 'rb') as user_list_html:
+            if user_list_filepath.endswith(".json"):
+                user_links = json.load(user_list_html)
+            else:
+                user_links = self.get_user_links(user_list_html)
+        for profile_link in user_links:
+            yield profile_link
+
+    # ====================================================================================== #
+    # INCREMENTAL DOWNLOAD:                                                                  #
+    # ====================================================================================== #
+
+    def _load_crawl_state(self):
+        if Path(self.crawl_state_filepath).is_file():
+            with open(self.crawl_state_filepath) as crawl_state_file:
+                self.crawl_state = json.load(crawl_state_file)
+
+    def _save_crawl_state(self):
+        self._write_html_to_file(self.crawl_state_filepath, json.dumps(self.crawl_state), overwrite=True)
+
+    @staticmethod
+    def get_newest_timestamp(profile: str, post_history: str, backend="browser") -> int:
+        """
+        get the newest activity of a user: the last post time of the profile
+        and the newest post time of the post history, None if neither is known
+
+        Input:
+        :param profile: string, html (browser) or json (api) of the profile, or None
+        :param post_history: string, html (browser) or json (api) of the post history, or None
+        :param backend: string, backend that downloaded the pages
+        """
+        timestamps = []
+        if profile is not None:
+            if backend == "browser":
+                timestamps.append(DiscourseConverter.get_last_post_timestamp(soup(profile, "html.parser")))
+            else:
+                timestamps.append(DiscourseApiClient.iso_to_timestamp(json.loads(profile).get('last_posted_at')))
+        if post_history is not None:
+            if backend == "browser":
+                post_soups = soup(post_history, "html.parser").find_all('div', {'class': 'user-stream-item item ember-view'})
+                timestamps = timestamps + [DiscourseConverter.get_post_timestamp(post_soup) for post_soup in post_soups]
+            else:
+                timestamps = timestamps + [DiscourseApiClient.iso_to_timestamp(action.get('created_at')) for action in json.loads(post_history)]
+
+        timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+        if len(timestamps) == 0: return None
+        return max(timestamps)
+
+    @staticmethod
+    def merge_post_histories(post_history: str, new_post_history: str, known_timestamp: int, backend="browser") -> str:
+        """
+        add the posts of a new post history that are newer than the known timestamp
+        in front of the posts of the existing post history
+
+        Input:
+        :param post_history: string, html (browser) or json (api) of the existing post history
+        :param new_post_history: string, html (browser) or json (api) of the new post history
+        :param known_timestamp: int, time of the newest post in the existing post history
+        :param backend: string, backend that downloaded the pages
+        """
+        if known_timestamp is None: return new_post_history
+
+        if backend != "browser":
+            new_actions = [action for action in json.loads(new_post_history) if DiscourseApiClient.iso_to_timestamp(action.get('created_at')) > known_timestamp]
+            return json.dumps(new_actions + json.loads(post_history))
+
+        post_history_soup = soup(post_history, "html.parser")
+        old_posts = post_history_soup.find_all('div', {'class': 'user-stream-item item ember-view'})
+        new_posts = soup(new_post_history, "html.parser").find_all('div', {'class': 'user-stream-item item ember-view'})
+        new_posts = [post for post in new_posts if DiscourseConverter.get_post_timestamp(post) > known_timestamp]
+
+        # without old posts there is nothing to add to
+        if len(old_posts) == 0: return new_post_history
+
+        for new_post in new_posts:
+            old_posts[0].insert_before(new_post)
+        return str(post_history_soup)
+
     # ====================================================================================== #
     # USER INTERFACE:                                                                        #
     # ====================================================================================== #
@@ -0,0 +1,114 @@
+from collections.abc import Mapping
+from pathlib import Path
+import itertools
+import json
+import os
+import threading
+
+class DiscourseJsonWriter():
+    """
+    Discourse json writer class
+    Writes json files through a buffered file handle without building the whole json string first.
+    Lists are written as a stream of records, the records are encoded in batches,
+    so the memory only holds one batch and the records can come from a generator.
+    The file is written to a temporary file first, which is then renamed,
+    so the file is either complete or does not exist.
+
+    Multi-record files:
+    with DiscourseJsonWriter(filename) as writer:
+        writer.write_records(posts)
+    """
+
+    batch_size = 1000 # records that are encoded at once
+    buffer_size = 1 << 20 # bytes
+
+    def __init__(self, filename: str, overwrite=False):
+        """
+        Input:
+        :param filename: string, path to file
+        :param overwrite: boolean, should the file be overwritten if it already exists,
+                          otherwise nothing is written to an existing file
+        """
+        self.filename = filename
+        self.skipped = Path(filename).is_file() and not overwrite
+        self.temporary_filename = filename + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+        self.outfile = None
+        self.records = 0
+
+    def __enter__(self):
+        if not self.skipped:
+            self.outfile = open(self.temporary_filename, 'w', buffering=self.buffer_size)
+            self.outfile.write("[")
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        if self.outfile is None: return
+        try:
+            if exception_type is None:
+                self.outfile.write("]")
+            self.outfile.close()
+            if exception_type is None:
+                os.replace(self.temporary_filename, self.filename)
+        finally:
+            self.outfile = None
+            if os.path.isfile(self.temporary_filename): os.remove(self.temporary_filename)
+
+    # ====================================================================================== #
+    # WRITE:                                                                                 #
+    # ====================================================================================== #
+
+    def write_record(self, record):
+        """
+        append one record to the list of the file
+        """
+        self.write_records([record])
+
+    def write_records(self, records):
+        """
+        append records to the list of the file
+
+        Input:
+        :param records: iterable of records, e.g. a list or a generator
+        """
+        if self.skipped: return
+        records = iter(records)
+        while True:
+            batch = list(itertools.islice(records, self.batch_size))
+            if len(batch) == 0: break
+            if self.records > 0: self.outfile.write(", ")
+            # the list of the batch without its brackets, the C encoder is much faster than json.dump
+            self.outfile.write(json.dumps(batch, default=self._encode_mapping)[1:-1])
+            self.records = self.records + len(batch)
+
+    @staticmethod
+    def _encode_mapping(value):
+        # mappings that are no dicts, e.g. the posts of a DiscoursePostTable
+        if isinstance(value, Mapping): return dict(value)
+        raise TypeError("Object of type %s is not JSON serializable" % type(value).__name__)
+
+    @classmethod
+    def write(cls, filename: str, data, overwrite=False):
+        """
+        Writes a json file to disk, lists are written as a stream of records
+
+        Input:
+        :param filename: string, path to file
+        :param data: list, dict, generator of records, ... , data that should be written to disk
+        :param overwrite: boolean, should the file be overwritten if it already exists
+        """
+        if Path(filename).is_file() and not overwrite:
+            # json file already exists, dont overwrite
+            return
+
+        if isinstance(data, (dict, str, int, float, bool)) or data is None:
+            temporary_filename = filename + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+            try:
+                with open(temporary_filename, 'w', buffering=cls.buffer_size) as outfile:
+                    outfile.write(json.dumps(data))
+                os.replace(temporary_filename, filename)
+            finally:
+                if os.path.isfile(temporary_filename): os.remove(temporary_filename)
+            return
+
+        with cls(filename, overwrite=overwrite) as writer:
+            writer.write_records(data)
@@ -0,0 +1,325 @@
+from pathlib import Path
+import hashlib
+import sqlite3
+import threading
+import gzip
+import io
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class DirectoryPageStore():
+    """
+    Directory page store class
+    Stores every downloaded page as a file at its filepath
+    """
+
+    def __init__(self, sync=False):
+        """
+        Input:
+        :param sync: boolean, should every page be flushed to the disk before it is renamed,
+                     the rename alone already keeps the files complete if the crawl is interrupted
+        """
+        self.sync = sync
+
+    def exists(self, filepath: str) -> bool:
+        return Path(filepath).is_file()
+
+    def size(self, filepath: str) -> int:
+        return os.path.getsize(filepath)
+
+    def fingerprint(self, filepath: str) -> str:
+        """
+        size and modification time of a page, they change when the page is written again
+        """
+        stat = os.stat(filepath)
+        return str(stat.st_size) + ":" + str(stat.st_mtime_ns)
+
+    def read(self, filepath: str) -> bytes:
+        with open(filepath, 'rb') as page_file:
+            return page_file.read()
+
+    def open(self, filepath: str):
+        """
+        open a page as binary file object
+        """
+        return open(filepath, 'rb')
+
+    def write(self, filepath: str, html: str, overwrite=False):
+        """
+        Writes a page to disk.
+        The page is written to a temporary file first, which is then renamed,
+        so the file is either complete or does not exist.
+
+        Input:
+        :param filepath: string, path to file
+        :param html: string, page that should be written to disk
+        :param overwrite: boolean, should the file be overwritten if it already exists
+        """
+        if Path(filepath).is_file() and not overwrite:
+            # html file already exists, dont overwrite
+            return
+
+        # write to temporary file and replace the file
+        temporary_filepath = filepath + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+        with io.open(temporary_filepath, 'w', encoding="utf-8") as outfile:
+            outfile.write(html)
+            if self.sync:
+                outfile.flush()
+                os.fsync(outfile.fileno())
+        os.replace(temporary_filepath, filepath)
+
+    def compact(self, threshold=0.0) -> dict:
+        """
+        nothing to reclaim, overwritten pages replace their files
+        """
+        return {'contents': 0, 'compressed_bytes': 0}
+
+    def close(self):
+        pass
+
+
+class PackedPageStore():
+    """
+    Packed page store class
+    Stores the pages compressed in one pack file, addressed by the hash of their content.
+    An index maps the filepaths to the contents, pages with the same content are only stored once,
+    also between crawls.
+    The filepaths are the same as for the directory store, they are only used as keys.
+    """
+
+    compressions = ["gzip", "zstd"]
+
+    def __init__(self, folder: str, compression="gzip", compression_level=6):
+        """
+        Open the store, the pack file and the index are created if they do not exist
+
+        Input:
+        :param folder: string, location of the pack file and the index, usually the html folder of the dataset
+        :param compression: string, "gzip" or "zstd" (needs the zstandard package)
+        :param compression_level: int, compression level
+        """
+        if compression not in self.compressions:
+            raise ValueError("invalid compression: '%s'" % compression)
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression needs the zstandard package")
+
+        self.folder = folder
+        self.compression = compression
+        self.compression_level = compression_level
+        self.pack_filepath = os.path.join(folder, "pages.pack") # the pack file of the index, read from the index when it is opened
+        self.index_filepath = os.path.join(folder, "pages.index.sqlite")
+
+        self.lock = threading.Lock()
+        self.connection = None
+        self.pack_file = None
+
+    def __getstate__(self):
+        # open files are not sent to other processes, they are opened again on first use
+        state = self.__dict__.copy()
+        state['lock'] = None
+        state['connection'] = None
+        state['pack_file'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    # ====================================================================================== #
+    # PAGES:                                                                                 #
+    # ====================================================================================== #
+
+    def exists(self, filepath: str) -> bool:
+        return self._get_blob(filepath) is not None
+
+    def size(self, filepath: str) -> int:
+        blob = self._get_blob(filepath)
+        if blob is None:
+            raise FileNotFoundError(filepath)
+        return blob[3]
+
+    def fingerprint(self, filepath: str) -> str:
+        """
+        hash of the content of a page
+        """
+        with self.lock:
+            self._open()
+            row = self.connection.execute("SELECT hash FROM pages WHERE path = ?", (self._get_key(filepath),)).fetchone()
+        if row is None:
+            raise FileNotFoundError(filepath)
+        return row[0]
+
+    def read(self, filepath: str) -> bytes:
+        blob = self._get_blob(filepath)
+        if blob is None:
+            raise FileNotFoundError(filepath)
+        offset, length, compression, _ = blob
+
+        with self.lock:
+            self._open()
+            self.pack_file.seek(offset)
+            data = self.pack_file.read(length)
+        return self._decompress(data, compression)
+
+    def open(self, filepath: str):
+        """
+        open a page as binary file object
+        """
+        return io.BytesIO(self.read(filepath))
+
+    def write(self, filepath: str, html: str, overwrite=False):
+        """
+        Add a page to the store, the content is only appended to the pack file if it is not stored yet
+
+        Input:
+        :param filepath: string, path of the page, used as key
+        :param html: string, page that should be stored
+        :param overwrite: boolean, should the page be replaced if it already exists
+        """
+        key = self._get_key(filepath)
+        data = html.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+
+        with self.lock:
+            self._open()
+            if not overwrite and self.connection.execute("SELECT 1 FROM pages WHERE path = ?", (key,)).fetchone() is not None:
+                # page already exists, dont overwrite
+                return
+
+            if self.connection.execute("SELECT 1 FROM blobs WHERE hash = ?", (content_hash,)).fetchone() is None:
+                # new content, append to the pack file before it is added to the index
+                compressed = self._compress(data)
+                self.pack_file.seek(0, os.SEEK_END)
+                offset = self.pack_file.tell()
+                self.pack_file.write(compressed)
+                self.pack_file.flush()
+                os.fsync(self.pack_file.fileno())
+                self.connection.execute("INSERT INTO blobs (hash, offset, length, compression, size) VALUES (?, ?, ?, ?, ?)",
+                                        (content_hash, offset, len(compressed), self.compression, len(data)))
+
+            self.connection.execute("INSERT OR REPLACE INTO pages (path, hash) VALUES (?, ?)", (key, content_hash))
+            self.connection.commit()
+
+    def get_summary(self) -> dict:
+        """
+        get the number of pages, the number of stored contents and their sizes in bytes
+        """
+        with self.lock:
+            self._open()
+            pages = self.connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            blobs, size, length = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM blobs").fetchone()
+        return {'pages': pages, 'contents': blobs, 'bytes': size, 'compressed_bytes': length}
+
+    def compact(self, threshold=0.0) -> dict:
+        """
+        Remove the contents that are no longer used by any page, e.g. the older post histories of an incremental crawl.
+        The used contents are copied to a new pack file, the index switches to it in one commit
+        and the old pack file is deleted after the commit, so an interrupted compaction keeps the old pack file.
+        The store should not be used by other processes while it is compacted.
+
+        Input:
+        :param threshold: float, only compact if the unused contents are more than this fraction of the pack file
+
+        Output:
+        dict with the number of removed contents and the reclaimed compressed bytes
+        """
+        with self.lock:
+            self._open()
+            unused, unused_length = self.connection.execute("""SELECT COUNT(*), COALESCE(SUM(length), 0) FROM blobs
+                                                               WHERE hash NOT IN (SELECT hash FROM pages)""").fetchone()
+            self.pack_file.seek(0, os.SEEK_END)
+            pack_size = self.pack_file.tell()
+            if unused == 0 or unused_length <= threshold * pack_size:
+                return {'contents': 0, 'compressed_bytes': 0}
+
+            # the compacted pack is a new generation with a new filename, the old pack file is not changed
+            generation = int(self.connection.execute("SELECT value FROM settings WHERE key = 'generation'").fetchone()[0]) + 1
+            compacted_filename = "pages." + str(generation) + ".pack"
+            compacted_filepath = os.path.join(self.folder, compacted_filename)
+
+            # copy the used contents in the order of the old pack file
+            blobs = self.connection.execute("""SELECT hash, offset, length FROM blobs
+                                               WHERE hash IN (SELECT hash FROM pages) ORDER BY offset""").fetchall()
+            offsets = []
+            with open(compacted_filepath, 'wb') as compacted_file:
+                for content_hash, offset, length in blobs:
+                    self.pack_file.seek(offset)
+                    offsets.append((compacted_file.tell(), content_hash))
+                    compacted_file.write(self.pack_file.read(length))
+                compacted_file.flush()
+                os.fsync(compacted_file.fileno())
+
+            # the new offsets and the new pack file are committed together,
+            # until the commit the index points to the old pack file, which is only deleted after the commit
+            self.connection.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM pages)")
+            self.connection.executemany("UPDATE blobs SET offset = ? WHERE hash = ?", offsets)
+            self.connection.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                                        [('generation', str(generation)), ('pack_file', compacted_filename)])
+            self.connection.commit()
+
+            old_pack_filepath = self.pack_filepath
+            self.pack_file.close()
+            self.pack_filepath = compacted_filepath
+            self.pack_file = open(self.pack_filepath, 'a+b')
+            os.remove(old_pack_filepath)
+
+        return {'contents': unused, 'compressed_bytes': unused_length}
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+            if self.pack_file is not None:
+                self.pack_file.close()
+                self.pack_file = None
+
+    # ====================================================================================== #
+    # HELPERS:                                                                               #
+    # ====================================================================================== #
+
+    def _open(self):
+        # open the index and the pack file on first use, the lock has to be held
+        if self.connection is not None: return
+
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+        self.connection = sqlite3.connect(self.index_filepath, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, offset INTEGER, length INTEGER, compression TEXT, size INTEGER)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS pages (path TEXT PRIMARY KEY, hash TEXT REFERENCES blobs (hash))")
+        # the pack file of the index, it changes when the store is compacted
+        self.connection.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+        self.connection.executemany("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", [('generation', "0"), ('pack_file', "pages.pack")])
+        self.connection.commit()
+        pack_filename = self.connection.execute("SELECT value FROM settings WHERE key = 'pack_file'").fetchone()[0]
+        self.pack_filepath = os.path.join(self.folder, pack_filename)
+        self.pack_file = open(self.pack_filepath, 'a+b')
+
+    def _get_key(self, filepath: str) -> str:
+        # the same page has the same key for the downloader and the converter
+        return Path(os.path.relpath(filepath, self.folder)).as_posix()
+
+    def _get_blob(self, filepath: str):
+        with self.lock:
+            self._open()
+            return self.connection.execute("""SELECT blobs.offset, blobs.length, blobs.compression, blobs.size
+                                              FROM pages JOIN blobs ON pages.hash = blobs.hash WHERE pages.path = ?""",
+                                           (self._get_key(filepath),)).fetchone()
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=self.compression_level).compress(data)
+        return gzip.compress(data, compresslevel=self.compression_level)
+
+    @staticmethod
+    def _decompress(data: bytes, compression: str) -> bytes:
+        if compression == "zstd":
+            if zstandard is None:
+                raise ImportError("zstd compression needs the zstandard package")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
@@ -0,0 +1,279 @@
+from python_script.data.discourse_converter import DiscourseConverter
+from lxml import etree
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+class LxmlParser():
+    """
+    lxml parser class
+    Extracts the profile and post data with XPath queries on an lxml tree,
+    gives the same dicts as the BeautifulSoup extractors of the DiscourseConverter
+    """
+
+    name = "lxml"
+
+    # classes are matched like BeautifulSoup: a single class is one of the classes of the element,
+    # several classes have to be the whole class attribute
+    username_xpath = etree.XPath("//h1[contains(concat(' ', normalize-space(@class), ' '), ' username ')]")
+    full_name_xpath = etree.XPath("//h2[contains(concat(' ', normalize-space(@class), ' '), ' full-name ')]")
+    member_status_xpath = etree.XPath("//h3")
+    secondary_divs_xpath = etree.XPath("(//div[contains(concat(' ', normalize-space(@class), ' '), ' secondary ')])[1]//div")
+    posts_xpath = etree.XPath("//div[@class = 'user-stream-item item ember-view']")
+    topic_xpath = etree.XPath("(.//span[contains(concat(' ', normalize-space(@class), ' '), ' title ')])[1]//a")
+    category_xpath = etree.XPath(".//span[contains(concat(' ', normalize-space(@class), ' '), ' category-name ')]")
+    timestamp_xpath = etree.XPath(".//span[@class = 'relative-date date']")
+    excerpt_xpath = etree.XPath(".//p[contains(concat(' ', normalize-space(@class), ' '), ' excerpt ')]")
+    user_card_xpath = etree.XPath(".//*[@data-user-card]")
+    cooked_xpath = etree.XPath(".//div[contains(concat(' ', normalize-space(@class), ' '), ' cooked ')]")
+
+    def __init__(self, website_url: str):
+        self.website_url = website_url
+
+    def parse_profile(self, page: bytes, username: str) -> dict:
+        """
+        Extracts the profile data of a profile html page
+
+        Input:
+        :param page: bytes, the html page
+        :param username: string, username from the filepath, used for empty profiles
+        """
+        tree = self._parse(page)
+        profile_dict = {}
+
+        username_h1 = None if tree is None else self._first(self.username_xpath(tree))
+        if username_h1 is None:
+            # profile is empty
+            profile_dict['username'] = username
+            return profile_dict
+
+        profile_dict['username'] = self._get_text(username_h1).replace(" ", "")
+        profile_dict['full_name'] = self._get_text(self._first(self.full_name_xpath(tree)))
+        profile_dict['member_status'] = DiscourseConverter.get_member_status_from_title(self._get_text(self._first(self.member_status_xpath(tree))))
+
+        secondary_divs = self.secondary_divs_xpath(tree)
+        join_timestamp = self._get_secondary_timestamp(secondary_divs, "Joined")
+        if join_timestamp is not None:
+            profile_dict['join_timestamp'] = join_timestamp
+        last_post_timestamp = self._get_secondary_timestamp(secondary_divs, "Last Post")
+        if last_post_timestamp is not None:
+            profile_dict['last_post_timestamp'] = last_post_timestamp
+
+        return profile_dict
+
+    def parse_post_history(self, page: bytes, username: str) -> list:
+        """
+        Extracts the posts of a post history html page
+
+        Input:
+        :param page: bytes, the html page
+        :param username: string, username from the filepath
+        """
+        tree = self._parse(page)
+        if tree is None: return []
+
+        return [self._extract_post(post, username) for post in self.posts_xpath(tree)]
+
+    def iter_post_history(self, page_file, username: str):
+        """
+        Extracts the posts of a post history html page while the page is read,
+        the posts are yielded one by one and the parsed elements are dropped,
+        so the memory does not grow with the length of the post history
+
+        Input:
+        :param page_file: binary file object of the html page
+        :param username: string, username from the filepath
+        """
+        is_post = lambda element: element.tag == 'div' and element.get('class') == 'user-stream-item item ember-view'
+        for post in self._iter_elements(page_file, is_post):
+            yield self._extract_post(post, username)
+
+    def iter_topic_posts(self, page_file):
+        """
+        Extracts the full texts of the posts of a topic html page while the page is read,
+        like iter_post_history
+
+        Input:
+        :param page_file: binary file object of the html page
+
+        Output:
+        generator of dicts with the post number, the username and the full text of the posts
+        """
+        is_post = lambda element: element.tag == 'article' and (element.get('id') or "").startswith("post_")
+        for article in self._iter_elements(page_file, is_post):
+            user = self._first(self.user_card_xpath(article))
+            post_dict = {}
+            post_dict['post_number'] = int(article.get('id')[len("post_"):])
+            post_dict['username'] = user.get('data-user-card') if user is not None else None
+            post_dict['text'] = self._get_full_text(self._first(self.cooked_xpath(article)))
+            yield post_dict
+
+    # ====================================================================================== #
+    # HELPERS:                                                                               #
+    # ====================================================================================== #
+
+    @staticmethod
+    def _iter_elements(page_file, is_item):
+        """
+        yields the complete elements of a page for which is_item is true,
+        the elements outside of them are dropped as soon as they are complete
+        """
+        item = None
+        for event, element in etree.iterparse(page_file, events=("start", "end"), html=True, encoding="utf-8"):
+            if event == "start":
+                if item is None and is_item(element):
+                    item = element
+                continue
+
+            if element is item:
+                yield item
+                item = None
+            elif item is not None:
+                # part of the item, kept until the item is complete
+                continue
+
+            # drop the element and the elements before it, only their parents stay in memory
+            element.clear()
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+    def _extract_post(self, post, username: str) -> dict:
+        topic_a = self.topic_xpath(post)[0]
+        text = self._get_text(self.excerpt_xpath(post)[0])
+
+        post_dict = {}
+        post_dict['username'] = username
+        post_dict['topic'] = self._get_text(topic_a)
+        post_dict['topic_link'] = self.website_url + topic_a.get('href')
+        post_dict['category'] = self._get_text(self.category_xpath(post)[0])
+        post_dict['post_timestamp'] = int(self.timestamp_xpath(post)[0].get('data-time'))
+        post_dict['text'] = text.strip() if text is not None else None
+        return post_dict
+
+    @staticmethod
+    def _parse(page: bytes):
+        # the pages are written as utf-8, a new parser for every page because parsers can not be shared between threads
+        if len(page) == 0: return None
+        return etree.fromstring(page, etree.HTMLParser(encoding="utf-8"))
+
+    @staticmethod
+    def _first(elements: list):
+        return elements[0] if len(elements) > 0 else None
+
+    @staticmethod
+    def _get_text(element) -> str:
+        # first text directly in the element, like find(text=True, recursive=False)
+        if element is None: return None
+        if element.text is not None: return element.text
+        for child in element:
+            if child.tail is not None: return child.tail
+        return None
+
+    @staticmethod
+    def _get_full_text(element) -> str:
+        # all text in the element, like get_text() of BeautifulSoup
+        if element is None: return None
+        return "".join(element.itertext()).strip()
+
+    def _get_secondary_timestamp(self, secondary_divs: list, label: str) -> int:
+        for div in secondary_divs:
+            if self._get_text(div.find('.//dt')) == label:
+                return int(div.find('.//span').get('data-time'))
+        return None
+
+
+class SelectolaxParser(LxmlParser):
+    """
+    selectolax parser class
+    Extracts the profile and post data with CSS selectors on a lexbor tree (needs the selectolax package),
+    gives the same dicts as the BeautifulSoup extractors of the DiscourseConverter
+    """
+
+    name = "selectolax"
+
+    def __init__(self, website_url: str):
+        if LexborHTMLParser is None:
+            raise ImportError("the selectolax parser needs the selectolax package")
+        self.website_url = website_url
+
+    def parse_profile(self, page: bytes, username: str) -> dict:
+        """
+        Extracts the profile data of a profile html page
+
+        Input:
+        :param page: bytes, the html page
+        :param username: string, username from the filepath, used for empty profiles
+        """
+        tree = LexborHTMLParser(page)
+        profile_dict = {}
+
+        username_h1 = tree.css_first("h1.username")
+        if username_h1 is None:
+            # profile is empty
+            profile_dict['username'] = username
+            return profile_dict
+
+        profile_dict['username'] = self._get_text(username_h1).replace(" ", "")
+        profile_dict['full_name'] = self._get_text(tree.css_first("h2.full-name"))
+        profile_dict['member_status'] = DiscourseConverter.get_member_status_from_title(self._get_text(tree.css_first("h3")))
+
+        secondary_div = tree.css_first("div.secondary")
+        secondary_divs = [] if secondary_div is None else secondary_div.css("div")
+        join_timestamp = self._get_secondary_timestamp(secondary_divs, "Joined")
+        if join_timestamp is not None:
+            profile_dict['join_timestamp'] = join_timestamp
+        last_post_timestamp = self._get_secondary_timestamp(secondary_divs, "Last Post")
+        if last_post_timestamp is not None:
+            profile_dict['last_post_timestamp'] = last_post_timestamp
+
+        return profile_dict
+
+    def parse_post_history(self, page: bytes, username: str) -> list:
+        """
+        Extracts the posts of a post history html page
+
+        Input:
+        :param page: bytes, the html page
+        :param username: string, username from the filepath
+        """
+        tree = LexborHTMLParser(page)
+
+        post_history_list = []
+        for post in tree.css('div[class="user-stream-item item ember-view"]'):
+            topic_a = post.css_first("span.title").css_first("a")
+            text = self._get_text(post.css_first("p.excerpt"))
+
+            post_dict = {}
+            post_dict['username'] = username
+            post_dict['topic'] = self._get_text(topic_a)
+            post_dict['topic_link'] = self.website_url + topic_a.attributes.get('href')
+            post_dict['category'] = self._get_text(post.css_first("span.category-name"))
+            post_dict['post_timestamp'] = int(post.css_first('span[class="relative-date date"]').attributes.get('data-time'))
+            post_dict['text'] = text.strip() if text is not None else None
+
+            post_history_list.append(post_dict)
+
+        return post_history_list
+
+    # ====================================================================================== #
+    # HELPERS:                                                                               #
+    # ====================================================================================== #
+
+    @staticmethod
+    def _get_text(node) -> str:
+        # first text directly in the node, like find(text=True, recursive=False)
+        if node is None: return None
+        for child in node.iter(include_text=True):
+            if child.tag == "-text":
+                return child.text(deep=False)
+        return None
+
+    def _get_secondary_timestamp(self, secondary_divs: list, label: str) -> int:
+        for div in secondary_divs:
+            if self._get_text(div.css_first("dt")) == label:
+                return int(div.css_first("span").attributes.get('data-time'))
+        return None
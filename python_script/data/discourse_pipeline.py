@@ -0,0 +1,78 @@
+from python_script.data.discourse_downloader import DiscourseDownloader
+from python_script.data.discourse_converter import DiscourseConverter
+from python_script.data.discourse_data_loader import DiscourseDataLoader
+from concurrent.futures import ProcessPoolExecutor
+import threading
+
+class DiscoursePipeline():
+    """
+    Discourse pipeline class
+    Downloads, converts and loads the data at the same time:
+    every user is handed to the conversion workers as soon as its pages are written,
+    so the conversion runs while the downloader waits for the website
+    """
+
+    def __init__(self, downloader: DiscourseDownloader, converter: DiscourseConverter, data_loader: DiscourseDataLoader, conversion_workers=1):
+        """
+        Set up the pipeline
+
+        Input:
+        :param downloader: DiscourseDownloader, writes the pages
+        :param converter: DiscourseConverter, converts the pages, reads from the same page store as the downloader
+        :param data_loader: DiscourseDataLoader, writes the dataset file
+        :param conversion_workers: int, number of processes that convert pages at the same time
+        """
+        self.downloader = downloader
+        self.converter = converter
+        self.data_loader = data_loader
+        self.conversion_workers = max(1, conversion_workers)
+
+    def __call__(self, sleep_time: int, overwrite_html=False, overwrite_json=False, overwrite_dataset=False, supress_output=False) -> list:
+        """
+        Download and convert the data of all users and combine it into posts
+
+        Input:
+        :param sleep_time: float, maximum time that the browser waits for the page to update after scrolling
+        :param overwrite_html: boolean, should the html files be overwritten
+        :param overwrite_json: boolean, should the json files be overwritten
+        :param overwrite_dataset: boolean, should the dataset file be overwritten
+        :param supress_output: boolean, should the detailed output print be supressed?
+        """
+
+        # overwrite protection, asked before the download starts
+        if overwrite_json:
+            overwrite_json = self.converter.query_yes_no("Confirm overwriting json data")
+        if overwrite_dataset:
+            overwrite_dataset = self.data_loader.query_yes_no("Confirm overwriting dataset json")
+
+        self.converter._set_up_folders(overwrite_json)
+
+        futures = {}
+        lock = threading.Lock()
+
+        with ProcessPoolExecutor(max_workers=self.conversion_workers) as executor:
+
+            def convert(profile_filepath, post_history_filepath):
+                # called by the download workers, a user is only converted once
+                with lock:
+                    if profile_filepath in futures: return
+                    futures[profile_filepath] = executor.submit(self.converter.convert_user, profile_filepath, post_history_filepath, overwrite_json)
+
+            _, profile_filepaths, post_history_filepaths = self.downloader(sleep_time, overwrite=overwrite_html, supress_output=supress_output, on_user_downloaded=convert)
+
+            # users that were complete in the journal of an earlier crawl are not visited by the downloader
+            for profile_filepath, post_history_filepath in zip(profile_filepaths, post_history_filepaths):
+                if self.downloader.page_store.exists(profile_filepath) and self.downloader.page_store.exists(post_history_filepath):
+                    convert(profile_filepath, post_history_filepath)
+
+            # collect the users in the order of the data loader, sorted by filepath
+            profiles = []
+            post_histories = []
+            for profile_filepath in sorted(futures):
+                profile, post_history = futures[profile_filepath].result()
+                profiles.append(profile)
+                post_histories.append(post_history)
+
+        if not supress_output: print("converted " + str(len(profiles)) + " users")
+
+        return self.data_loader.make_dataset(profiles, post_histories, overwrite=overwrite_dataset)
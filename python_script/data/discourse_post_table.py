@@ -0,0 +1,393 @@
+from collections.abc import Sequence
+import numpy as np
+import copy
+import sys
+
+class DiscoursePostTable(Sequence):
+    """
+    Discourse post table class
+    The posts of a dataset with every profile stored once: a user table with the profile dicts
+    and a post table with the fields of the posts and the integer id of the user of every post.
+    The table is a list of posts, every post is a DiscoursePost: a dict with the fields of the post and of the profile of its user,
+    made when the post is accessed, so post['full_name'] works like with the combined post dicts of the dataset file.
+    A user without posts is one row without post fields.
+    """
+
+    # fields of the profile dicts, 'username' is also a field of the posts
+    profile_keys = ['username', 'full_name', 'member_status', 'join_timestamp', 'last_post_timestamp', 'empty']
+
+    def __init__(self, users: list, posts: list, user_ids: list):
+        """
+        Input:
+        :param users: list of profile dicts, the user table
+        :param posts: list of dicts with the fields of the posts, the post table
+        :param user_ids: list of ints, position of the profile of every post in the user table, -1 for posts without profile
+        """
+        assert len(posts) == len(user_ids)
+        self.users = users
+        self.posts = posts
+        self.user_ids = user_ids
+
+    @classmethod
+    def from_users(cls, profiles: list, post_histories: list) -> 'DiscoursePostTable':
+        """
+        Table of the profiles and the post histories of the converter, the dicts are not copied
+
+        Input:
+        :param profiles: list of profile dicts
+        :param post_histories: list of lists of post dicts, in the same order as the profiles
+        """
+        table = cls([], [], [])
+        table.add_users(profiles, post_histories)
+        return table
+
+    def add_users(self, profiles: list, post_histories: list):
+        """
+        Appends users and their posts to the table, the dicts are not copied
+
+        Input:
+        :param profiles: list of profile dicts
+        :param post_histories: list of lists of post dicts, in the same order as the profiles
+        """
+        assert len(profiles) == len(post_histories)
+        for profile, post_history in zip(profiles, post_histories):
+            user_id = len(self.users)
+            self.users.append(profile)
+
+            # a user without posts is one datapoint with the profile only
+            profile['empty'] = len(post_history) == 0
+            if len(post_history) == 0:
+                self.posts.append({})
+                self.user_ids.append(user_id)
+                continue
+
+            for post in post_history:
+                assert(post['username'] == profile['username'])
+                self.posts.append(post)
+                self.user_ids.append(user_id)
+
+    @classmethod
+    def from_posts(cls, posts: list) -> 'DiscoursePostTable':
+        """
+        Table of posts with the profile fields in every post, e.g. from the dataset file,
+        posts with the same profile fields share one user
+
+        Input:
+        :param posts: list of post dicts
+        """
+        users = []
+        user_positions = {}
+        post_fields = []
+        user_ids = []
+        for post in posts:
+            profile = {key: post[key] for key in cls.profile_keys if key in post}
+            try:
+                user_key = tuple(profile.items())
+                user_id = user_positions.setdefault(user_key, len(users))
+            except TypeError:
+                # profile fields that can not be compared, the post keeps its own user
+                user_id = len(users)
+            if user_id == len(users): users.append(profile)
+
+            # the username stays with the posts, a user without posts has no post fields
+            has_post_fields = any(key not in profile for key in post)
+            post_fields.append({key: value for key, value in post.items() if key not in profile or (key == 'username' and has_post_fields)})
+            user_ids.append(user_id)
+        return cls(users, post_fields, user_ids)
+
+    # ====================================================================================== #
+    # ROWS:                                                                                  #
+    # ====================================================================================== #
+
+    def select(self, rows) -> 'DiscoursePostTable':
+        """
+        Table of some of the posts, in the order of the rows, the post and profile dicts are shared
+
+        Input:
+        :param rows: iterable of ints, positions of the posts
+        """
+        rows = list(rows)
+        return DiscoursePostTable(self.users, [self.posts[row] for row in rows], [self.user_ids[row] for row in rows])
+
+    def sorted_by_post_timestamp(self) -> 'DiscoursePostTable':
+        """
+        the same posts sorted by post time, posts without post time at the end
+        """
+        return self.select(sorted(range(len(self)), key=lambda row: self.get_value(row, 'post_timestamp', sys.maxsize)))
+
+    def get_value(self, row: int, key: str, default=None):
+        """
+        field of a post, from the post or from the profile of its user
+        """
+        fields = self.posts[row]
+        if key in fields: return fields[key]
+        user_id = self.user_ids[row]
+        if user_id >= 0: return self.users[user_id].get(key, default)
+        return default
+
+    def iter_dicts(self):
+        """
+        Yields every post as a new dict with the profile fields, like the posts of the dataset file
+        """
+        for row in range(len(self)):
+            yield self._fields(row)
+
+    # ====================================================================================== #
+    # FIELDS OF THE POSTS:                                                                   #
+    # ====================================================================================== #
+
+    def _fields(self, row: int) -> dict:
+        # new dict with the fields of the post and of its profile
+        fields = self.posts[row]
+        post = dict(fields)
+        user_id = self.user_ids[row]
+        if user_id >= 0:
+            for key, value in self.users[user_id].items():
+                if key not in fields: post[key] = value
+        return post
+
+    def _set(self, row: int, key: str, value):
+        self.posts[row][key] = value
+
+    def _delete(self, row: int, key: str):
+        self._detach(row)
+        self.posts[row].pop(key, None)
+
+    def _detach(self, row: int):
+        # the post gets its own copy of the profile fields
+        user_id = self.user_ids[row]
+        if user_id < 0: return
+        fields = self.posts[row]
+        self.posts[row] = dict(fields, **{key: value for key, value in self.users[user_id].items() if key not in fields})
+        self.user_ids[row] = -1
+
+    # ====================================================================================== #
+    # BUILT IN FUNCTIONS:                                                                    #
+    # ====================================================================================== #
+
+    def __len__(self) -> int:
+        return len(self.posts)
+
+    def __getitem__(self, key: int or slice) -> 'DiscoursePost' or 'DiscoursePostTable':
+        if isinstance(key, slice):
+            return self.select(range(*key.indices(len(self))))
+        if key < 0: key = key + len(self)
+        if not 0 <= key < len(self): raise IndexError("post index out of range")
+        return DiscoursePost(self, key)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield DiscoursePost(self, row)
+
+    def __eq__(self, obj) -> bool:
+        if not isinstance(obj, (Sequence, list)): return NotImplemented
+        return len(self) == len(obj) and all(post == other_post for post, other_post in zip(self, obj))
+
+    def __repr__(self) -> str:
+        return repr(list(self.iter_dicts()))
+
+
+class DiscoursePostOverlay(Sequence):
+    """
+    Discourse post overlay class
+    Posts that are read from shared rows, e.g. of a DiscoursePostTable or of memory mapped columns, with the changed posts on top:
+    a post that is changed gets its own copy in the dict of the changed posts, with its shared row as key (copy on write),
+    so the shared rows are never changed. Selections of the posts share these copies until one of them changes the post again.
+    Subclasses have the array self.rows of the shared rows, read the post of a shared row with _read_row()
+    and one field of a shared row with _read_value().
+    """
+
+    def _read_row(self, shared_row: int) -> dict:
+        raise NotImplementedError
+
+    def _read_value(self, shared_row: int, key: str, default=None):
+        raise NotImplementedError
+
+    def get_value(self, row: int, key: str, default=None):
+        """
+        field of a post, from the post or from the profile of its user, without making the post
+        """
+        shared_row = int(self.rows[row])
+        if shared_row in self.changed: return self.changed[shared_row].get(key, default)
+        return self._read_value(shared_row, key, default)
+
+    def iter_dicts(self):
+        """
+        Yields every post as a new dict with the profile fields
+        """
+        for row in range(len(self)):
+            yield self._fields(row)
+
+    def _select_changed(self, rows: np.ndarray) -> dict:
+        # the selection shares the changed posts, both copy a post before they change it again
+        changed = {}
+        if len(self.changed) > 0:
+            for shared_row in rows.tolist():
+                if shared_row in self.changed:
+                    changed[shared_row] = self.changed[shared_row]
+                    self.owned.discard(shared_row)
+        return changed
+
+    # ====================================================================================== #
+    # FIELDS OF THE POSTS:                                                                   #
+    # ====================================================================================== #
+
+    def _fields(self, row: int) -> dict:
+        shared_row = int(self.rows[row])
+        if shared_row in self.changed: return dict(self.changed[shared_row])
+        return self._read_row(shared_row)
+
+    def _get_own_post(self, row: int) -> dict:
+        # copy on write, the post is copied with the fields of its profile
+        shared_row = int(self.rows[row])
+        if shared_row not in self.owned:
+            self.changed[shared_row] = copy.deepcopy(self._fields(row))
+            self.owned.add(shared_row)
+        return self.changed[shared_row]
+
+    def _set(self, row: int, key: str, value):
+        self._get_own_post(row)[key] = value
+
+    def _delete(self, row: int, key: str):
+        self._get_own_post(row).pop(key, None)
+
+    # ====================================================================================== #
+    # BUILT IN FUNCTIONS:                                                                    #
+    # ====================================================================================== #
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, key: int or slice) -> 'DiscoursePost' or 'DiscoursePostOverlay':
+        if isinstance(key, slice):
+            return self.select(range(*key.indices(len(self))))
+        if key < 0: key = key + len(self)
+        if not 0 <= key < len(self): raise IndexError("post index out of range")
+        return DiscoursePost(self, key)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield DiscoursePost(self, row)
+
+    def __eq__(self, obj) -> bool:
+        if not isinstance(obj, (Sequence, list)): return NotImplemented
+        return len(self) == len(obj) and all(post == other_post for post, other_post in zip(self.iter_dicts(), obj))
+
+    def __repr__(self) -> str:
+        return repr(list(self.iter_dicts()))
+
+
+class DiscoursePostView(DiscoursePostOverlay):
+    """
+    Discourse post view class
+    Posts of a DiscoursePostTable selected by an array of rows, e.g. the posts of a filtered dataset.
+    The table is shared by all views and is not changed through a view, see DiscoursePostOverlay.
+    """
+
+    def __init__(self, table: DiscoursePostTable, rows=None, changed=None):
+        """
+        Input:
+        :param table: DiscoursePostTable, the shared posts
+        :param rows: array of ints, rows of the table, all rows if None
+        :param changed: dict, the changed posts with the row of the table as key, the dicts are shared until they are changed
+        """
+        self.table = table
+        self.rows = np.arange(len(table), dtype=np.int64) if rows is None else np.asarray(rows, dtype=np.int64)
+        self.changed = {} if changed is None else changed
+        self.owned = set() # rows of the table with a changed post that only this view has
+
+    def select(self, rows) -> 'DiscoursePostView':
+        """
+        View of some of the posts, in the order of the rows
+
+        Input:
+        :param rows: iterable of ints, positions of the posts in this view
+        """
+        rows = self.rows[np.asarray(list(rows) if not isinstance(rows, np.ndarray) else rows, dtype=np.int64)]
+        return DiscoursePostView(self.table, rows, self._select_changed(rows))
+
+    def sorted_by_post_timestamp(self) -> 'DiscoursePostView':
+        """
+        the same posts sorted by post time, posts without post time at the end
+        """
+        keys = [self.get_value(row, 'post_timestamp', sys.maxsize) for row in range(len(self))]
+        return self.select(sorted(range(len(self)), key=keys.__getitem__))
+
+    def materialize(self) -> DiscoursePostTable:
+        """
+        Table with copies of the posts of the view, which does not share any dicts with the table of the view
+        """
+        return DiscoursePostTable.from_posts([copy.deepcopy(post) for post in self.iter_dicts()])
+
+    def _read_row(self, shared_row: int) -> dict:
+        return self.table._fields(shared_row)
+
+    def _read_value(self, shared_row: int, key: str, default=None):
+        return self.table.get_value(shared_row, key, default)
+
+    def __deepcopy__(self, memo) -> 'DiscoursePostView':
+        # a view of the same posts, changes of the copy are not seen by this view
+        return self.select(np.arange(len(self)))
+
+
+class DiscoursePost(dict):
+    """
+    One post of a DiscoursePostTable or of a DiscoursePostOverlay, a dict of the fields of the post and of the profile of its user.
+    The dict is made when the post is accessed, changing it also changes the post in its source, so the change is kept:
+    in a table a changed profile field is stored with the post, in an overlay the post is copied on write.
+    """
+
+    __slots__ = ('source', 'row')
+
+    def __init__(self, source: DiscoursePostTable or DiscoursePostOverlay, row: int):
+        super().__init__(source._fields(row))
+        self.source = source
+        self.row = row
+
+    def __setitem__(self, key: str, value):
+        super().__setitem__(key, value)
+        self.source._set(self.row, key, value)
+
+    def __delitem__(self, key: str):
+        super().__delitem__(key)
+        self.source._delete(self.row, key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other) -> 'DiscoursePost':
+        self.update(other)
+        return self
+
+    def setdefault(self, key: str, default=None):
+        if key not in self: self[key] = default
+        return self[key]
+
+    def pop(self, key: str, *default):
+        if key not in self:
+            if len(default) > 0: return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self) -> tuple:
+        if len(self) == 0: raise KeyError("popitem(): dictionary is empty")
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def clear(self):
+        for key in list(self):
+            del self[key]
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> dict:
+        # a copy of one post does not copy the table
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        # pickled as a plain dict
+        return (dict, (dict(self),))
@@ -0,0 +1,115 @@
+import itertools
+import sqlite3
+import threading
+
+class DiscourseTextStore():
+    """
+    Discourse text store class
+    Keeps the full texts of the posts in a sqlite database, keyed by the topic id and the post number,
+    the texts are read one by one when they are needed.
+    Every topic page is stored with its fingerprint, so a topic is only parsed again when its page changed.
+    """
+
+    batch_size = 500 # posts that are written at once
+
+    def __init__(self, filepath: str):
+        """
+        Open the store, the database is created if it does not exist
+
+        Input:
+        :param filepath: string, location of the sqlite database
+        """
+        self.filepath = filepath
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(filepath, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS topics (
+                                       topic_id INTEGER PRIMARY KEY,
+                                       fingerprint TEXT NOT NULL,
+                                       posts INTEGER NOT NULL)""")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS posts (
+                                       topic_id INTEGER NOT NULL,
+                                       post_number INTEGER NOT NULL,
+                                       username TEXT,
+                                       text TEXT,
+                                       PRIMARY KEY (topic_id, post_number))""")
+        self.connection.commit()
+
+        # the topics are written with a connection of their own, the texts can be read while a topic is written
+        self.write_lock = threading.Lock()
+        self.write_connection = sqlite3.connect(filepath, check_same_thread=False)
+        self.write_connection.execute("PRAGMA synchronous=NORMAL")
+
+    def close(self):
+        self.write_connection.close()
+        self.connection.close()
+
+    # ====================================================================================== #
+    # WRITE:                                                                                 #
+    # ====================================================================================== #
+
+    def write_topic(self, topic_id: int, fingerprint: str, posts) -> int:
+        """
+        Replace the posts of a topic. The posts are written in batches while they are read,
+        in one transaction of the write connection, so only a batch of posts is in memory
+        and reading texts is not blocked while a topic page is parsed, the readers see the old posts until the commit
+
+        Input:
+        :param topic_id: int, id of the topic
+        :param fingerprint: string, fingerprint of the topic page the posts are extracted from
+        :param posts: iterable of post dicts with 'post_number', 'username' and 'text', e.g. a generator
+
+        Output:
+        number of posts
+        """
+        posts = iter(posts)
+        number_of_posts = 0
+
+        with self.write_lock:
+            try:
+                # the topic is recorded with its posts in one transaction
+                self.write_connection.execute("DELETE FROM topics WHERE topic_id = ?", (topic_id,))
+                self.write_connection.execute("DELETE FROM posts WHERE topic_id = ?", (topic_id,))
+                while True:
+                    rows = [(topic_id, post['post_number'], post.get('username'), post.get('text')) for post in itertools.islice(posts, self.batch_size)]
+                    if len(rows) == 0: break
+                    self.write_connection.executemany("INSERT OR REPLACE INTO posts (topic_id, post_number, username, text) VALUES (?, ?, ?, ?)", rows)
+                    number_of_posts = number_of_posts + len(rows)
+                self.write_connection.execute("INSERT INTO topics (topic_id, fingerprint, posts) VALUES (?, ?, ?)", (topic_id, fingerprint, number_of_posts))
+                self.write_connection.commit()
+            except BaseException:
+                # a topic page that could not be read keeps its old posts
+                self.write_connection.rollback()
+                raise
+
+        return number_of_posts
+
+    # ====================================================================================== #
+    # READ:                                                                                  #
+    # ====================================================================================== #
+
+    def is_current(self, topic_id: int, fingerprint: str) -> bool:
+        """
+        are the posts of a topic stored from the page with this fingerprint
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT fingerprint FROM topics WHERE topic_id = ?", (topic_id,)).fetchone()
+        return row is not None and row[0] == fingerprint
+
+    def get_text(self, topic_id: int, post_number: int) -> str:
+        """
+        get the full text of a post, None if it is not stored
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT text FROM posts WHERE topic_id = ? AND post_number = ?", (topic_id, post_number)).fetchone()
+        return None if row is None else row[0]
+
+    def get_summary(self) -> dict:
+        """
+        get the number of topics and posts
+        """
+        with self.lock:
+            topics, posts = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(posts), 0) FROM topics").fetchone()
+        return {'topics': topics, 'posts': posts}
@@ -1,22 +1,48 @@
 import unittest
-from python_script.test.test_discourse_downloader import TestDiscourseDownloader
+from python_script.test.test_discourse_downloader import TestDiscourseDownloader, TestDiscourseScrolling, TestDiscoursePostHistoryMerge
 from python_script.test.test_discourse_converter import TestDiscourseConverter
 from python_script.test.test_discourse_data_loader import TestDiscourseDataLoader
 from python_script.test.test_discourse_dataset import TestDiscourseDataset
+from python_script.test.test_discourse_api_client import TestDiscourseApiClient
+from python_script.test.test_discourse_async_downloader import TestAsyncDiscourseDownloader
+from python_script.test.test_discourse_crawl_journal import TestDiscourseCrawlJournal
+from python_script.test.test_discourse_page_store import TestDiscoursePageStore
+from python_script.test.test_discourse_pipeline import TestDiscoursePipeline
+from python_script.test.test_discourse_crawl_metrics import TestDiscourseCrawlMetrics
+from python_script.test.test_discourse_conversion_manifest import TestDiscourseConversionManifest
+from python_script.test.test_discourse_columnar_store import TestDiscourseColumnarStore
+from python_script.test.test_discourse_text_store import TestDiscourseTextStore
+from python_script.test.test_discourse_json_writer import TestDiscourseJsonWriter
+from python_script.test.test_discourse_dataset_cache import TestDiscourseDatasetCache
+from python_script.test.test_discourse_post_table import TestDiscoursePostTable
+from python_script.test.test_discourse_columnar_posts import TestDiscourseColumnarPosts
+from python_script.test.test_benchmark_converter import TestBenchmarkConverter
 
 
 def all_tests_suite():
     suite = unittest.TestSuite()
     
     suite.addTest(TestDiscourseDownloader('test_get_html_from_url'))
+    suite.addTest(TestDiscourseDownloader('test_scroll_time_summary'))
     suite.addTest(TestDiscourseDownloader('test_download_user_data'))
+    suite.addTest(TestDiscourseDownloader('test_download_user_data_with_workers'))
     suite.addTest(TestDiscourseDownloader('test_overwriting'))
     suite.addTest(TestDiscourseDownloader('test_get_user_links'))
     suite.addTest(TestDiscourseDownloader('test_get_user_links'))
+    suite.addTest(TestDiscourseScrolling('test_running_request'))
+    suite.addTest(TestDiscoursePostHistoryMerge('test_merge_post_histories'))
 
     suite.addTest(TestDiscourseConverter('test_convert_user_profiles'))
     suite.addTest(TestDiscourseConverter('test_convert_post_histories'))
     suite.addTest(TestDiscourseConverter('test_overwriting'))
+    suite.addTest(TestDiscourseConverter('test_convert_with_workers'))
+    suite.addTest(TestDiscourseConverter('test_call_with_workers'))
+    suite.addTest(TestDiscourseConverter('test_convert_user'))
+    suite.addTest(TestDiscourseConverter('test_single_pass_extraction'))
+    suite.addTest(TestDiscourseConverter('test_strained_parsing'))
+    suite.addTest(TestDiscourseConverter('test_parser_backends'))
+    suite.addTest(TestDiscourseConverter('test_streaming_post_history'))
+    suite.addTest(TestDiscourseConverter('test_topic_posts'))
     suite.addTest(TestDiscourseConverter('test_get_username_from_profile_filepath'))
     suite.addTest(TestDiscourseConverter('test_get_username'))
     suite.addTest(TestDiscourseConverter('test_get_full_name'))
@@ -31,8 +57,71 @@ def all_tests_suite():
     suite.addTest(TestDiscourseConverter('test_get_post_text'))
     
     suite.addTest(TestDiscourseDataLoader('test_call'))
+    suite.addTest(TestDiscourseDataLoader('test_parallel_load'))
     
     suite.addTest(TestDiscourseDataset('test_call'))
+
+    suite.addTest(TestDiscourseApiClient('test_get_user_links'))
+    suite.addTest(TestDiscourseApiClient('test_get_profile'))
+    suite.addTest(TestDiscourseApiClient('test_get_user_actions'))
+    suite.addTest(TestDiscourseApiClient('test_get_topic_posts'))
+    suite.addTest(TestDiscourseApiClient('test_iso_to_timestamp'))
+    suite.addTest(TestDiscourseApiClient('test_download_and_convert'))
+    suite.addTest(TestDiscourseApiClient('test_paged_user_list'))
+    suite.addTest(TestDiscourseApiClient('test_resume_download'))
+    suite.addTest(TestDiscourseApiClient('test_incremental_download'))
+
+    suite.addTest(TestAsyncDiscourseDownloader('test_download'))
+    suite.addTest(TestAsyncDiscourseDownloader('test_failed_pages'))
+    suite.addTest(TestAsyncDiscourseDownloader('test_token_bucket'))
+
+    suite.addTest(TestDiscourseCrawlJournal('test_pending_profile_links'))
+    suite.addTest(TestDiscourseCrawlJournal('test_retries'))
+    suite.addTest(TestDiscourseCrawlJournal('test_reopen'))
+
+    suite.addTest(TestDiscoursePageStore('test_directory_overwriting'))
+    suite.addTest(TestDiscoursePageStore('test_packed_overwriting'))
+    suite.addTest(TestDiscoursePageStore('test_packed_compaction'))
+    suite.addTest(TestDiscoursePageStore('test_packed_deduplication'))
+    suite.addTest(TestDiscoursePageStore('test_convert_from_packed_store'))
+
+    suite.addTest(TestDiscoursePipeline('test_call'))
+    suite.addTest(TestDiscoursePipeline('test_resume'))
+
+    suite.addTest(TestDiscourseCrawlMetrics('test_summary'))
+    suite.addTest(TestDiscourseCrawlMetrics('test_recent_requests'))
+    suite.addTest(TestDiscourseCrawlMetrics('test_prometheus'))
+    suite.addTest(TestDiscourseCrawlMetrics('test_download_metrics'))
+
+    suite.addTest(TestDiscourseConversionManifest('test_is_current'))
+    suite.addTest(TestDiscourseConversionManifest('test_convert_changed_pages'))
+    suite.addTest(TestDiscourseConversionManifest('test_packed_store_fingerprint'))
+
+    suite.addTest(TestDiscourseColumnarStore('test_write_and_read'))
+    suite.addTest(TestDiscourseColumnarStore('test_converter_output'))
+
+    suite.addTest(TestDiscourseTextStore('test_write_topic'))
+    suite.addTest(TestDiscourseTextStore('test_full_texts'))
+
+    suite.addTest(TestDiscourseJsonWriter('test_write'))
+    suite.addTest(TestDiscourseJsonWriter('test_multi_record_file'))
+    suite.addTest(TestDiscourseJsonWriter('test_atomic_write'))
+
+    suite.addTest(TestDiscourseDatasetCache('test_write_and_open'))
+    suite.addTest(TestDiscourseDatasetCache('test_invalidation'))
+
+    suite.addTest(TestDiscoursePostTable('test_from_users'))
+    suite.addTest(TestDiscoursePostTable('test_from_posts'))
+    suite.addTest(TestDiscoursePostTable('test_change_post'))
+    suite.addTest(TestDiscoursePostTable('test_dataset'))
+    suite.addTest(TestDiscoursePostTable('test_view'))
+    suite.addTest(TestDiscoursePostTable('test_filtered_dataset'))
+    suite.addTest(TestDiscoursePostTable('test_filtered_cache'))
+
+    suite.addTest(TestDiscourseColumnarPosts('test_posts'))
+    suite.addTest(TestDiscourseColumnarPosts('test_filters'))
+
+    suite.addTest(TestBenchmarkConverter('test_run'))
     
     return suite
 
@@ -0,0 +1,26 @@
+import unittest
+from python_script.benchmark.benchmark_converter import run, print_result
+import io
+import contextlib
+
+class TestBenchmarkConverter(unittest.TestCase):
+
+    def test_run(self):
+        # smoke test with a few small pages
+        result = run(users=2, posts_per_user=3, text_length=20, parsers=["html.parser"], repeat=1)
+        self.assertEqual(list(result['end_to_end'].keys()), ["html.parser x1"])
+        self.assertEqual(list(result['extractors']["html.parser"].keys()), ["profile", "post_history"])
+        self.assertEqual(list(result['fields'].keys()), ["get_username", "get_full_name", "get_member_status", "get_join_timestamp", "get_last_post_timestamp",
+                                                         "get_post_topic", "get_post_topic_link", "get_post_category", "get_post_timestamp", "get_post_text"])
+        for field_time in result['fields'].values():
+            self.assertGreater(field_time, 0)
+
+        # the comparison with an earlier run is printed for every field
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            print_result(result, previous=result)
+        self.assertIn("get_post_text", output.getvalue())
+        self.assertIn("1.00x", output.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
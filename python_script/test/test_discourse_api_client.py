@@ -0,0 +1,273 @@
+import unittest
+from python_script.data.discourse_api_client import DiscourseApiClient
+from python_script.data.discourse_downloader import DiscourseDownloader
+from python_script.data.discourse_converter import DiscourseConverter
+from python_script.data.discourse_crawl_journal import DiscourseCrawlJournal
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import threading
+import os
+import shutil
+import json
+from pathlib import Path
+
+
+def make_discourse_handler(json_folder):
+    """
+    make a request handler that answers like the json endpoints of a Discourse website
+    """
+    class DiscourseHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # keep connections alive
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+
+            if url.path == "/directory_items.json":
+                filename = "directory_items.json" if query.get('page', ['0'])[0] == "0" else None
+                empty = {'directory_items': []}
+            elif url.path == "/user_actions.json":
+                # the pages after the first page of Broken_Pages fail
+                filename = "user_actions.json" if query.get('offset', ['0'])[0] == "0" and query['username'][0] in ["Matt_Cliffe", "Broken_Pages"] else None
+                empty = None if query['username'][0] == "Broken_Pages" else {'user_actions': []}
+            elif url.path == "/site.json":
+                filename = "site.json"
+            elif url.path.startswith("/u/"):
+                filename = url.path[len("/u/"):]
+            elif url.path.startswith("/t/"):
+                # /t/{topic_id}.json and /t/{topic_id}/posts.json
+                filename = "topic_" + url.path[len("/t/"):].replace(".json", "").replace("/", "_") + ".json"
+                empty = None
+            else:
+                filename = None
+                empty = None
+
+            if url.path == "/user_actions.json" and query['username'][0] == "Broken_Json":
+                # a truncated answer
+                body = b'{"user_actions": ['
+            elif filename is not None and Path(os.path.join(json_folder, filename)).is_file():
+                with open(os.path.join(json_folder, filename), 'rb') as json_file:
+                    body = json_file.read()
+            elif empty is not None:
+                body = json.dumps(empty).encode("utf-8")
+            else:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return DiscourseHandler
+
+
+class TestDiscourseApiClient(unittest.TestCase):
+
+    def setUp(self):
+
+        def set_up_folders(self):
+            # testing folder
+            self.testing_folder = os.path.join("python_script","test")
+
+            # folder with the prepared json files
+            self.json_folder = os.path.join(self.testing_folder, "test_discourse_api_client")
+
+            # temporary folder
+            self.temp_folder = os.path.join(self.testing_folder, "temp")
+
+        def start_server(self):
+            # local stand-in for the discourse website
+            self.server = ThreadingHTTPServer(("127.0.0.1", 0), make_discourse_handler(self.json_folder))
+            self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+            self.server_thread.start()
+            self.website_url = "http://127.0.0.1:" + str(self.server.server_address[1])
+
+        set_up_folders(self)
+        start_server(self)
+
+        self.client = DiscourseApiClient(self.website_url, retries=0)
+
+    def test_get_user_links(self):
+        user_links = self.client.get_user_links()
+        self.assertEqual(user_links, ["/u/Matt_Cliffe", "/u/Lorraine_Fossi"])
+
+    def test_get_profile(self):
+        profile = self.client.get_profile("Matt_Cliffe")
+        self.assertEqual(profile['username'], "Matt_Cliffe")
+        self.assertIsNone(self.client.get_profile("Unknown_User"))
+
+    def test_get_user_actions(self):
+        user_actions = self.client.get_user_actions("Matt_Cliffe")
+        self.assertEqual(len(user_actions), 2)
+        self.assertEqual([action['category_name'] for action in user_actions], ["Discussion", "Admin"])
+        self.assertEqual(self.client.get_user_actions("Lorraine_Fossi"), [])
+
+        # a post history with a failed page is no post history
+        self.assertIsNone(self.client.get_user_actions("Broken_Pages"))
+        self.assertIsNone(self.client.get_user_actions("Broken_Json"))
+
+        # the posts are not written without their categories, the categories are requested again
+        client = DiscourseApiClient(self.website_url + "/missing", retries=0)
+        self.assertIsNone(client.get_user_actions("Matt_Cliffe"))
+        self.assertIsNone(client.category_names)
+        client.website_url = self.website_url
+        self.assertEqual([action['category_name'] for action in client.get_user_actions("Matt_Cliffe")], ["Discussion", "Admin"])
+
+    def test_get_topic_posts(self):
+        # the posts that are not part of the topic endpoint are requested by their ids
+        posts = self.client.get_topic_posts(4190)
+        self.assertEqual([post['post_number'] for post in posts], [1, 221, 222])
+        self.assertEqual(posts[2]['username'], "Matt_Cliffe")
+        self.assertIsNone(self.client.get_topic_posts(1))
+
+    def test_iso_to_timestamp(self):
+        self.assertEqual(DiscourseApiClient.iso_to_timestamp("2019-02-20T19:43:46.355Z"), 1550691826355)
+        self.assertIsNone(DiscourseApiClient.iso_to_timestamp(None))
+
+    def test_download_and_convert(self):
+        # download with the api backend
+        html_folder = os.path.join(self.temp_folder, "html_files")
+        downloader = DiscourseDownloader(self.website_url, dataset_folder=html_folder, workers=2, backend="api")
+        downloader.user_profile_filepath_list = []
+        downloader.user_post_history_filepath_list = []
+        _, profiles, post_histories = downloader(sleep_time=0, supress_output=True)
+
+        self.assertEqual(profiles, [os.path.join(html_folder, "profiles", "Matt_Cliffe.json"), os.path.join(html_folder, "profiles", "Lorraine_Fossi.json")])
+        for file in profiles + post_histories:
+            self.assertTrue(Path(file).is_file())
+
+        # convert the downloaded json files
+        json_folder = os.path.join(self.temp_folder, "json_files")
+        converter = DiscourseConverter(self.website_url, dataset_folder=json_folder)
+        converter.user_profile_json_filepath_list = []
+        converter.user_post_history_json_filepath_list = []
+        profiles_json, post_histories_json = converter(profiles, post_histories, supress_output=True)
+
+        with open(profiles_json[0]) as file:
+            profile = json.load(file)
+        self.assertEqual(profile, {'username': "Matt_Cliffe",
+                                   'full_name': "Matt Cliffe",
+                                   'member_status': "Member",
+                                   'join_timestamp': 1550691826355,
+                                   'last_post_timestamp': 1556527466920})
+
+        with open(post_histories_json[0]) as file:
+            post_history = json.load(file)
+        self.assertEqual(post_history[1], {'username': "Matt_Cliffe",
+                                           'topic': "Joining",
+                                           'topic_link': self.website_url + "/t/joining-space/12505/1",
+                                           'category': "Admin",
+                                           'post_timestamp': 1550859165213,
+                                           'text': "Lorem ipsum dolor sit amet"})
+        self.assertEqual(post_history[0]['text'], "Don’t worry, I’ll make sure to stick to cutting wood and plastic")
+
+    def test_paged_user_list(self):
+        html_folder = os.path.join(self.temp_folder, "html_files")
+        # the browser backend scrolls through the user list, unless the paged user list is selected
+        self.assertFalse(DiscourseDownloader(self.website_url, dataset_folder=html_folder).paged_user_list)
+        downloader = DiscourseDownloader(self.website_url, dataset_folder=html_folder, paged_user_list=True)
+        downloader._set_up_folders(overwrite=False)
+        downloader._download_user_list(sleep_time=0, supress_output=True)
+
+        # index with one link per line
+        with open(downloader.user_list_filepath) as file:
+            self.assertEqual(file.read(), "/u/Matt_Cliffe\n/u/Lorraine_Fossi\n")
+        self.assertEqual(list(downloader._iter_user_links(downloader.user_list_filepath)), ["/u/Matt_Cliffe", "/u/Lorraine_Fossi"])
+
+        # saved pages are not requested again
+        page_filepath = os.path.join(html_folder, "user_list", "page_00000.json")
+        with open(page_filepath) as file:
+            page = json.load(file)
+        page['directory_items'] = page['directory_items'][:1]
+        with open(page_filepath, 'w') as file:
+            json.dump(page, file)
+        os.remove(downloader.user_list_filepath)
+
+        downloader._download_user_list(sleep_time=0, supress_output=True)
+        self.assertEqual(list(downloader._iter_user_links(downloader.user_list_filepath)), ["/u/Matt_Cliffe"])
+
+    def test_resume_download(self):
+        html_folder = os.path.join(self.temp_folder, "html_files")
+        downloader = DiscourseDownloader(self.website_url, dataset_folder=html_folder, backend="api")
+        downloader.user_profile_filepath_list = []
+        downloader.user_post_history_filepath_list = []
+        _, profiles, post_histories = downloader(sleep_time=0, supress_output=True)
+
+        # pretend the crawl stopped before the second user
+        journal = DiscourseCrawlJournal(downloader.crawl_journal_filepath)
+        journal.connection.execute("UPDATE pages SET state = ? WHERE profile_link = ?", (DiscourseCrawlJournal.PENDING, "/u/Lorraine_Fossi"))
+        journal.connection.commit()
+        journal.close()
+        os.remove(profiles[1])
+        os.remove(post_histories[1])
+        os.remove(downloader.user_list_filepath)
+
+        # the crawl continues with the pending user, without the user list
+        downloader.user_list_filepath = None
+        downloader.user_profile_filepath_list = []
+        downloader.user_post_history_filepath_list = []
+        downloader._start_api_client()
+        downloader._download_user_data(sleep_time=0, supress_output=True)
+
+        self.assertEqual(downloader.user_profile_filepath_list, profiles)
+        self.assertTrue(Path(profiles[1]).is_file())
+        self.assertTrue(Path(post_histories[1]).is_file())
+
+    def test_incremental_download(self):
+        html_folder = os.path.join(self.temp_folder, "html_files")
+        downloader = DiscourseDownloader(self.website_url, dataset_folder=html_folder, backend="api")
+        downloader.user_profile_filepath_list = []
+        downloader.user_post_history_filepath_list = []
+        _, _, post_histories = downloader(sleep_time=0, supress_output=True)
+
+        # newest post is remembered
+        with open(downloader.crawl_state_filepath) as file:
+            self.assertEqual(json.load(file)['Matt_Cliffe'], 1556527466920)
+
+        # pretend the last download only had the older post
+        with open(post_histories[0]) as file:
+            user_actions = json.load(file)
+        with open(post_histories[0], 'w') as file:
+            json.dump(user_actions[1:], file)
+        with open(downloader.crawl_state_filepath, 'w') as file:
+            json.dump({'Matt_Cliffe': 1550859165213}, file)
+
+        # pretend the second user joined after the last download
+        journal = DiscourseCrawlJournal(downloader.crawl_journal_filepath)
+        journal.connection.execute("DELETE FROM pages WHERE profile_link = ?", ("/u/Lorraine_Fossi",))
+        journal.connection.commit()
+        journal.close()
+        os.remove(post_histories[1])
+        with open(downloader.user_list_filepath, 'w') as file:
+            file.write("/u/Matt_Cliffe\n")
+
+        downloader.user_profile_filepath_list = []
+        downloader.user_post_history_filepath_list = []
+        _, _, incremental_post_histories = downloader(sleep_time=0, supress_output=True, incremental=True)
+        with open(post_histories[0]) as file:
+            self.assertEqual(json.load(file), user_actions)
+
+        # the new user is found in the user list that is downloaded again
+        self.assertEqual(incremental_post_histories, post_histories)
+        self.assertTrue(Path(post_histories[1]).is_file())
+        with open(downloader.crawl_state_filepath) as file:
+            self.assertEqual(json.load(file)['Matt_Cliffe'], 1556527466920)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+        # remove contents of download folder
+        if os.path.isdir(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+from python_script.data.discourse_async_downloader import AsyncDiscourseDownloader, TokenBucket
+from python_script.data.discourse_converter import DiscourseConverter
+from python_script.test.test_discourse_api_client import make_discourse_handler
+from http.server import ThreadingHTTPServer
+import threading
+import asyncio
+import aiohttp
+import time
+import os
+import shutil
+import json
+from pathlib import Path
+
+
+def make_flaky_discourse_handler(json_folder):
+    """
+    make a request handler that answers every path with 429 the first time
+    """
+    class FlakyDiscourseHandler(make_discourse_handler(json_folder)):
+        failed_paths = set()
+        lock = threading.Lock()
+
+        def do_GET(self):
+            with self.lock:
+                first_request = self.path not in self.failed_paths
+                self.failed_paths.add(self.path)
+            if first_request:
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            super().do_GET()
+
+    return FlakyDiscourseHandler
+
+
+class TestAsyncDiscourseDownloader(unittest.TestCase):
+
+    def setUp(self):
+
+        def set_up_folders(self):
+            # testing folder
+            self.testing_folder = os.path.join("python_script","test")
+
+            # folder with the prepared json files
+            self.json_folder = os.path.join(self.testing_folder, "test_discourse_api_client")
+
+            # temporary folder
+            self.temp_folder = os.path.join(self.testing_folder, "temp")
+            self.download_folder = os.path.join(self.temp_folder, "html_files")
+
+        def start_server(self):
+            # local stand-in for the discourse website, every first request is rate limited
+            self.server = ThreadingHTTPServer(("127.0.0.1", 0), make_flaky_discourse_handler(self.json_folder))
+            self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+            self.server_thread.start()
+            self.website_url = "http://127.0.0.1:" + str(self.server.server_address[1])
+
+        set_up_folders(self)
+        start_server(self)
+
+        self.downloader = AsyncDiscourseDownloader(self.website_url, dataset_folder=self.download_folder, backoff=0.01)
+
+    def test_download(self):
+        user_list, profiles, post_histories = self.downloader(supress_output=True)
+
+        with open(user_list) as file:
+            self.assertEqual(json.load(file), ["/u/Matt_Cliffe", "/u/Lorraine_Fossi"])
+        self.assertEqual(profiles, [os.path.join(self.download_folder, "profiles", "Matt_Cliffe.json"), os.path.join(self.download_folder, "profiles", "Lorraine_Fossi.json")])
+        for file in profiles + post_histories:
+            self.assertTrue(Path(file).is_file())
+
+        # the files can be converted like the files of the api backend
+        converter = DiscourseConverter(self.website_url, dataset_folder=os.path.join(self.temp_folder, "json_files"))
+        converter.user_profile_json_filepath_list = []
+        converter.user_post_history_json_filepath_list = []
+        _, post_histories_json = converter(profiles, post_histories, supress_output=True)
+
+        with open(post_histories_json[0]) as file:
+            post_history = json.load(file)
+        self.assertEqual([post['category'] for post in post_history], ["Discussion", "Admin"])
+
+    def test_failed_pages(self):
+        # a post history with a failed page is no post history
+        async def get_user_actions(username):
+            self.downloader.rate_limiters = {}
+            self.downloader.category_names = {}
+            self.downloader.in_flight = asyncio.Semaphore(1)
+            async with aiohttp.ClientSession() as session:
+                return await self.downloader._get_user_actions(session, username)
+        self.assertEqual(len(asyncio.run(get_user_actions("Matt_Cliffe"))), 2)
+        self.assertIsNone(asyncio.run(get_user_actions("Broken_Pages")))
+
+        # an answer that is no json is retried and then a failed request
+        self.downloader.retries = 1
+        self.downloader.backoff = 0
+        self.assertIsNone(asyncio.run(get_user_actions("Broken_Json")))
+
+        # the posts are not written without their categories
+        downloader = AsyncDiscourseDownloader(self.website_url + "/missing", dataset_folder=self.download_folder, retries=0)
+        async def get_category_names():
+            downloader.rate_limiters = {}
+            downloader.category_names = None
+            downloader.in_flight = asyncio.Semaphore(1)
+            async with aiohttp.ClientSession() as session:
+                return await downloader._get_category_names(session)
+        with self.assertRaises(ConnectionError):
+            asyncio.run(get_category_names())
+        # the failed request is not remembered
+        self.assertIsNone(downloader.category_names)
+
+        # an incomplete user list is not written
+        downloader = AsyncDiscourseDownloader(self.website_url + "/missing", dataset_folder=self.download_folder, retries=0)
+        with self.assertRaises(ConnectionError):
+            downloader(supress_output=True)
+        self.assertFalse(Path(os.path.join(self.download_folder, "user_list.json")).is_file())
+
+    def test_token_bucket(self):
+        async def take_tokens(bucket, number_of_tokens):
+            for _ in range(number_of_tokens):
+                await bucket.acquire()
+
+        # one token at once, then 50 tokens per second
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        asyncio.run(take_tokens(bucket, 6))
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+        # remove contents of download folder
+        if os.path.isdir(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
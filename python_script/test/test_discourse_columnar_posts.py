@@ -0,0 +1,88 @@
+import unittest
+from python_script.data.discourse_columnar_posts import DiscourseColumnarPosts
+from python_script.data.discourse_post_table import DiscoursePostTable
+from python_script.data.discourse_dataset import DiscourseDataset
+from datetime import datetime
+import numpy as np
+import copy
+
+class TestDiscourseColumnarPosts(unittest.TestCase):
+
+    def setUp(self):
+        profiles = [{'username': "John_Doe", 'full_name': "John Doe", 'member_status': "Member", 'join_timestamp': 1550691826355, 'last_post_timestamp': 1609459200000},
+                    {'username': "Jane_Doe", 'full_name': None},
+                    {'username': "John_Smith", 'full_name': "John Smith", 'member_status': "Not Member", 'join_timestamp': 1577836800000}]
+        topics = ["Big Topic", "Big Games", "Joining", "Laser Cutter"]
+        categories = ["Admin", "Games", "Discussion"]
+        post_histories = [[], [], []]
+        for index in range(60):
+            username = ["John_Doe", "John_Smith"][index % 2]
+            post_histories[0 if username == "John_Doe" else 2].append({'username': username,
+                                                                        'topic': topics[index % 4],
+                                                                        'topic_link': "link.com/t/" + str(index),
+                                                                        'category': categories[index % 3],
+                                                                        'post_timestamp': 1577836800000 + (index * 7919 % 60) * 86400000,
+                                                                        'text': ["Admin 123", "game 1", "Grüße aus der Werkstatt", "", None][index % 5]})
+        self.table = DiscoursePostTable.from_users(profiles, post_histories)
+
+    def test_posts(self):
+        columns = DiscourseColumnarPosts.from_posts(self.table)
+
+        # the same dicts as the table
+        self.assertEqual(columns, list(self.table.iter_dicts()))
+        self.assertEqual([list(post.keys()) for post in columns], [list(post.keys()) for post in self.table.iter_dicts()])
+        self.assertEqual(columns[-1], {'username': "John_Smith", 'full_name': "John Smith", 'member_status': "Not Member", 'join_timestamp': 1577836800000, 'empty': False,
+                                       'topic': "Laser Cutter", 'topic_link': "link.com/t/59", 'category': "Discussion", 'post_timestamp': 1577836800000 + (59 * 7919 % 60) * 86400000, 'text': None})
+        self.assertEqual(columns[30], {'username': "Jane_Doe", 'full_name': None, 'empty': True})
+
+        # compact columns
+        self.assertEqual(columns.posts['post_timestamp'].values.dtype, np.int64)
+        self.assertEqual(columns.posts['category'].dictionary, ["Admin", "Discussion", "Games"])
+        self.assertEqual(columns.users['member_status'].codes.tolist(), [0, -1, 1])
+        self.assertIs(columns[2:10].posts['text'].data, columns.posts['text'].data)
+
+        # characters that change their length in lower case
+        posts = [{'username': "John_Doe", 'topic': "Trip", 'text': "İzmir"}, {'username': "John_Doe", 'topic': "Trip", 'text': "Laser"}]
+        self.assertEqual([post['text'] for post in DiscourseColumnarPosts.from_posts(posts).search("laser", "İzmir".lower())], ["İzmir", "Laser"])
+
+        # fields that are no columns
+        with self.assertRaises(ValueError):
+            DiscourseColumnarPosts.from_posts([{'username': "John_Doe", 'likes': 3}])
+
+    def test_filters(self):
+        dataset = DiscourseDataset("link.com", posts=copy.deepcopy(self.table))
+        columnar_dataset = DiscourseDataset("link.com", posts=copy.deepcopy(self.table), engine="columnar")
+        self.assertIsInstance(columnar_dataset.posts, DiscourseColumnarPosts)
+        self.assertEqual(columnar_dataset, dataset)
+
+        # the same posts as the filters of the table
+        filters = [{'username': "John_Doe"},
+                   {'username': ["John_Smith", "Jane_Doe"]},
+                   {'member_status': "Member", 'category': ["Games", "Admin"]},
+                   {'topic': "Big Games"},
+                   {'topic_link': "link.com/t/1"},
+                   {'text': ["game 1", "Admin 123"]},
+                   {'post_after': datetime(2020, 1, 20), 'post_before': datetime(2020, 2, 10)},
+                   {'join_after': datetime(2019, 6, 1)},
+                   {'last_post_before': datetime(2021, 1, 2)},
+                   {'category': "Admin", 'post_before': datetime(2020, 2, 1), 'username': "John_Doe"}]
+        for search in filters:
+            with self.subTest(search=search):
+                self.assertEqual(columnar_dataset(**search), dataset(**search))
+                self.assertGreater(len(columnar_dataset(**search)), 0)
+                self.assertIsInstance(columnar_dataset(**search).posts, DiscourseColumnarPosts)
+        self.assertEqual(len(columnar_dataset(username="Nobody")), 0)
+
+        # searches and distinct values
+        for strings in [["game"], ["GRÜSSE", "grüße"], ["smith", "werkstatt"], ["nothing"]]:
+            with self.subTest(strings=strings):
+                self.assertEqual(columnar_dataset.search(*strings), dataset.search(*strings))
+        self.assertEqual(len(columnar_dataset.search("game")), 21)
+        for key in ['username', 'full_name', 'category', 'post_timestamp', 'text', 'empty', 'likes']:
+            with self.subTest(key=key):
+                self.assertEqual(sorted(columnar_dataset[key], key=str), sorted(dataset[key], key=str))
+        self.assertEqual(sorted(columnar_dataset(username="John_Smith")['category']), ["Admin", "Discussion", "Games"])
+
+
+if __name__ == '__main__':
+    unittest.main()
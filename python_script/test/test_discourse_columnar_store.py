@@ -0,0 +1,81 @@
+import unittest
+from python_script.data.discourse_columnar_store import DiscourseColumnarStore
+from python_script.data.discourse_converter import DiscourseConverter
+from python_script.data.discourse_data_loader import DiscourseDataLoader
+import numpy as np
+import os
+import shutil
+import copy
+
+class TestDiscourseColumnarStore(unittest.TestCase):
+
+    def setUp(self):
+
+        def set_up_folders(self):
+            # testing folder
+            self.testing_folder = os.path.join("python_script","test")
+
+            # folder with the prepared html files
+            self.html_folder = os.path.join(self.testing_folder, "test_discourse_converter", "html_files")
+
+            # temporary folder
+            self.temp_folder = os.path.join(self.testing_folder, "temp")
+            os.makedirs(self.temp_folder)
+
+        set_up_folders(self)
+        self.store = DiscourseColumnarStore(os.path.join(self.temp_folder, "columnar"))
+
+        post = {'username': "John_Doe", 'topic': "Joining", 'topic_link': "link.com/t/joining/1", 'category': "Admin", 'post_timestamp': 1550859165213, 'text': "Grüße"}
+        self.users = [({'username': "John_Doe", 'full_name': "John Doe", 'member_status': "Member", 'join_timestamp': 1550691826355, 'last_post_timestamp': 1556527466920},
+                       [post, dict(post, category="Discussion", text=None)]),
+                      ({'username': "Jane_Doe", 'full_name': None}, []),
+                      ({'username': "John_Smith", 'full_name': "John Smith", 'member_status': "Not Member"},
+                       [dict(post, username="John_Smith", post_timestamp=None, text="")])]
+
+    def test_write_and_read(self):
+        self.store.write(iter(copy.deepcopy(self.users)), batch_size=2)
+        self.assertTrue(self.store.exists())
+
+        # same dicts as written
+        self.assertEqual(list(self.store.iter_users()), self.users)
+
+        # compact columns
+        posts = self.store.read_table('posts')
+        self.assertEqual(posts['username']['dictionary'], ["John_Doe", "Jane_Doe", "John_Smith"])
+        self.assertEqual(posts['username']['codes'].tolist(), [0, 0, 2])
+        self.assertEqual(posts['category']['codes'].tolist(), [0, 1, 0])
+        self.assertEqual(posts['post_timestamp']['values'].dtype, np.int64)
+        self.assertEqual(posts['post_timestamp']['valid'].tolist(), [True, True, False])
+        self.assertIsInstance(posts['text']['data'], np.memmap)
+
+        # the store is replaced
+        self.store.write(iter([self.users[1]]))
+        self.assertEqual(list(self.store.iter_users()), [self.users[1]])
+
+    def test_converter_output(self):
+        json_folder = os.path.join(self.temp_folder, "json_files")
+        converter = DiscourseConverter("link.com", dataset_folder=json_folder, columnar=True)
+        converter.user_profile_json_filepath_list = []
+        converter.user_post_history_json_filepath_list = []
+        profiles_json, post_histories_json = converter([os.path.join(self.html_folder, "profiles", "Matt_Cliffe.test")],
+                                                       [os.path.join(self.html_folder, "post_histories", "Matt_Cliffe.test")], supress_output=True)
+
+        # the data loader gives the same posts from the columnar store and from the json files
+        posts = DiscourseDataLoader(dataset_folder=json_folder).load_columnar()
+        DiscourseDataLoader.profiles = []
+        DiscourseDataLoader.post_histories = []
+        data_loader = DiscourseDataLoader(dataset_folder=os.path.join(self.temp_folder, "json_reference"))
+        os.makedirs(data_loader.dataset_folder)
+        self.assertEqual(posts, data_loader(profiles_json, post_histories_json))
+        self.assertEqual(len(posts), 6)
+
+    def tearDown(self):
+        DiscourseDataLoader.profiles = []
+        DiscourseDataLoader.post_histories = []
+
+        # remove contents of temporary folder
+        shutil.rmtree(self.temp_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
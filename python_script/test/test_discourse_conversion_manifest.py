@@ -0,0 +1,108 @@
+import unittest
+from python_script.data.discourse_conversion_manifest import DiscourseConversionManifest
+from python_script.data.discourse_converter import DiscourseConverter
+from python_script.data.discourse_page_store import PackedPageStore
+import os
+import shutil
+import json
+
+class TestDiscourseConversionManifest(unittest.TestCase):
+
+    def setUp(self):
+
+        def set_up_folders(self):
+            # testing folder
+            self.testing_folder = os.path.join("python_script","test")
+
+            # folder with the prepared html files
+            self.html_folder = os.path.join(self.testing_folder, "test_discourse_converter", "html_files")
+
+            # temporary folder with copies of the html files
+            self.temp_folder = os.path.join(self.testing_folder, "temp")
+            self.json_folder = os.path.join(self.temp_folder, "json_files")
+            for folder in ["profiles", "post_histories"]:
+                os.makedirs(os.path.join(self.temp_folder, "html_files", folder))
+                for username in ["Matt_Cliffe", "John_Doe"]:
+                    shutil.copy(os.path.join(self.html_folder, folder, "Matt_Cliffe.test"), os.path.join(self.temp_folder, "html_files", folder, username + ".html"))
+
+        set_up_folders(self)
+        self.profiles_html = [os.path.join(self.temp_folder, "html_files", "profiles", username + ".html") for username in ["Matt_Cliffe", "John_Doe"]]
+        self.post_histories_html = [os.path.join(self.temp_folder, "html_files", "post_histories", username + ".html") for username in ["Matt_Cliffe", "John_Doe"]]
+
+        self.converter = DiscourseConverter("link.com", dataset_folder=self.json_folder)
+        self.converter.user_profile_json_filepath_list = []
+        self.converter.user_post_history_json_filepath_list = []
+
+        # count the extracted pages
+        self.extracted = []
+        extract_profile = self.converter.extract_profile
+        extract_post_history = self.converter.extract_post_history
+        self.converter.extract_profile = lambda filepath: self.extracted.append(filepath) or extract_profile(filepath)
+        self.converter.extract_post_history = lambda filepath: self.extracted.append(filepath) or extract_post_history(filepath)
+
+    def test_is_current(self):
+        manifest = DiscourseConversionManifest(os.path.join(self.temp_folder, "conversion_manifest.sqlite"))
+        json_filepath = os.path.join(self.temp_folder, "John_Doe.json")
+        manifest.record([(json_filepath, "profiles/John_Doe.html", "100:1")], "1")
+
+        # the json file does not exist
+        self.assertFalse(manifest.is_current(json_filepath, "profiles/John_Doe.html", "100:1", "1"))
+        open(json_filepath, 'w').close()
+        self.assertTrue(manifest.is_current(json_filepath, "profiles/John_Doe.html", "100:1", "1"))
+
+        # changed page or converter
+        self.assertFalse(manifest.is_current(json_filepath, "profiles/John_Doe.html", "120:2", "1"))
+        self.assertFalse(manifest.is_current(json_filepath, "profiles/John_Doe.html", "100:1", "2"))
+        self.assertEqual(manifest.get_summary(), {"1": 1})
+        manifest.close()
+
+    def test_convert_changed_pages(self):
+        self.converter(self.profiles_html, self.post_histories_html, supress_output=True)
+        self.assertEqual(len(self.extracted), 4)
+
+        # nothing changed
+        self.extracted.clear()
+        self.converter(self.profiles_html, self.post_histories_html, supress_output=True)
+        self.assertEqual(self.extracted, [])
+
+        # page downloaded again
+        with open(self.post_histories_html[1], 'w', encoding="utf-8") as post_history_html:
+            post_history_html.write("<html><body></body></html>")
+        self.converter(self.profiles_html, self.post_histories_html, supress_output=True)
+        self.assertEqual(self.extracted, [self.post_histories_html[1]])
+        with open(self.converter.get_post_history_json_filepath(self.post_histories_html[1])) as post_history_json:
+            self.assertEqual(json.load(post_history_json), [])
+
+        # json file removed
+        self.extracted.clear()
+        os.remove(self.converter.get_profile_json_filepath(self.profiles_html[0]))
+        self.converter(self.profiles_html, self.post_histories_html, supress_output=True)
+        self.assertEqual(self.extracted, [self.profiles_html[0]])
+
+        # new version of the extraction
+        self.extracted.clear()
+        self.converter.converter_version = "test"
+        self.converter(self.profiles_html, self.post_histories_html, supress_output=True)
+        self.assertEqual(len(self.extracted), 4)
+
+    def test_packed_store_fingerprint(self):
+        store = PackedPageStore(os.path.join(self.temp_folder, "html_files"))
+        filepath = os.path.join(self.temp_folder, "html_files", "profiles", "Jane_Doe.html")
+        store.write(filepath, "first crawl")
+        fingerprint = store.fingerprint(filepath)
+
+        # the fingerprint depends on the content
+        store.write(filepath, "first crawl", overwrite=True)
+        self.assertEqual(store.fingerprint(filepath), fingerprint)
+        store.write(filepath, "second crawl", overwrite=True)
+        self.assertNotEqual(store.fingerprint(filepath), fingerprint)
+        self.assertRaises(FileNotFoundError, store.fingerprint, os.path.join(self.temp_folder, "html_files", "profiles", "Nobody.html"))
+        store.close()
+
+    def tearDown(self):
+        # remove contents of temporary folder
+        shutil.rmtree(self.temp_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 from python_script.data.discourse_converter import DiscourseConverter
+from python_script.data.discourse_conversion_manifest import DiscourseConversionManifest
 from python_script.data.website_base_data import WEBSITE_URL
+from python_script.data.discourse_parsers import LexborHTMLParser
 import os
 import shutil
 from pathlib import Path
@@ -117,6 +119,197 @@ class TestDiscourseConverter(unittest.TestCase):
         self.assertEqual(file_content['text'] , "overwritten")
         json_file.close()
 
+    def test_convert_with_workers(self):
+        # copies of the post history for several users
+        usernames = ["User_" + str(index) for index in range(8)]
+        html_folder = os.path.join(self.temp_folder, "html_files", "post_histories")
+        os.makedirs(html_folder)
+        post_histories_html = []
+        for username in usernames:
+            post_histories_html.append(os.path.join(html_folder, username + ".html"))
+            shutil.copy(os.path.join(self.html_folder, "post_histories", "Matt_Cliffe.test"), post_histories_html[-1])
+        expected_files = [os.path.join(self.json_folder, "post_histories", username + ".json") for username in usernames]
+
+        # existing files keep their position
+        self.converter._write_data_to_json_file(expected_files[3], [], overwrite=False)
+
+        # ordered
+        self.converter.user_post_history_json_filepath_list = []
+        self.converter.workers = 2
+        self.converter.chunksize = 2
+        self.converter._convert_post_histories(post_histories_html, supress_output=True)
+        self.assertEqual(self.converter.user_post_history_json_filepath_list, expected_files)
+
+        with open(expected_files[0]) as file:
+            post_history = json.load(file)
+        self.assertEqual(post_history, self.converter.extract_post_history(post_histories_html[0]))
+        with open(expected_files[3]) as file:
+            self.assertEqual(json.load(file), [])
+
+        # unordered
+        self.converter.user_post_history_json_filepath_list = []
+        self.converter.ordered = False
+        self.converter._convert_post_histories(post_histories_html, overwrite=True, supress_output=True)
+        self.assertEqual(sorted(self.converter.user_post_history_json_filepath_list), expected_files)
+        with open(expected_files[3]) as file:
+            self.assertEqual(len(json.load(file)), len(post_history))
+
+    def test_call_with_workers(self):
+        # pages of several users, converted with the manifest by a pool of processes
+        usernames = ["User_" + str(index) for index in range(4)]
+        html_filepaths = {}
+        for page_type in ["profiles", "post_histories"]:
+            os.makedirs(os.path.join(self.temp_folder, "html_files", page_type))
+            html_filepaths[page_type] = []
+            for username in usernames:
+                html_filepaths[page_type].append(os.path.join(self.temp_folder, "html_files", page_type, username + ".html"))
+                shutil.copy(os.path.join(self.html_folder, page_type, "Matt_Cliffe.test"), html_filepaths[page_type][-1])
+
+        converter = DiscourseConverter(WEBSITE_URL, dataset_folder=self.json_folder, workers=2, chunksize=1)
+        converter.user_profile_json_filepath_list = []
+        converter.user_post_history_json_filepath_list = []
+        profiles_json, post_histories_json = converter(html_filepaths["profiles"], html_filepaths["post_histories"], supress_output=True)
+        self.assertEqual(post_histories_json, [os.path.join(self.json_folder, "post_histories", username + ".json") for username in usernames])
+        with open(post_histories_json[-1]) as file:
+            self.assertEqual(json.load(file), converter.extract_post_history(html_filepaths["post_histories"][-1]))
+
+        # the conversions are recorded in the manifest
+        manifest = DiscourseConversionManifest(converter.manifest_filepath)
+        self.assertTrue(manifest.is_current(profiles_json[0], html_filepaths["profiles"][0], converter.page_store.fingerprint(html_filepaths["profiles"][0]), converter.converter_version))
+        manifest.close()
+
+    def test_convert_user(self):
+        # pages of one user, converted like in the pipeline
+        html_filepaths = []
+        for page_type in ["profiles", "post_histories"]:
+            os.makedirs(os.path.join(self.temp_folder, "html_files", page_type))
+            html_filepaths.append(os.path.join(self.temp_folder, "html_files", page_type, "Matt_Cliffe.html"))
+            shutil.copy(os.path.join(self.html_folder, page_type, "Matt_Cliffe.test"), html_filepaths[-1])
+        profile, post_history = self.converter.convert_user(*html_filepaths)
+        self.assertEqual(profile['username'], "Matt_Cliffe")
+        self.assertEqual(post_history, self.converter.extract_post_history(html_filepaths[1]))
+
+        # the json file of an unchanged page is loaded
+        profile_json_filepath = os.path.join(self.json_folder, "profiles", "Matt_Cliffe.json")
+        self.converter._write_data_to_json_file(profile_json_filepath, {'username': "stale"}, overwrite=True)
+        self.assertEqual(self.converter.convert_user(*html_filepaths)[0], {'username': "stale"})
+
+        # a page that is downloaded again is converted again
+        with open(html_filepaths[0], 'ab') as html_file:
+            html_file.write(b"\n")
+        self.assertEqual(self.converter.convert_user(*html_filepaths)[0], profile)
+
+    def test_single_pass_extraction(self):
+        # same data as the extractors for single fields
+        profile_dict = self.converter.extract_profile_from_soup(self.profile_soup, "Matt_Cliffe")
+        self.assertEqual(profile_dict, {'username': self.converter.get_username(self.profile_soup),
+                                        'full_name': self.converter.get_full_name(self.profile_soup),
+                                        'member_status': self.converter.get_member_status(self.profile_soup),
+                                        'join_timestamp': self.converter.get_join_timestamp(self.profile_soup),
+                                        'last_post_timestamp': self.converter.get_last_post_timestamp(self.profile_soup)})
+
+        post_history_list = self.converter.extract_post_history_from_soup(self.post_history_soup, "Matt_Cliffe")
+        all_posts_soup = self.post_history_soup.find_all('div', {'class': 'user-stream-item item ember-view'})
+        self.assertEqual(len(post_history_list), len(all_posts_soup))
+        for post_dict, post_soup in zip(post_history_list, all_posts_soup):
+            self.assertEqual(post_dict, {'username': "Matt_Cliffe",
+                                         'topic': self.converter.get_post_topic(post_soup),
+                                         'topic_link': self.converter.website_url + self.converter.get_post_topic_link(post_soup),
+                                         'category': self.converter.get_post_category(post_soup),
+                                         'post_timestamp': self.converter.get_post_timestamp(post_soup),
+                                         'text': self.converter.get_post_text(post_soup)})
+
+        # empty profile
+        self.assertEqual(self.converter.extract_profile_from_soup(soup("<html></html>", "html.parser"), "Matt_Cliffe"), {'username': "Matt_Cliffe"})
+
+    def test_strained_parsing(self):
+        profile_html_filepath = os.path.join(self.html_folder, "profiles", "Matt_Cliffe.test")
+        post_history_html_filepath = os.path.join(self.html_folder, "post_histories", "Matt_Cliffe.test")
+
+        # only the parts with data are parsed, same data as from the whole page
+        self.assertEqual(self.converter.extract_profile(profile_html_filepath), self.converter.extract_profile_from_soup(self.profile_soup, "Matt_Cliffe"))
+        self.assertEqual(self.converter.extract_post_history(post_history_html_filepath), self.converter.extract_post_history_from_soup(self.post_history_soup, "Matt_Cliffe"))
+
+        with open(post_history_html_filepath, 'rb') as post_history_html:
+            strained_soup = soup(post_history_html, "html.parser", parse_only=self.converter.post_history_strainer)
+        self.assertTrue(len(strained_soup.find_all(True)) < len(self.post_history_soup.find_all(True)))
+
+        # the page is cut to the posts before it is parsed, the posts are the same
+        with open(post_history_html_filepath, 'rb') as post_history_html:
+            post_history_page = post_history_html.read()
+        sliced_page = DiscourseConverter._slice_elements(post_history_page, DiscourseConverter.post_history_start_pattern)
+        self.assertLess(len(sliced_page), len(post_history_page) / 10)
+        self.assertEqual(str(soup(sliced_page, "html.parser", parse_only=self.converter.post_history_strainer)), str(strained_soup))
+
+        # the whole page is parsed if the posts are not found or not closed
+        self.assertEqual(DiscourseConverter._slice_elements(b"<html><div>no posts</div></html>", DiscourseConverter.post_history_start_pattern), b"<html><div>no posts</div></html>")
+        self.assertEqual(DiscourseConverter._slice_elements(b'<div class="user-stream-item item ember-view"><div>', DiscourseConverter.post_history_start_pattern), b'<div class="user-stream-item item ember-view"><div>')
+        self.assertEqual(DiscourseConverter._slice_elements(b'<p><div class="user-stream-item item ember-view"><div></div></div></p>', DiscourseConverter.post_history_start_pattern),
+                         b'<div class="user-stream-item item ember-view"><div></div></div>')
+
+    def test_parser_backends(self):
+        profile_html_filepath = os.path.join(self.html_folder, "profiles", "Matt_Cliffe.test")
+        post_history_html_filepath = os.path.join(self.html_folder, "post_histories", "Matt_Cliffe.test")
+
+        for parser in ["lxml", "selectolax"]:
+            if parser == "selectolax" and LexborHTMLParser is None: continue
+            with self.subTest(parser=parser):
+                # same data as the BeautifulSoup extractors
+                converter = DiscourseConverter(WEBSITE_URL, dataset_folder=self.json_folder, parser=parser)
+                self.assertEqual(converter.extract_profile(profile_html_filepath), self.converter.extract_profile(profile_html_filepath))
+                self.assertEqual(converter.extract_post_history(post_history_html_filepath), self.converter.extract_post_history(post_history_html_filepath))
+
+                # pages without the data
+                self.assertEqual(converter.parser_backend.parse_profile(b"<html><body></body></html>", "Matt_Cliffe"), {'username': "Matt_Cliffe"})
+                self.assertEqual(converter.parser_backend.parse_post_history(b"<html><body></body></html>", "Matt_Cliffe"), [])
+
+        self.assertRaises(ValueError, DiscourseConverter, WEBSITE_URL, parser="html5lib")
+
+    def test_streaming_post_history(self):
+        post_history_html_filepath = os.path.join(self.html_folder, "post_histories", "Matt_Cliffe.test")
+        converter = DiscourseConverter(WEBSITE_URL, dataset_folder=self.json_folder, parser="lxml-iterparse")
+
+        # the posts are yielded one by one, same data as the BeautifulSoup extractors
+        posts = converter.iter_post_history(post_history_html_filepath)
+        self.assertEqual(next(posts), self.converter.extract_post_history(post_history_html_filepath)[0])
+        self.assertEqual(list(converter.iter_post_history(post_history_html_filepath)), self.converter.extract_post_history(post_history_html_filepath))
+
+        # long post history made of copies of the posts
+        with open(post_history_html_filepath, 'rb') as post_history_html:
+            post_history_soup = soup(post_history_html, "html.parser", parse_only=DiscourseConverter.post_history_strainer)
+        post_history_folder = os.path.join(self.temp_folder, "html_files", "post_histories")
+        os.makedirs(post_history_folder)
+        long_post_history_html_filepath = os.path.join(post_history_folder, "Long_History.html")
+        with open(long_post_history_html_filepath, 'w', encoding="utf-8") as post_history_html:
+            post_history_html.write("<html><body><div>" + str(post_history_soup) * 100 + "</div></body></html>")
+
+        # the json file is written while the page is read
+        converter._convert_post_histories([long_post_history_html_filepath], supress_output=True)
+        with open(converter.get_post_history_json_filepath(long_post_history_html_filepath)) as post_history_json:
+            post_history = json.load(post_history_json)
+        self.assertEqual(len(post_history), 600)
+        self.assertEqual(post_history, self.converter.extract_post_history(long_post_history_html_filepath))
+
+        # empty page
+        empty_post_history_html_filepath = os.path.join(post_history_folder, "Empty_History.html")
+        open(empty_post_history_html_filepath, 'w').close()
+        self.assertEqual(list(converter.iter_post_history(empty_post_history_html_filepath)), [])
+
+    def test_topic_posts(self):
+        topic_filepath = os.path.join(self.html_folder, "topics", "4190.test")
+        posts = list(self.converter.iter_topic_posts(topic_filepath))
+        self.assertEqual([post['post_number'] for post in posts], [1, 222])
+        self.assertEqual(posts[1]['username'], "Matt_Cliffe")
+        self.assertEqual(posts[1]['text'], "Don’t worry, I’ll make sure to stick to cutting wood and plastic.\nThanks for the introduction to the laser cutter.")
+        self.assertEqual(self.converter.get_topic_id_from_topic_filepath(topic_filepath), 4190)
+
+        # topic links of the post histories
+        self.assertEqual(self.converter.get_topic_id_from_link(WEBSITE_URL + "/t/appreciation-thread/4190/222"), 4190)
+        self.assertEqual(self.converter.get_post_number_from_link(WEBSITE_URL + "/t/appreciation-thread/4190/222"), 222)
+        self.assertEqual(self.converter.get_post_number_from_link(WEBSITE_URL + "/t/joining-space/12505"), 1)
+        self.assertEqual(self.converter.get_topic_id_from_link("/t/12505"), 12505)
+        self.assertIsNone(self.converter.get_topic_id_from_link(WEBSITE_URL + "/u/Matt_Cliffe"))
+
     def test_get_username_from_profile_filepath(self):
         filepath = "C:\\users\\user\\Documents\\project\\datasets\\Discourse\\html_files\\profiles\\username.html"
         username = self.converter.get_username_from_profile_filepath(filepath)
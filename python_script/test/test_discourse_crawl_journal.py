@@ -0,0 +1,65 @@
+import unittest
+from python_script.data.discourse_crawl_journal import DiscourseCrawlJournal
+import os
+import shutil
+
+class TestDiscourseCrawlJournal(unittest.TestCase):
+
+    def setUp(self):
+
+        def set_up_folders(self):
+            # testing folder
+            self.testing_folder = os.path.join("python_script","test")
+
+            # temporary folder
+            self.temp_folder = os.path.join(self.testing_folder, "temp")
+            if not os.path.isdir(self.temp_folder):
+                os.makedirs(self.temp_folder)
+
+        set_up_folders(self)
+
+        self.journal_filepath = os.path.join(self.temp_folder, "crawl_journal.sqlite")
+        self.journal = DiscourseCrawlJournal(self.journal_filepath)
+        self.journal.add_pages([("link.com/u/John_Doe", "/u/John_Doe", DiscourseCrawlJournal.PROFILE, "profiles/John_Doe.html"),
+                                ("link.com/u/John_Doe/activity", "/u/John_Doe", DiscourseCrawlJournal.POST_HISTORY, "post_histories/John_Doe.html"),
+                                ("link.com/u/John_Smith", "/u/John_Smith", DiscourseCrawlJournal.PROFILE, "profiles/John_Smith.html"),
+                                ("link.com/u/John_Smith/activity", "/u/John_Smith", DiscourseCrawlJournal.POST_HISTORY, "post_histories/John_Smith.html")])
+
+    def test_pending_profile_links(self):
+        self.assertFalse(self.journal.is_empty())
+        self.assertEqual(self.journal.get_pending_profile_links(), ["/u/John_Doe", "/u/John_Smith"])
+
+        # a user is done when both pages are fetched
+        self.journal.mark_fetched("link.com/u/John_Doe", 100, 0.5)
+        self.assertEqual(self.journal.get_pending_profile_links(), ["/u/John_Doe", "/u/John_Smith"])
+        self.journal.mark_fetched("link.com/u/John_Doe/activity", 200, 1.5)
+        self.assertEqual(self.journal.get_pending_profile_links(), ["/u/John_Smith"])
+
+    def test_retries(self):
+        self.journal.mark_fetched("link.com/u/John_Smith/activity", 200, 1.5)
+        for _ in range(3):
+            self.assertIn("/u/John_Smith", self.journal.get_pending_profile_links(max_retries=3))
+            self.journal.mark_failed("link.com/u/John_Smith", 0.1)
+        self.assertNotIn("/u/John_Smith", self.journal.get_pending_profile_links(max_retries=3))
+        self.assertEqual(self.journal.get_state("link.com/u/John_Smith"), DiscourseCrawlJournal.FAILED)
+
+    def test_reopen(self):
+        # the state survives closing the journal
+        self.journal.mark_fetched("link.com/u/John_Doe", 100, 0.5)
+        self.journal.add_pages([("link.com/u/John_Doe", "/u/John_Doe", DiscourseCrawlJournal.PROFILE, "profiles/John_Doe.html")])
+        self.journal.close()
+        self.journal = DiscourseCrawlJournal(self.journal_filepath)
+
+        self.assertEqual(self.journal.get_state("link.com/u/John_Doe"), DiscourseCrawlJournal.FETCHED)
+        self.assertEqual(self.journal.get_filepaths(DiscourseCrawlJournal.PROFILE), ["profiles/John_Doe.html", "profiles/John_Smith.html"])
+        self.assertEqual(self.journal.get_summary()[DiscourseCrawlJournal.FETCHED], {'pages': 1, 'bytes': 100, 'duration': 0.5})
+
+    def tearDown(self):
+        self.journal.close()
+
+        # remove contents of temporary folder
+        shutil.rmtree(self.temp_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+from python_script.data.discourse_crawl_metrics import DiscourseCrawlMetrics
+from python_script.data.discourse_downloader import DiscourseDownloader
+from python_script.test.test_discourse_api_client import make_discourse_handler
+from http.server import ThreadingHTTPServer
+import threading
+import time
+import os
+import shutil
+
+class TestDiscourseCrawlMetrics(unittest.TestCase):
+
+    def setUp(self):
+
+        def set_up_folders(self):
+            # testing folder
+            self.testing_folder = os.path.join("python_script","test")
+
+            # folder with the prepared json files
+            self.json_folder = os.path.join(self.testing_folder, "test_discourse_api_client")
+
+            # temporary folder
+            self.temp_folder = os.path.join(self.testing_folder, "temp")
+            os.makedirs(self.temp_folder)
+
+        set_up_folders(self)
+        self.metrics = DiscourseCrawlMetrics()
+
+    def test_summary(self):
+        for index in range(10):
+            url = "https://example.org/u/user" + str(index) + "/activity"
+            self.metrics.record_scroll(url, 0.1, index / 10, 2)
+            self.metrics.record_request(url, "post_history", index + 1, 100)
+        self.metrics.record_request("https://example.org/u/user10", "profile", 30, 0, retries=2, success=False)
+
+        summary = self.metrics.get_summary()
+        self.assertEqual(summary['requests'], 11)
+        self.assertEqual(summary['failed'], 1)
+        self.assertEqual(summary['retries'], 2)
+        self.assertEqual(summary['bytes'], 1000)
+        self.assertEqual(summary['scrolls'], 20)
+
+        # failed requests are not part of the latency
+        self.assertAlmostEqual(summary['fetch_time'][50], 5.5)
+        self.assertAlmostEqual(summary['fetch_time'][90], 9.1)
+        self.assertAlmostEqual(summary['scroll_time'][50], 0.45)
+        self.assertEqual(DiscourseCrawlMetrics.get_percentile([], 50), 0)
+
+    def test_recent_requests(self):
+        # only the recent requests are kept, the totals count all of them
+        metrics = DiscourseCrawlMetrics(window_size=5)
+        for index in range(20):
+            metrics.record_request("https://example.org/u/user" + str(index), "profile", index + 1, 10)
+        self.assertEqual(len(metrics.recent_requests), 5)
+
+        summary = metrics.get_summary()
+        self.assertEqual(summary['requests'], 20)
+        self.assertEqual(summary['bytes'], 200)
+        self.assertEqual(summary['fetch_time_sum'], 210)
+        self.assertAlmostEqual(summary['fetch_time'][50], 18)
+        self.assertEqual(metrics.get_postfix()['p90'], 19.6)
+        self.assertEqual(metrics.get_summary(window=60)['requests'], 5)
+
+    def test_prometheus(self):
+        self.metrics.record_request("https://example.org/u/user", "profile", 0.5, 100)
+        text = self.metrics.to_prometheus()
+        self.assertIn("# TYPE discourse_crawl_requests_total counter\ndiscourse_crawl_requests_total 1.0\n", text)
+        self.assertIn('discourse_crawl_fetch_time_seconds{quantile="0.9"} 0.5\n', text)
+        self.assertIn("discourse_crawl_fetch_time_seconds_sum 0.5\ndiscourse_crawl_fetch_time_seconds_count 1.0\n", text)
+
+        # the file is updated while the crawl runs
+        filepath = os.path.join(self.temp_folder, "crawl_metrics.prom")
+        self.metrics.start_export(filepath, interval=0.01)
+        time.sleep(0.1)
+        self.metrics.stop_export()
+        with open(filepath) as metrics_file:
+            self.assertIn("discourse_crawl_requests_total 1.0\n", metrics_file.read())
+
+    def test_download_metrics(self):
+        # local stand-in for the discourse website
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_discourse_handler(self.json_folder))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        website_url = "http://127.0.0.1:" + str(server.server_address[1])
+
+        try:
+            metrics_filepath = os.path.join(self.temp_folder, "crawl_metrics.prom")
+            downloader = DiscourseDownloader(website_url, dataset_folder=os.path.join(self.temp_folder, "html_files"), backend="api", metrics_filepath=metrics_filepath)
+            downloader.user_profile_filepath_list = []
+            downloader.user_post_history_filepath_list = []
+            downloader(sleep_time=0, supress_output=True)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # one profile and one post history per user
+        summary = downloader.metrics.get_summary()
+        self.assertEqual(summary['requests'], 4)
+        self.assertEqual(summary['failed'], 0)
+        self.assertTrue(summary['bytes'] > 0)
+        with open(metrics_filepath) as metrics_file:
+            self.assertIn("discourse_crawl_requests_total 4.0", metrics_file.read())
+
+    def tearDown(self):
+        self.metrics.stop_export()
+
+        # remove contents of download folder
+        if os.path.isdir(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
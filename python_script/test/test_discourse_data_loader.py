@@ -40,3 +40,40 @@ class TestDiscourseDataLoader(unittest.TestCase):
         self.assertEqual(post['category'], "Admin")
         self.assertEqual(post['post_timestamp'], 1550859165213)
         self.assertEqual(post['text'], "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat. Duis aute irure dolor in reprehenderit in voluptate velit esse cillum dolore eu fugiat nulla pariatur. Excepteur sint occaecat cupidatat non proident, sunt in culpa qui officia deserunt mollit anim id est laborum.")
+
+    def test_parallel_load(self):
+        temp_folder = os.path.join(self.testing_folder, "temp")
+        for folder_name in ["profiles", "post_histories"]:
+            os.makedirs(os.path.join(temp_folder, folder_name))
+        try:
+            # users with the prepared files under other names and one user without posts
+            with open(os.path.join(self.json_folder, "json_files", "profiles", "Matt_Cliffe.json")) as json_file:
+                profile = json.load(json_file)
+            with open(os.path.join(self.json_folder, "json_files", "post_histories", "Matt_Cliffe.json")) as json_file:
+                post_history = json.load(json_file)
+            profiles = []
+            post_histories = []
+            for index in range(25):
+                username = "User_" + str(index).zfill(2)
+                profiles.append(os.path.join(temp_folder, "profiles", username + ".json"))
+                post_histories.append(os.path.join(temp_folder, "post_histories", username + ".json"))
+                user_posts = [] if index == 7 else [dict(post, username=username) for post in post_history]
+                with open(profiles[-1], 'w') as json_file:
+                    json.dump(dict(profile, username=username), json_file)
+                with open(post_histories[-1], 'w') as json_file:
+                    json.dump(user_posts, json_file)
+
+            serial_posts = DiscourseDataLoader(temp_folder).make_dataset([DiscourseDataLoader.load_json_file(filepath) for filepath in profiles],
+                                                                         [DiscourseDataLoader.load_json_file(filepath) for filepath in post_histories])
+            os.remove(os.path.join(temp_folder, "dataset.json"))
+
+            # same posts in the same order with threads and processes
+            for use_processes in [False, True]:
+                data_loader = DiscourseDataLoader(temp_folder, workers=3, use_processes=use_processes)
+                self.assertEqual(data_loader(list(reversed(profiles)), post_histories), serial_posts)
+                self.assertEqual(data_loader(), serial_posts)
+                os.remove(os.path.join(temp_folder, "dataset.json"))
+            self.assertEqual(len(serial_posts), 24 * len(post_history) + 1)
+            self.assertTrue(serial_posts[7 * len(post_history)]['empty'])
+        finally:
+            shutil.rmtree(temp_folder)
@@ -0,0 +1,94 @@
+import unittest
+from python_script.data.discourse_dataset_cache import DiscourseDatasetCache, DiscourseCachedPosts
+from python_script.data.discourse_data_loader import DiscourseDataLoader
+from python_script.data.discourse_json_writer import DiscourseJsonWriter
+from python_script.data.discourse_dataset import DiscourseDataset
+import numpy as np
+import os
+import shutil
+import json
+import copy
+
+class TestDiscourseDatasetCache(unittest.TestCase):
+
+    def setUp(self):
+
+        def set_up_folders(self):
+            # testing folder
+            self.testing_folder = os.path.join("python_script","test")
+
+            # temporary folder
+            self.temp_folder = os.path.join(self.testing_folder, "temp")
+            os.makedirs(self.temp_folder)
+
+        set_up_folders(self)
+        self.dataset_filepath = os.path.join(self.temp_folder, "dataset.json")
+
+        post = {'username': "John_Doe", 'topic': "Joining", 'topic_link': "link.com/t/joining/1", 'category': "Admin", 'post_timestamp': 1550859165213, 'text': "Grüße"}
+        self.profiles = [{'username': "John_Doe", 'full_name': "John Doe", 'member_status': "Member", 'join_timestamp': 1550691826355, 'last_post_timestamp': 1556527466920},
+                         {'username': "Jane_Doe", 'full_name': None},
+                         {'username': "John_Smith", 'member_status': "Not Member"}]
+        self.post_histories = [[post, dict(post, category="Discussion", post_timestamp=1550859165000, text=None)],
+                               [],
+                               [dict(post, username="John_Smith", post_timestamp=1450859165213, text="")]]
+
+    def test_write_and_open(self):
+        posts = DiscourseDataLoader(self.temp_folder).make_dataset(copy.deepcopy(self.profiles), copy.deepcopy(self.post_histories))
+
+        # the cache is mapped instead of loading the json file
+        cached_posts = DiscourseDataLoader(self.temp_folder)()
+        self.assertIsInstance(cached_posts, DiscourseCachedPosts)
+        self.assertIsInstance(cached_posts.rows, np.memmap)
+        with open(self.dataset_filepath) as json_file:
+            self.assertEqual(cached_posts, json.load(json_file))
+        self.assertEqual(cached_posts, posts)
+        self.assertEqual(cached_posts[-1], posts[-1])
+        self.assertEqual(cached_posts[1:3], posts[1:3])
+
+        # changed posts are kept and do not change the cache
+        changed_posts = copy.deepcopy(cached_posts)
+        changed_posts[0]['text'] = "changed"
+        for post in changed_posts: post['topic'] = "Leaving"
+        self.assertEqual(changed_posts[0]['text'], "changed")
+        self.assertEqual([post['topic'] for post in changed_posts], ["Leaving"] * 4)
+        self.assertEqual(json.loads(json.dumps(changed_posts[0]))['text'], "changed")
+        self.assertEqual(changed_posts.select([0])[0]['text'], "changed")
+        self.assertEqual(cached_posts[0]['text'], "Grüße")
+        self.assertEqual(DiscourseDataLoader(self.temp_folder)()[0]['text'], "Grüße")
+
+        # the dataset is sorted without reading the posts
+        dataset = DiscourseDataset("link.com", posts=cached_posts)
+        self.assertEqual(dataset, DiscourseDataset("link.com", posts=posts))
+        self.assertEqual(dataset[0]['username'], "John_Smith")
+        self.assertTrue(dataset[-1]['empty'])
+        self.assertEqual(dataset(username="John_Doe"), DiscourseDataset("link.com", posts=posts)(username="John_Doe"))
+
+    def test_invalidation(self):
+        cache = DiscourseDatasetCache(os.path.join(self.temp_folder, "dataset_cache"))
+        posts = DiscourseDataLoader(self.temp_folder).make_dataset(copy.deepcopy(self.profiles), copy.deepcopy(self.post_histories))
+        self.assertTrue(cache.is_current(self.dataset_filepath))
+
+        # a new dataset file is loaded from the json file and cached again
+        DiscourseJsonWriter.write(self.dataset_filepath, posts[:2], overwrite=True)
+        self.assertFalse(cache.is_current(self.dataset_filepath))
+        self.assertIsInstance(DiscourseDataLoader(self.temp_folder)(), list)
+        self.assertTrue(cache.is_current(self.dataset_filepath))
+        self.assertEqual(DiscourseDataLoader(self.temp_folder)(), posts[:2])
+
+        # a loader without cache loads the json file
+        self.assertIsInstance(DiscourseDataLoader(self.temp_folder, use_cache=False)(), list)
+
+        # fields that are no columns can not be cached
+        DiscourseJsonWriter.write(self.dataset_filepath, [dict(posts[0], likes=3)], overwrite=True)
+        self.assertFalse(cache.write(DiscourseDataLoader.load_json_file(self.dataset_filepath), self.dataset_filepath))
+        self.assertFalse(cache.is_current(self.dataset_filepath))
+        self.assertEqual(DiscourseDataLoader(self.temp_folder)(), [dict(posts[0], likes=3)])
+        self.assertFalse(os.path.isdir(os.path.join(self.temp_folder, "dataset_cache", "columns.tmp")))
+
+    def tearDown(self):
+        # remove contents of temporary folder
+        shutil.rmtree(self.temp_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
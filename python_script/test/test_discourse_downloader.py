@@ -4,6 +4,7 @@ from python_script.data.discourse_downloader import DiscourseDownloader
 import os
 import shutil
 from pathlib import Path
+from bs4 import BeautifulSoup as soup
 
 class TestDiscourseDownloader(unittest.TestCase):
     
@@ -32,10 +33,18 @@ class TestDiscourseDownloader(unittest.TestCase):
 
     def test_get_html_from_url(self):
         self.downloader._get_html_from_url(self.downloader.website_url, sleep_time=0)
+
+    def test_scroll_time_summary(self):
+        self.downloader._get_html_from_url(self.downloader.website_url, sleep_time=1)
+        summary = self.downloader.get_scroll_time_summary()
+
+        self.assertEqual(summary['pages'], 1)
+        self.assertGreaterEqual(summary['scrolls'], 1)
+        self.assertLess(summary['total_scroll_time'], summary['scrolls'] * (1 + 1))
     
     def test_download_user_data(self):
         # predefined short user list and download from that one
-        self.downloader.user_list_html_filepath = os.path.join(self.testing_folder, "test_discourse_downloader", "user_list_1.test")
+        self.downloader.user_list_filepath = os.path.join(self.testing_folder, "test_discourse_downloader", "user_list_1.test")
         
         # test downloader
         self.downloader._download_user_data(sleep_time=0, overwrite=False, supress_output=True)
@@ -51,6 +60,22 @@ class TestDiscourseDownloader(unittest.TestCase):
             # test file contents
             self.assertFalse(os.stat(file).st_size == 0)
 
+    def test_download_user_data_with_workers(self):
+        # predefined user list, downloaded by a pool of browsers
+        self.downloader.workers = 2
+        self.downloader.user_list_filepath = os.path.join(self.testing_folder, "test_discourse_downloader", "user_list_2.test")
+        
+        # test downloader
+        self.downloader._download_user_data(sleep_time=0, overwrite=False, supress_output=True)
+        
+        # test file names, the order of the user list is kept
+        usernames = ["Lorraine_Fossi", "Chris_Ross_Jackson", "Diego_Luiz", "John_Robertson", "Lewisbellerina"]
+        expected_profile_filepaths = [os.path.join(self.download_folder, "profiles", username + ".html") for username in usernames]
+        self.assertEqual(self.downloader.user_profile_filepath_list[-len(usernames):], expected_profile_filepaths)
+
+        for file in expected_profile_filepaths:
+            self.assertTrue(Path(file).is_file())
+
     def test_overwriting(self):
         
         filepath = os.path.join(self.download_folder, "overwrite_test.html")
@@ -92,5 +117,62 @@ class TestDiscourseDownloader(unittest.TestCase):
         # quit browser
         self.downloader._quit_chrome_browser()
 
+
+class TestDiscourseScrolling(unittest.TestCase):
+    """
+    scrolling with a stand-in for the browser, which answers the page state script with prepared states
+    """
+
+    class ScriptedDriver():
+        def __init__(self, states):
+            self.states = states
+
+        def execute_script(self, script):
+            if script != DiscourseDownloader.page_state_script: return None
+            return self.states.pop(0) if len(self.states) > 1 else self.states[0]
+
+    def test_running_request(self):
+        downloader = DiscourseDownloader.__new__(DiscourseDownloader)
+        downloader.poll_interval = 0.01
+        downloader.settle_time = 0.05
+
+        # height, posts, running requests, finished requests, spinners:
+        # a request of the posts is running longer than the settle time without a spinner, then the posts appear
+        states = [[1000, 5, 0, 0, 0]] + [[1000, 5, 1, 0, 0]] * 20 + [[2000, 10, 0, 1, 0], [2000, 10, 0, 0, 0]]
+        self.assertEqual(downloader._scroll_down(10, driver=self.ScriptedDriver(states)), 2)
+
+        # the page has settled
+        self.assertEqual(downloader._scroll_down(10, driver=self.ScriptedDriver([[1000, 5, 0, 0, 0]])), 1)
+
+
+class TestDiscoursePostHistoryMerge(unittest.TestCase):
+    """
+    merging of post histories, without a browser
+    """
+
+    def setUp(self):
+        # testing folder
+        self.testing_folder = os.path.join("python_script","test")
+
+    def test_merge_post_histories(self):
+        filepath = os.path.join(self.testing_folder, "test_discourse_converter", "html_files", "post_histories", "Matt_Cliffe.test")
+        with open(filepath, encoding="utf-8") as file:
+            post_history_html = file.read()
+
+        # post history without the two newest posts
+        post_history_soup = soup(post_history_html, "html.parser")
+        posts = post_history_soup.find_all('div', {'class': 'user-stream-item item ember-view'})
+        posts[0].decompose()
+        posts[1].decompose()
+        old_post_history_html = str(post_history_soup)
+        known_timestamp = DiscourseDownloader.get_newest_timestamp(None, old_post_history_html)
+        self.assertEqual(known_timestamp, 1556360381868)
+
+        merged_html = DiscourseDownloader.merge_post_histories(old_post_history_html, post_history_html, known_timestamp)
+        merged_posts = soup(merged_html, "html.parser").find_all('div', {'class': 'user-stream-item item ember-view'})
+        self.assertEqual(len(merged_posts), 6)
+        self.assertEqual(DiscourseDownloader.get_newest_timestamp(None, merged_html), 1556527466920)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
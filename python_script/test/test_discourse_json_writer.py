@@ -0,0 +1,77 @@
+import unittest
+from python_script.data.discourse_json_writer import DiscourseJsonWriter
+import os
+import shutil
+import json
+
+class TestDiscourseJsonWriter(unittest.TestCase):
+
+    def setUp(self):
+
+        def set_up_folders(self):
+            # testing folder
+            self.testing_folder = os.path.join("python_script","test")
+
+            # temporary folder
+            self.temp_folder = os.path.join(self.testing_folder, "temp")
+            os.makedirs(self.temp_folder)
+
+        set_up_folders(self)
+        self.posts = [{'username': "John_Doe", 'topic': "Joining", 'post_timestamp': index, 'text': "Grüße " + str(index)} for index in range(2500)]
+
+    def test_write(self):
+        # same file as json.dumps
+        filename = os.path.join(self.temp_folder, "posts.json")
+        DiscourseJsonWriter.write(filename, (post for post in self.posts))
+        with open(filename) as json_file:
+            self.assertEqual(json_file.read(), json.dumps(self.posts))
+
+        profile_filename = os.path.join(self.temp_folder, "profile.json")
+        DiscourseJsonWriter.write(profile_filename, {'username': "John_Doe"})
+        DiscourseJsonWriter.write(os.path.join(self.temp_folder, "empty.json"), [])
+        with open(profile_filename) as json_file:
+            self.assertEqual(json.load(json_file), {'username': "John_Doe"})
+        with open(os.path.join(self.temp_folder, "empty.json")) as json_file:
+            self.assertEqual(json.load(json_file), [])
+
+        # existing files are only replaced with overwrite
+        DiscourseJsonWriter.write(profile_filename, {'username': "Jane_Doe"})
+        with open(profile_filename) as json_file:
+            self.assertEqual(json.load(json_file), {'username': "John_Doe"})
+        DiscourseJsonWriter.write(profile_filename, {'username': "Jane_Doe"}, overwrite=True)
+        with open(profile_filename) as json_file:
+            self.assertEqual(json.load(json_file), {'username': "Jane_Doe"})
+
+    def test_multi_record_file(self):
+        filename = os.path.join(self.temp_folder, "dataset.json")
+        with DiscourseJsonWriter(filename) as writer:
+            writer.write_records(self.posts[:1500])
+            writer.write_record(self.posts[1500])
+            writer.write_records(iter(self.posts[1501:]))
+            # the file only exists when it is complete
+            self.assertFalse(os.path.isfile(filename))
+        with open(filename) as json_file:
+            self.assertEqual(json.load(json_file), self.posts)
+
+    def test_atomic_write(self):
+        filename = os.path.join(self.temp_folder, "posts.json")
+        DiscourseJsonWriter.write(filename, self.posts[:1])
+
+        def failing_posts():
+            yield self.posts[0]
+            raise RuntimeError("page could not be parsed")
+
+        # the old file stays, no temporary file is left
+        with self.assertRaises(RuntimeError):
+            DiscourseJsonWriter.write(filename, failing_posts(), overwrite=True)
+        with open(filename) as json_file:
+            self.assertEqual(json.load(json_file), self.posts[:1])
+        self.assertEqual(os.listdir(self.temp_folder), ["posts.json"])
+
+    def tearDown(self):
+        # remove contents of temporary folder
+        shutil.rmtree(self.temp_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
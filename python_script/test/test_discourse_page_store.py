@@ -0,0 +1,151 @@
+import unittest
+from python_script.data.discourse_page_store import DirectoryPageStore, PackedPageStore
+from python_script.data.discourse_converter import DiscourseConverter
+import os
+import shutil
+import json
+import pickle
+from pathlib import Path
+
+class TestDiscoursePageStore(unittest.TestCase):
+
+    def setUp(self):
+
+        def set_up_folders(self):
+            # testing folder
+            self.testing_folder = os.path.join("python_script","test")
+
+            # folder with the prepared html files
+            self.html_folder = os.path.join(self.testing_folder, "test_discourse_converter", "html_files")
+
+            # temporary folder
+            self.temp_folder = os.path.join(self.testing_folder, "temp")
+            self.store_folder = os.path.join(self.temp_folder, "html_files")
+            os.makedirs(self.store_folder)
+
+        set_up_folders(self)
+        self.store = PackedPageStore(self.store_folder)
+
+    def test_directory_overwriting(self):
+        store = DirectoryPageStore()
+        filepath = os.path.join(self.store_folder, "overwrite_test.html")
+        store.write(filepath, "not overwritten")
+        store.write(filepath, "overwritten")
+        self.assertEqual(store.read(filepath), b"not overwritten")
+        store.write(filepath, "overwritten", overwrite=True)
+        self.assertEqual(store.read(filepath), b"overwritten")
+        self.assertEqual(os.listdir(self.store_folder), ["overwrite_test.html"])
+
+        # pages can also be flushed to the disk one by one
+        DirectoryPageStore(sync=True).write(filepath, "synced", overwrite=True)
+        self.assertEqual(store.read(filepath), b"synced")
+
+    def test_packed_overwriting(self):
+        filepath = os.path.join(self.store_folder, "profiles", "overwrite_test.html")
+        self.assertFalse(self.store.exists(filepath))
+        self.store.write(filepath, "not overwritten")
+        self.store.write(filepath, "overwritten")
+        self.assertEqual(self.store.read(filepath), b"not overwritten")
+        self.store.write(filepath, "overwritten", overwrite=True)
+        self.assertEqual(self.store.read(filepath), b"overwritten")
+        self.assertEqual(self.store.size(filepath), len("overwritten"))
+
+    def test_packed_compaction(self):
+        filepath = os.path.join(self.store_folder, "post_histories", "compaction_test.html")
+        other_filepath = os.path.join(self.store_folder, "post_histories", "other_test.html")
+        self.store.write(other_filepath, "other page")
+        for version in range(3):
+            self.store.write(filepath, "post history version " + str(version), overwrite=True)
+        self.assertEqual(self.store.get_summary()['contents'], 4)
+        pack_size = os.path.getsize(self.store.pack_filepath)
+
+        # nothing is rewritten below the threshold
+        self.assertEqual(self.store.compact(threshold=0.99)['contents'], 0)
+
+        # only the contents of the pages are kept
+        self.assertEqual(self.store.compact()['contents'], 2)
+        self.assertEqual(self.store.get_summary()['contents'], 2)
+        self.assertLess(os.path.getsize(self.store.pack_filepath), pack_size)
+        self.assertEqual(self.store.read(filepath), b"post history version 2")
+        self.assertEqual(self.store.read(other_filepath), b"other page")
+
+        # the store can be written to after compaction
+        self.store.write(filepath, "post history version 3", overwrite=True)
+        self.assertEqual(self.store.read(filepath), b"post history version 3")
+        self.assertEqual(self.store.read(other_filepath), b"other page")
+
+        # the index points to the new pack file, the old one is deleted
+        self.assertEqual(sorted([filename for filename in os.listdir(self.store_folder) if filename.endswith(".pack")]), ["pages.1.pack"])
+        self.store.close()
+        store = PackedPageStore(self.store_folder)
+        self.assertEqual(store.read(filepath), b"post history version 3")
+
+        # a compaction that is interrupted before the index is committed keeps the old pack file
+        class InterruptedConnection():
+            def __init__(self, connection):
+                self.connection = connection
+            def __getattr__(self, name):
+                return getattr(self.connection, name)
+            def commit(self):
+                raise KeyboardInterrupt()
+        connection = store.connection
+        store.connection = InterruptedConnection(connection)
+        self.assertRaises(KeyboardInterrupt, store.compact)
+        connection.rollback()
+        connection.close()
+        store.pack_file.close()
+        store = PackedPageStore(self.store_folder)
+        self.assertEqual(store.read(filepath), b"post history version 3")
+        self.assertEqual(store.read(other_filepath), b"other page")
+        store.close()
+
+    def test_packed_deduplication(self):
+        with open(os.path.join(self.html_folder, "post_histories", "Matt_Cliffe.test"), encoding="utf-8") as file:
+            html = file.read()
+
+        # the same page in two crawls is only stored once
+        self.store.write(os.path.join(self.store_folder, "post_histories", "Matt_Cliffe.html"), html)
+        self.store.write(os.path.join(self.store_folder, "post_histories", "Matt_Cliffe.html"), html, overwrite=True)
+        self.store.write(os.path.join(self.store_folder, "post_histories", "Matt_Cliffe_copy.html"), html)
+
+        summary = self.store.get_summary()
+        self.assertEqual(summary['pages'], 2)
+        self.assertEqual(summary['contents'], 1)
+        self.assertLess(summary['compressed_bytes'], summary['bytes'])
+
+        # the store is the same after reopening and in another process
+        self.store.close()
+        store = pickle.loads(pickle.dumps(PackedPageStore(self.store_folder)))
+        self.assertEqual(store.read(os.path.join(self.store_folder, "post_histories", "Matt_Cliffe_copy.html")).decode("utf-8"), html)
+        store.close()
+
+    def test_convert_from_packed_store(self):
+        profile_filepath = os.path.join(self.store_folder, "profiles", "Matt_Cliffe.html")
+        post_history_filepath = os.path.join(self.store_folder, "post_histories", "Matt_Cliffe.html")
+        with open(os.path.join(self.html_folder, "profiles", "Matt_Cliffe.test"), encoding="utf-8") as file:
+            self.store.write(profile_filepath, file.read())
+        with open(os.path.join(self.html_folder, "post_histories", "Matt_Cliffe.test"), encoding="utf-8") as file:
+            self.store.write(post_history_filepath, file.read())
+
+        # the pages only exist in the pack file
+        self.assertFalse(Path(profile_filepath).is_file())
+
+        converter = DiscourseConverter("link.com", dataset_folder=os.path.join(self.temp_folder, "json_files"), page_store=self.store)
+        converter.user_profile_json_filepath_list = []
+        converter.user_post_history_json_filepath_list = []
+        profiles_json, post_histories_json = converter([profile_filepath], [post_history_filepath], supress_output=True)
+
+        with open(profiles_json[0]) as file:
+            self.assertEqual(json.load(file)['full_name'], "Matt Cliffe")
+        with open(post_histories_json[0]) as file:
+            self.assertEqual(len(json.load(file)), 6)
+
+    def tearDown(self):
+        self.store.close()
+
+        # remove contents of temporary folder
+        shutil.rmtree(self.temp_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
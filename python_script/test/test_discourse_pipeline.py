@@ -0,0 +1,95 @@
+import unittest
+from python_script.data.discourse_downloader import DiscourseDownloader
+from python_script.data.discourse_converter import DiscourseConverter
+from python_script.data.discourse_data_loader import DiscourseDataLoader
+from python_script.data.discourse_pipeline import DiscoursePipeline
+from python_script.test.test_discourse_api_client import make_discourse_handler
+from http.server import ThreadingHTTPServer
+import threading
+import os
+import shutil
+import json
+from pathlib import Path
+
+
+class TestDiscoursePipeline(unittest.TestCase):
+
+    def setUp(self):
+
+        def set_up_folders(self):
+            # testing folder
+            self.testing_folder = os.path.join("python_script","test")
+
+            # folder with the prepared json files
+            self.json_folder = os.path.join(self.testing_folder, "test_discourse_api_client")
+
+            # temporary folder
+            self.temp_folder = os.path.join(self.testing_folder, "temp")
+
+        def start_server(self):
+            # local stand-in for the discourse website
+            self.server = ThreadingHTTPServer(("127.0.0.1", 0), make_discourse_handler(self.json_folder))
+            self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+            self.server_thread.start()
+            self.website_url = "http://127.0.0.1:" + str(self.server.server_address[1])
+
+        set_up_folders(self)
+        start_server(self)
+
+        DiscourseDownloader.user_profile_filepath_list = []
+        DiscourseDownloader.user_post_history_filepath_list = []
+        DiscourseConverter.user_profile_json_filepath_list = []
+        DiscourseConverter.user_post_history_json_filepath_list = []
+        DiscourseDataLoader.profiles = []
+        DiscourseDataLoader.post_histories = []
+
+    def make_pipeline(self, folder):
+        downloader = DiscourseDownloader(self.website_url, dataset_folder=os.path.join(folder, "html_files"), workers=2, backend="api")
+        converter = DiscourseConverter(self.website_url, dataset_folder=os.path.join(folder, "json_files"))
+        data_loader = DiscourseDataLoader(dataset_folder=os.path.join(folder, "json_files"))
+        return DiscoursePipeline(downloader, converter, data_loader, conversion_workers=2)
+
+    def test_call(self):
+        folder = os.path.join(self.temp_folder, "streaming")
+        posts = self.make_pipeline(folder)(sleep_time=0, supress_output=True)
+
+        # same posts as downloading, converting and loading one after another
+        sequential_folder = os.path.join(self.temp_folder, "sequential")
+        downloader = DiscourseDownloader(self.website_url, dataset_folder=os.path.join(sequential_folder, "html_files"), backend="api")
+        downloader.user_profile_filepath_list = []
+        downloader.user_post_history_filepath_list = []
+        _, profiles_html, post_histories_html = downloader(sleep_time=0, supress_output=True)
+        converter = DiscourseConverter(self.website_url, dataset_folder=os.path.join(sequential_folder, "json_files"))
+        profiles_json, post_histories_json = converter(profiles_html, post_histories_html, supress_output=True)
+        sequential_posts = DiscourseDataLoader(dataset_folder=os.path.join(sequential_folder, "json_files"))(profiles_json, post_histories_json)
+
+        self.assertEqual(len(posts), 3)
+        self.assertEqual(posts, sequential_posts)
+
+        # json files and dataset file are written
+        self.assertTrue(Path(os.path.join(folder, "json_files", "profiles", "Matt_Cliffe.json")).is_file())
+        self.assertTrue(Path(os.path.join(folder, "json_files", "post_histories", "Lorraine_Fossi.json")).is_file())
+        with open(os.path.join(folder, "json_files", "dataset.json")) as dataset_file:
+            self.assertEqual(json.load(dataset_file), posts)
+
+    def test_resume(self):
+        folder = os.path.join(self.temp_folder, "streaming")
+        posts = self.make_pipeline(folder)(sleep_time=0, supress_output=True)
+
+        # the journal has no pending users, the users are converted from the existing files
+        os.remove(os.path.join(folder, "json_files", "dataset.json"))
+        DiscourseDownloader.user_profile_filepath_list = []
+        DiscourseDownloader.user_post_history_filepath_list = []
+        self.assertEqual(self.make_pipeline(folder)(sleep_time=0, supress_output=True), posts)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+        # remove contents of download folder
+        if os.path.isdir(self.temp_folder):
+            shutil.rmtree(self.temp_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
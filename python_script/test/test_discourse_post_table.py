@@ -0,0 +1,205 @@
+import unittest
+from python_script.data.discourse_post_table import DiscoursePostTable, DiscoursePostView, DiscoursePost
+from python_script.data.discourse_dataset_cache import DiscourseDatasetCache, DiscourseCachedPosts
+from unittest import mock
+from python_script.data.discourse_dataset import DiscourseDataset
+from datetime import datetime
+import tempfile
+import copy
+import json
+import os
+
+class TestDiscoursePostTable(unittest.TestCase):
+
+    def setUp(self):
+        post = {'username': "John_Doe", 'topic': "Joining", 'topic_link': "link.com/t/joining/1", 'category': "Admin", 'post_timestamp': 1550859165213, 'text': "Grüße"}
+        self.profiles = [{'username': "John_Doe", 'full_name': "John Doe", 'member_status': "Member", 'join_timestamp': 1550691826355, 'last_post_timestamp': 1556527466920},
+                         {'username': "Jane_Doe", 'full_name': None},
+                         {'username': "John_Smith", 'member_status': "Not Member"}]
+        self.post_histories = [[post, dict(post, category="Discussion", post_timestamp=1550859165000)],
+                               [],
+                               [dict(post, username="John_Smith", post_timestamp=1450859165213)]]
+
+        # the posts of the dataset file, every post with the fields of its profile
+        self.combined_posts = []
+        for profile, post_history in zip(self.profiles, self.post_histories):
+            profile = dict(profile, empty=len(post_history) == 0)
+            if len(post_history) == 0: self.combined_posts.append(profile)
+            self.combined_posts.extend([dict(post, **profile) for post in post_history])
+
+    def test_from_users(self):
+        table = DiscoursePostTable.from_users(copy.deepcopy(self.profiles), copy.deepcopy(self.post_histories))
+
+        # every profile is stored once
+        self.assertEqual(len(table.users), 3)
+        self.assertEqual(table.user_ids, [0, 0, 1, 2])
+        self.assertNotIn('full_name', table.posts[0])
+
+        # the posts have the fields of their profile
+        self.assertIsInstance(table[0], DiscoursePost)
+        self.assertEqual(table[0]['full_name'], "John Doe")
+        self.assertIn('member_status', table[-1])
+        self.assertNotIn('full_name', table[-1])
+        self.assertEqual(table, self.combined_posts)
+        self.assertEqual([list(post.keys()) for post in table.iter_dicts()], [list(post.keys()) for post in self.combined_posts])
+        self.assertEqual(json.loads(json.dumps(list(table.iter_dicts()))), self.combined_posts)
+
+        # users can be added in chunks, e.g. by the workers of the data loader
+        table = DiscoursePostTable([], [], [])
+        for position in range(len(self.profiles)):
+            table.add_users(copy.deepcopy(self.profiles[position:position + 1]), copy.deepcopy(self.post_histories[position:position + 1]))
+        self.assertEqual(table.user_ids, [0, 0, 1, 2])
+        self.assertEqual(table, self.combined_posts)
+
+    def test_from_posts(self):
+        table = DiscoursePostTable.from_posts(self.combined_posts)
+        self.assertEqual(len(table.users), 3)
+        self.assertEqual(table, self.combined_posts)
+        self.assertEqual(table[2], {'username': "Jane_Doe", 'full_name': None, 'empty': True})
+
+        # a slice is a table of the same users
+        self.assertIs(table[1:3].users, table.users)
+        self.assertEqual(table[1:3], self.combined_posts[1:3])
+        self.assertEqual(table.sorted_by_post_timestamp()[0]['username'], "John_Smith")
+
+    def test_change_post(self):
+        table = DiscoursePostTable.from_posts(self.combined_posts)
+
+        # a changed field only changes one post
+        table[0]['full_name'] = "Johnny Doe"
+        self.assertEqual(table[0]['full_name'], "Johnny Doe")
+        self.assertEqual(table[1]['full_name'], "John Doe")
+
+        del table[1]['member_status']
+        self.assertNotIn('member_status', table[1])
+        self.assertEqual(table[1]['full_name'], "John Doe")
+        self.assertEqual(table[0]['member_status'], "Member")
+
+        # a copy of a post is a dict
+        post = copy.deepcopy(table[3])
+        post['text'] = "changed"
+        self.assertEqual(table[3]['text'], "Grüße")
+
+        # the posts are dicts, changed with any dict method
+        self.assertIsInstance(table[0], dict)
+        self.assertEqual(json.loads(json.dumps(table[0])), dict(table[0]))
+        table[3].update(text="updated", topic="Leaving")
+        self.assertEqual(table[3].pop('topic'), "Leaving")
+        table[3].setdefault('likes', 3)
+        self.assertEqual(table[3]['text'], "updated")
+        self.assertNotIn('topic', table[3])
+        self.assertEqual(table[3]['likes'], 3)
+
+    def test_dataset(self):
+        posts = copy.deepcopy(self.combined_posts)
+        posts[2]['full_name'] = "Jane Doe"
+        dataset = DiscourseDataset("link.com", posts=posts)
+        self.assertIsInstance(dataset.posts, DiscoursePostView)
+        self.assertEqual(len(dataset.posts.table.users), 3)
+        self.assertEqual(dataset[0]['username'], "John_Smith")
+        self.assertEqual(dataset[-1]['full_name'], "Jane Doe")
+        self.assertEqual(len(dataset(full_name="John Doe")), 2)
+        self.assertEqual(dataset(member_status="Not Member")[0]['username'], "John_Smith")
+        self.assertEqual(sorted(dataset['username']), ["Jane_Doe", "John_Doe", "John_Smith"])
+
+    def test_view(self):
+        table = DiscoursePostTable.from_posts(copy.deepcopy(self.combined_posts))
+        view = DiscoursePostView(table)
+        self.assertEqual(view, self.combined_posts)
+        self.assertEqual(view.select([3, 0]), [self.combined_posts[3], self.combined_posts[0]])
+        self.assertEqual(view.sorted_by_post_timestamp()[0]['username'], "John_Smith")
+
+        # a changed post is copied, the table does not change
+        child = view.select([0, 1])
+        self.assertIsInstance(child[0], dict)
+        child[0]['text'] = "changed"
+        del child[1]['full_name']
+        self.assertEqual(child[0]['text'], "changed")
+        self.assertEqual(child[0]['full_name'], "John Doe")
+        self.assertNotIn('full_name', child[1])
+        self.assertEqual(view, self.combined_posts)
+        self.assertEqual(table, self.combined_posts)
+
+        # a view of a view sees the changes made before the selection, but not the later ones
+        grandchild = child.select([0])
+        self.assertEqual(grandchild[0]['text'], "changed")
+        child[0]['text'] = "changed again"
+        self.assertEqual(grandchild[0]['text'], "changed")
+        grandchild[0]['topic'] = "Leaving"
+        self.assertEqual(child[0]['topic'], "Joining")
+
+        # a materialized view shares no dicts with the table
+        materialized = child.materialize()
+        self.assertIsInstance(materialized, DiscoursePostTable)
+        self.assertEqual(materialized, list(child.iter_dicts()))
+        materialized[0]['text'] = "materialized"
+        self.assertEqual(child[0]['text'], "changed again")
+
+    def test_filtered_dataset(self):
+        dataset = DiscourseDataset("link.com", posts=copy.deepcopy(self.combined_posts))
+
+        # filtered datasets share the table of the dataset
+        filtered = dataset(username="John_Doe")
+        self.assertIs(filtered.posts.table, dataset.posts.table)
+        self.assertIs(filtered(category="Admin").posts.table, dataset.posts.table)
+        self.assertIs(dataset.search("joining").posts.table, dataset.posts.table)
+        self.assertEqual(len(filtered), 2)
+
+        # the filters read the fields from the table, no post is made
+        with mock.patch.object(DiscoursePostTable, '_fields', side_effect=AssertionError("post made")):
+            self.assertEqual(len(dataset(username="John_Doe", post_after=datetime.fromtimestamp(1550859165.1))), 1)
+            self.assertEqual(len(dataset(member_status=["Member", "Not Member"], category="Admin")), 2)
+            self.assertEqual(len(dataset.search("JOHN_S")), 1)
+
+        # changing a filtered post does not change the dataset
+        filtered[0]['text'] = "changed"
+        self.assertEqual(filtered[0]['text'], "changed")
+        self.assertEqual(dataset(username="John_Doe")[0]['text'], "Grüße")
+        self.assertEqual(len(dataset(text="changed")), 0)
+        self.assertEqual(len(filtered(text="changed")), 1)
+
+        # a materialized dataset does not share the table
+        materialized = filtered.materialize()
+        self.assertIsNot(materialized.posts.table, dataset.posts.table)
+        self.assertEqual(materialized, filtered)
+
+    def test_filtered_cache(self):
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "dataset.json")
+            with open(filename, 'w') as dataset_file:
+                json.dump(self.combined_posts, dataset_file)
+            cache = DiscourseDatasetCache(os.path.join(folder, "dataset_cache"))
+            self.assertTrue(cache.write(self.combined_posts, filename))
+            posts = cache.open()
+
+            # a selection of the cached posts maps the same columns, sorted from the timestamp column
+            selected = posts.select([3, 0, 2])
+            self.assertIs(selected.store, posts.store)
+            self.assertEqual(selected, [self.combined_posts[3], self.combined_posts[0], self.combined_posts[2]])
+            self.assertEqual([post['username'] for post in selected.sorted_by_post_timestamp()], ["John_Smith", "John_Doe", "Jane_Doe"])
+
+            # the fields are read from their columns, the same as in the posts
+            for row, post in enumerate(self.combined_posts):
+                for key in DiscoursePostTable.profile_keys + ['topic', 'topic_link', 'category', 'post_timestamp', 'text']:
+                    self.assertEqual(posts.get_value(row, key, "missing"), post.get(key, "missing"))
+
+            dataset = DiscourseDataset("link.com", posts=posts)
+            with mock.patch.object(DiscourseCachedPosts, '_read_row', side_effect=AssertionError("post made")):
+                self.assertEqual(len(dataset(username="John_Doe", post_after=datetime.fromtimestamp(1550859165.1))), 1)
+                self.assertEqual(len(dataset.search("john_s")), 1)
+            filtered = dataset(username="John_Doe")
+            self.assertEqual(len(filtered), 2)
+            self.assertIsInstance(filtered.posts, type(posts))
+            self.assertEqual(filtered.posts, [post for post in dataset.posts if post['username'] == "John_Doe"])
+
+            # changes of the cached posts are kept by the dataset, not by the dataset it is filtered from
+            filtered[0]['topic'] = "X"
+            for post in filtered: post['category'] = "Y"
+            self.assertEqual(filtered[0]['topic'], "X")
+            self.assertEqual(filtered['category'], ["Y"])
+            self.assertEqual(filtered(category="Y", topic="X").posts, [filtered[0]])
+            self.assertEqual(dataset(username="John_Doe")[0]['topic'], "Joining")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from python_script.data.discourse_text_store import DiscourseTextStore
+from python_script.data.discourse_downloader import DiscourseDownloader
+from python_script.data.discourse_converter import DiscourseConverter
+from python_script.data.discourse_dataset import DiscourseDataset
+from python_script.test.test_discourse_api_client import make_discourse_handler
+from http.server import ThreadingHTTPServer
+import threading
+import os
+import shutil
+
+class TestDiscourseTextStore(unittest.TestCase):
+
+    def setUp(self):
+
+        def set_up_folders(self):
+            # testing folder
+            self.testing_folder = os.path.join("python_script","test")
+
+            # folder with the prepared json files
+            self.json_folder = os.path.join(self.testing_folder, "test_discourse_api_client")
+
+            # temporary folder
+            self.temp_folder = os.path.join(self.testing_folder, "temp")
+            os.makedirs(self.temp_folder)
+
+        set_up_folders(self)
+        self.text_store = DiscourseTextStore(os.path.join(self.temp_folder, "texts.sqlite"))
+
+    def test_write_topic(self):
+        posts = ({'post_number': number, 'username': "John_Doe", 'text': "post " + str(number)} for number in range(1, 1201))
+        self.assertEqual(self.text_store.write_topic(4190, "fingerprint", posts), 1200)
+        self.assertEqual(self.text_store.get_text(4190, 1200), "post 1200")
+        self.assertIsNone(self.text_store.get_text(4190, 1201))
+        self.assertTrue(self.text_store.is_current(4190, "fingerprint"))
+        self.assertFalse(self.text_store.is_current(4190, "new fingerprint"))
+
+        # the posts of a topic are replaced
+        self.text_store.write_topic(4190, "new fingerprint", iter([{'post_number': 1, 'username': "John_Doe", 'text': "edited"}]))
+        self.assertEqual(self.text_store.get_text(4190, 1), "edited")
+        self.assertIsNone(self.text_store.get_text(4190, 2))
+        self.assertEqual(self.text_store.get_summary(), {'topics': 1, 'posts': 1})
+
+        # the store is not locked while the posts are read
+        def read_while_parsing():
+            yield {'post_number': 1, 'username': "John_Doe", 'text': self.text_store.get_text(4190, 1) + " again"}
+        self.text_store.write_topic(4190, "fingerprint", read_while_parsing())
+        self.assertEqual(self.text_store.get_text(4190, 1), "edited again")
+
+        # the posts are written in batches while they are read, the readers see the old posts until the commit
+        def read_in_batches():
+            for number in range(1, 1201):
+                if number == 1001:
+                    self.assertEqual(self.text_store.get_text(4190, 1), "edited again")
+                    self.assertIsNone(self.text_store.get_text(4190, 1000))
+                yield {'post_number': number, 'username': "John_Doe", 'text': "post " + str(number)}
+        self.assertEqual(self.text_store.write_topic(4190, "fingerprint", read_in_batches()), 1200)
+        self.assertEqual(self.text_store.get_text(4190, 1000), "post 1000")
+
+        # a topic that could not be read keeps its posts
+        def broken_page():
+            yield {'post_number': 1, 'username': "John_Doe", 'text': "broken"}
+            raise ValueError("broken page")
+        self.assertRaises(ValueError, self.text_store.write_topic, 4190, "broken", broken_page())
+        self.assertEqual(self.text_store.get_text(4190, 1), "post 1")
+        self.assertTrue(self.text_store.is_current(4190, "fingerprint"))
+
+    def test_full_texts(self):
+        # local stand-in for the discourse website
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_discourse_handler(self.json_folder))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        website_url = "http://127.0.0.1:" + str(server.server_address[1])
+
+        # several posts in the same topics
+        topic_links = [website_url + "/t/appreciation-thread/4190/222",
+                       website_url + "/t/joining-space/12505/1",
+                       website_url + "/t/appreciation-thread/4190/221",
+                       website_url + "/u/Matt_Cliffe"]
+        try:
+            downloader = DiscourseDownloader(website_url, dataset_folder=os.path.join(self.temp_folder, "html_files"), backend="api")
+            topic_filepaths = downloader.download_topics(topic_links, supress_output=True)
+
+            # every topic is downloaded once
+            self.assertEqual(topic_filepaths, [os.path.join(self.temp_folder, "html_files", "topics", "4190.json"),
+                                               os.path.join(self.temp_folder, "html_files", "topics", "12505.json")])
+            self.assertEqual(downloader.metrics.get_summary()['requests'], 2)
+            downloader.download_topics(topic_links, supress_output=True)
+            self.assertEqual(downloader.metrics.get_summary()['requests'], 2)
+
+            # the browser backend also requests the topics from the json endpoints, without a browser
+            browser_downloader = DiscourseDownloader(website_url, dataset_folder=os.path.join(self.temp_folder, "browser_files"), workers=2)
+            self.assertEqual([os.path.basename(topic_filepath) for topic_filepath in browser_downloader.download_topics(topic_links, supress_output=True)], ["4190.json", "12505.json"])
+            self.assertIsNone(browser_downloader.driver)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # every topic is parsed once
+        converter = DiscourseConverter(website_url, dataset_folder=os.path.join(self.temp_folder, "json_files"))
+        self.assertEqual(converter.convert_topics(topic_filepaths, self.text_store, supress_output=True), 4)
+        self.assertEqual(converter.convert_topics(topic_filepaths, self.text_store, supress_output=True), 0)
+
+        # the full text of a post, not only the excerpt
+        dataset = DiscourseDataset(website_url, posts=[{'username': "Matt_Cliffe", 'topic_link': topic_links[0], 'post_timestamp': 1}], text_store=self.text_store)
+        self.assertEqual(dataset.get_full_text(dataset[0]), "Don’t worry, I’ll make sure to stick to cutting wood and plastic.\nThanks for the introduction to the laser cutter.")
+        self.assertEqual(dataset(username="Matt_Cliffe").get_full_text(dataset[0]), dataset.get_full_text(dataset[0]))
+        self.assertIsNone(dataset.get_full_text({'topic_link': website_url + "/t/joining-space/12505/2"}))
+
+    def tearDown(self):
+        self.text_store.close()
+
+        # remove contents of temporary folder
+        shutil.rmtree(self.temp_folder)
+
+
+if __name__ == '__main__':
+    unittest.main()